@@ -1,12 +1,18 @@
 import os
 import tempfile
 import shutil
-from flask import Flask, request, jsonify, render_template, session
+import json
+from flask import Flask, request, jsonify, render_template, session, Response, stream_with_context
 from dotenv import load_dotenv
 from analyzer.clone import GitCloner
 from analyzer.parser import RepoParser
 from analyzer.summarizer import RepoSummarizer
-from analyzer.generator import DocumentationGenerator
+from analyzer.heuristic_summarizer import HeuristicSummarizer
+from analyzer.generator import DocumentationGenerator, SUMMARY_SECTIONS
+from analyzer.jobs import JobQueue
+from analyzer.session_store import RepoSessionStore
+from analyzer.retrieval import ChunkIndex
+from analyzer.metrics import StageTimer, render_metrics
 
 load_dotenv()
 
@@ -14,7 +20,19 @@ app = Flask(__name__)
 app.secret_key = os.getenv('FLASK_SECRET_KEY', 'default-secret-key')
 
 # Store analyzed repositories in session for chatbot functionality
-analyzed_repos = {}
+analyzed_repos = RepoSessionStore(
+    max_bytes=int(os.getenv('REPO_STORE_MAX_BYTES', str(256 * 1024 * 1024))),
+    ttl=int(os.getenv('REPO_STORE_TTL', str(24 * 3600))),
+    spill_path=os.getenv('REPO_STORE_SPILL_PATH', os.path.join('.cache', 'repo_sessions.sqlite3')) or None
+)
+
+# Background workers running the clone -> parse -> summarize -> generate pipeline
+job_queue = JobQueue(
+    max_workers=int(os.getenv('ANALYSIS_WORKERS', '2')),
+    stages=['clone', 'parse', 'summarize', 'generate'],
+    retention=int(os.getenv('JOB_RETENTION_SECONDS', '3600')),
+    max_events=int(os.getenv('JOB_MAX_EVENTS', '5000'))
+)
 
 @app.route('/')
 def index():
@@ -23,57 +41,150 @@ def index():
 
 @app.route('/analyze', methods=['POST'])
 def analyze_repository():
-    """Analyze a GitHub repository and return comprehensive documentation"""
+    """Queue analysis of a GitHub repository and return a job ID to poll"""
     try:
         data = request.get_json()
         repo_url = data.get('repo_url')
+        commit = data.get('commit')  # Optional commit SHA or ref, defaults to the remote HEAD
+        mode = data.get('mode') or os.getenv('ANALYSIS_MODE', 'llm')  # 'fast' skips the LLM entirely
         
         if not repo_url:
             return jsonify({'error': 'Repository URL is required'}), 400
+        if mode not in ('llm', 'fast'):
+            return jsonify({'error': "Mode must be 'llm' or 'fast'"}), 400
         
-        # Create temporary directory
-        temp_dir = tempfile.mkdtemp()
-        
+        # Optional shallow/partial/sparse clone settings, e.g. {"depth": 1, "filter": "blob:none", "sparse": true}
         try:
-            # Step 1: Clone repository
-            cloner = GitCloner()
-            repo_path = cloner.clone_repository(repo_url, temp_dir)
-            
-            # Step 2: Parse repository structure and detect tech stack
+            cloner = GitCloner.from_options(data.get('clone_options'))
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': f'Invalid clone options: {str(e)}'}), 400
+        
+        # Concurrent requests for the same repository, commit and clone settings share one job
+        job_key = (repo_url, commit or 'HEAD', mode, cloner.options_key())
+        job, created = job_queue.submit(job_key, run_analysis, repo_url, commit, cloner, mode)
+        
+        return jsonify({
+            'success': True,
+            'job_id': job.id,
+            'status': job.status,
+            'deduplicated': not created
+        }), 202
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Report the progress of an analysis job, including the documentation once finished"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    response = {'success': True, **job.to_dict()}
+    if job.status != 'completed':
+        return jsonify(response)
+    
+    # Finished documentation never changes; let clients revalidate by its content hash
+    etag = job.result['documentation']['metadata']['content_hash']
+    if request.if_none_match.contains(etag):
+        return Response(status=304, headers={'ETag': f'"{etag}"'})
+    
+    response.update(job.result)
+    response = jsonify(response)
+    response.set_etag(etag)
+    return response
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def stream_job(job_id):
+    """Stream documentation sections of an analysis job as Server-Sent Events"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    def generate():
+        for item in job.iter_events():
+            if item is None:
+                yield ": keep-alive\n\n"  # Stop proxies from closing an idle stream
+                continue
+            event, data = item
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        
+        if job.status == 'completed':
+            yield f"event: done\ndata: {json.dumps(job.result)}\n\n"
+        else:
+            yield f"event: error\ndata: {json.dumps({'error': job.error})}\n\n"
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+def run_analysis(job, repo_url, commit, cloner, mode='llm'):
+    """Clone, parse, summarize and document a repository, recording progress on the job"""
+    # Create temporary directory
+    temp_dir = tempfile.mkdtemp()
+    timer = StageTimer()  # Whole-stage durations for the documentation metadata
+    
+    try:
+        # Step 1: Clone repository
+        with job.stage('clone'), timer.stage('clone'):
+            repo_path = cloner.clone_repository(repo_url, temp_dir, commit)
+        
+        # Step 2: Parse repository structure and detect tech stack
+        with job.stage('parse'), timer.stage('parse'):
             parser = RepoParser()
             repo_data = parser.analyze_repository(repo_path)
-            
-            # Step 3: Generate AI summaries
-            summarizer = RepoSummarizer()
-            summaries = summarizer.generate_summaries(repo_data)
-            
-            # Step 4: Generate final documentation
-            generator = DocumentationGenerator()
-            documentation = generator.generate_documentation(repo_data, summaries)
-            
-            # Store for chatbot functionality
-            repo_id = repo_url.split('/')[-1]  # Use repo name as ID
-            analyzed_repos[repo_id] = {
-                'repo_data': repo_data,
-                'summaries': summaries,
-                'repo_path': repo_path,
-                'temp_dir': temp_dir
-            }
-            
-            return jsonify({
-                'success': True,
-                'documentation': documentation,
-                'repo_id': repo_id
-            })
-            
-        except Exception as e:
-            # Clean up on error
-            if os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir)
-            raise e
-            
+        
+        # Statistics need no LLM, so streaming clients get them straight away
+        generator = DocumentationGenerator()
+        for name in ('header', 'statistics'):
+            job.publish('section', {'name': name, 'markdown': generator.render_section(name, repo_data, {})})
+        
+        def on_section(key, value):
+            if key == 'file_explanations':
+                for file_path, explanation in value.items():
+                    job.publish('file', {
+                        'path': file_path,
+                        'markdown': generator.render_file_explanation(file_path, explanation)
+                    })
+            elif key in SUMMARY_SECTIONS:
+                name = SUMMARY_SECTIONS[key]
+                job.publish('section', {'name': name, 'markdown': generator.render_section(name, repo_data, {key: value})})
+        
+        def on_token(key, token):
+            job.publish('token', {'name': SUMMARY_SECTIONS[key], 'text': token})
+        
+        # Step 3: Generate AI summaries, or heuristic ones in fast mode
+        with job.stage('summarize'), timer.stage('summarize'):
+            summarizer = HeuristicSummarizer() if mode == 'fast' else RepoSummarizer()
+            # Streaming LLM calls cost more, so only stream tokens when a client is reading the events
+            summaries = summarizer.generate_summaries(repo_data, on_section, on_token if job.subscribers else None)
+        
+        # Step 4: Generate final documentation
+        with job.stage('generate'):
+            documentation = generator.generate_documentation(repo_data, summaries,
+                                                             {**timer.report(), **cloner.last_timings})
+        
+        # Store for chatbot functionality
+        repo_id = repo_url.split('/')[-1]  # Use repo name as ID
+        analyzed_repos.put(repo_id, {
+            'repo_data': repo_data,
+            'summaries': summaries,
+            'chunk_index': ChunkIndex(repo_data['chunks']),
+            'repo_path': repo_path,
+            'temp_dir': temp_dir
+        })
+        
+        return {
+            'documentation': documentation,
+            'repo_id': repo_id
+        }
+        
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        # Clean up on error
+        if os.path.exists(temp_dir):
+            shutil.rmtree(temp_dir)
+        raise e
 
 @app.route('/chat', methods=['POST'])
 def chat_about_repo():
@@ -86,15 +197,14 @@ def chat_about_repo():
         if not repo_id or not question:
             return jsonify({'error': 'Repository ID and question are required'}), 400
         
-        if repo_id not in analyzed_repos:
-            return jsonify({'error': 'Repository not found. Please analyze it first.'}), 404
-        
         # Get repository data
-        repo_info = analyzed_repos[repo_id]
+        repo_info = analyzed_repos.get(repo_id)
+        if repo_info is None:
+            return jsonify({'error': 'Repository not found. Please analyze it first.'}), 404
         
         # Use summarizer to answer specific questions
         summarizer = RepoSummarizer()
-        answer = summarizer.answer_question(repo_info['repo_data'], question)
+        answer = summarizer.answer_question(repo_info['repo_data'], question, repo_info.get('chunk_index'))
         
         return jsonify({
             'success': True,
@@ -108,16 +218,22 @@ def chat_about_repo():
 def cleanup_repo(repo_id):
     """Clean up temporary files for a repository"""
     try:
-        if repo_id in analyzed_repos:
-            temp_dir = analyzed_repos[repo_id]['temp_dir']
-            if os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir)
-            del analyzed_repos[repo_id]
+        analyzed_repos.delete(repo_id)
             
         return jsonify({'success': True, 'message': 'Repository cleaned up'})
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Pipeline stage durations, bytes read, LLM calls, tokens and cache hits for Prometheus"""
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/sessions/stats', methods=['GET'])
+def session_stats():
+    """Report size and eviction counters of the analyzed repository store"""
+    return jsonify({'success': True, **analyzed_repos.stats()})
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=8080)
@@ -0,0 +1,1263 @@
+"""Benchmarks for the repository analysis pipeline.
+
+Usage:
+    python benchmark.py scan --files 100000
+    python benchmark.py chat --repo path/to/repo "How is the app configured?"
+    python benchmark.py prompts --repo path/to/repo --budget 3000
+    python benchmark.py read --files 20000 --max-file-size 200000
+    python benchmark.py tech-stack --files 100000
+    python benchmark.py fast --files 5000
+    python benchmark.py parallel-scan --files 20000 --latency-ms 0.5 --workers 1 2 4 8 16
+    python benchmark.py suite --shape monorepo --output results.json --baseline baseline.json
+    python benchmark.py html --files 200 --repeat 20
+    python benchmark.py tree --files 50000 --files-per-dir 1000
+    python benchmark.py stats --files 200000
+    python benchmark.py outline --files 5000 --workers 1 2 4
+"""
+import os
+import sys
+import time
+import shutil
+import random
+import json
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from contextlib import contextmanager
+from analyzer.parser import RepoParser
+from analyzer.retrieval import ChunkIndex, chunk_files
+from analyzer.manifests import extract_dependencies
+
+
+def generate_synthetic_repo(root, num_files=100000, files_per_dir=50, seed=42, max_file_size=2048):
+    """Generate a synthetic repository tree with the given number of files"""
+    rng = random.Random(seed)
+    extensions = ['.py', '.js', '.ts', '.md', '.json', '.txt', '.css', '.html', '.go', '']
+    special = ['README.md', 'package.json', 'requirements.txt', 'main.py', 'index.js', 'app.py']
+    top_dirs = ['src', 'lib', 'tests', 'docs', 'packages', 'node_modules', 'build']
+
+    created = 0
+    dir_count = 0
+    while created < num_files:
+        # Spread directories over a few levels below a handful of top-level folders
+        parts = [rng.choice(top_dirs)] + [f"d{rng.randint(0, 30)}" for _ in range(rng.randint(0, 3))]
+        dir_path = os.path.join(root, *parts, f"pkg{dir_count}")
+        os.makedirs(dir_path, exist_ok=True)
+        dir_count += 1
+
+        for i in range(min(files_per_dir, num_files - created)):
+            if i < len(special) and rng.random() < 0.1:
+                name = special[i]
+            else:
+                name = f"file{i}{rng.choice(extensions)}"
+            with open(os.path.join(dir_path, name), 'w') as f:
+                f.write('x' * rng.randint(0, max_file_size))
+            created += 1
+
+    return root
+
+
+def legacy_traversals(repo_path):
+    """Filesystem work done by the pre-index parser: four os.walk passes plus a listdir tree"""
+    skipped = ['node_modules', '__pycache__', 'build', 'dist']
+
+    def build_tree(path, depth=0):
+        if depth >= 3:
+            return
+        try:
+            for item in os.listdir(path):
+                item_path = os.path.join(path, item)
+                if os.path.isdir(item_path):
+                    build_tree(item_path, depth + 1)
+                else:
+                    os.path.getsize(item_path)
+        except PermissionError:
+            pass
+
+    build_tree(repo_path)
+    for _ in range(4):
+        for root, dirs, files in os.walk(repo_path):
+            dirs[:] = [d for d in dirs if not d.startswith('.') and d not in skipped]
+            for file in files:
+                os.path.getsize(os.path.join(root, file))
+
+
+LEGACY_TECH_STACK_INDICATORS = {
+    'Python': ['.py', 'requirements.txt', 'setup.py', 'pyproject.toml', 'Pipfile'],
+    'JavaScript/Node.js': ['.js', '.jsx', 'package.json', '.npmrc'],
+    'TypeScript': ['.ts', '.tsx', 'tsconfig.json'],
+    'React': ['package.json'],
+    'Vue.js': ['package.json'],
+    'Angular': ['package.json', 'angular.json'],
+    'Java': ['.java', 'pom.xml', 'build.gradle'],
+    'C#': ['.cs', '.csproj', '.sln'],
+    'Go': ['.go', 'go.mod', 'go.sum'],
+    'Rust': ['.rs', 'Cargo.toml'],
+    'PHP': ['.php', 'composer.json'],
+    'Ruby': ['.rb', 'Gemfile'],
+    'Docker': ['Dockerfile', 'docker-compose.yml'],
+    'Kubernetes': ['.yaml', '.yml'],
+}
+
+
+def legacy_detect_tech_stack(file_index):
+    """The pre-index detector: every indicator list checked per file, package.json parsed per technology"""
+    detected_tech = set()
+    for entry in file_index:
+        for tech, indicators in LEGACY_TECH_STACK_INDICATORS.items():
+            if entry.name in indicators or entry.extension in indicators:
+                detected_tech.add(tech)
+                if entry.name == 'package.json':
+                    try:
+                        with open(entry.path, 'r', encoding='utf-8') as f:
+                            package_data = json.loads(f.read())
+                        dependencies = {**package_data.get('dependencies', {}),
+                                        **package_data.get('devDependencies', {})}
+                        for dependency, name in (('react', 'React'), ('vue', 'Vue.js'),
+                                                 ('@angular/core', 'Angular'), ('express', 'Express.js')):
+                            if dependency in dependencies:
+                                detected_tech.add(name)
+                    except Exception:
+                        pass
+    return list(detected_tech)
+
+
+def legacy_read_important_files(file_index):
+    """The pre-budget reader: substring matching, whole files up to 50KB read, 5000 chars kept"""
+    important_patterns = [
+        'README.md', 'README.txt', 'README.rst',
+        'main.py', 'app.py', 'index.js', 'main.js',
+        'main.tsx', 'index.tsx', 'App.tsx',
+        'package.json', 'requirements.txt', 'setup.py'
+    ]
+    file_contents = {}
+    bytes_read = 0
+    for entry in file_index:
+        if not any(pattern in entry.name for pattern in important_patterns):
+            continue
+        if entry.size is not None and entry.size <= 50000:
+            with open(entry.path, 'r', encoding='utf-8', errors='ignore') as f:
+                content = f.read()
+            bytes_read += len(content)
+            file_contents[entry.relative_path] = content[:5000]
+    return file_contents, bytes_read
+
+
+def time_call(func, *args, repeat=3):
+    """Return the best wall-clock time of several calls"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_scan(args):
+    """Compare the single-pass scanner against the legacy multi-walk traversal"""
+    root = tempfile.mkdtemp(prefix='bench-repo-')
+    try:
+        print(f"Generating {args.files} files in {root} ...")
+        generate_synthetic_repo(root, args.files)
+
+        parser = RepoParser()
+        legacy = time_call(legacy_traversals, root, repeat=args.repeat)
+        scan = time_call(parser._scan_repository, root, repeat=args.repeat)
+        full = time_call(parser.analyze_repository, root, repeat=args.repeat)
+
+        print(f"legacy traversals:   {legacy:8.3f}s")
+        print(f"single-pass scan:    {scan:8.3f}s  ({legacy / scan:.1f}x faster)")
+        print(f"analyze_repository:  {full:8.3f}s")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+class SlowDirEntry:
+    """os.DirEntry wrapper whose stat() pays a simulated network round-trip"""
+
+    def __init__(self, entry, latency):
+        self._entry = entry
+        self._latency = latency
+        self.name = entry.name
+        self.path = entry.path
+
+    def is_dir(self):
+        return self._entry.is_dir()
+
+    def is_symlink(self):
+        return self._entry.is_symlink()
+
+    def stat(self):
+        time.sleep(self._latency)
+        return self._entry.stat()
+
+
+@contextmanager
+def slow_filesystem(latency):
+    """Make every os.scandir call and DirEntry.stat() sleep, like an NFS mount would"""
+    real_scandir = os.scandir
+
+    @contextmanager
+    def slow_scandir(path):
+        time.sleep(latency)
+        with real_scandir(path) as it:
+            yield (SlowDirEntry(entry, latency) for entry in it)
+
+    os.scandir = slow_scandir
+    try:
+        yield
+    finally:
+        os.scandir = real_scandir
+
+
+def bench_parallel_scan(args):
+    """Scan a tree on a simulated slow filesystem with increasing worker counts"""
+    root = tempfile.mkdtemp(prefix='bench-repo-')
+    try:
+        print(f"Generating {args.files} files in {root} ...")
+        generate_synthetic_repo(root, args.files)
+        expected = RepoParser(scan_workers=1)._scan_repository(root)
+
+        print(f"{'workers':>8} {'seconds':>9} {'speedup':>8}  (latency {args.latency_ms}ms per call)")
+        baseline = None
+        with slow_filesystem(args.latency_ms / 1000):
+            for workers in args.workers:
+                parser = RepoParser(scan_workers=workers)
+                elapsed = time_call(parser._scan_repository, root, repeat=args.repeat)
+                if parser._scan_repository(root) != expected:
+                    sys.exit(f"{workers} workers produced a different scan than the serial walk")
+                baseline = baseline or elapsed
+                print(f"{workers:8d} {elapsed:9.3f} {baseline / elapsed:7.1f}x")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def legacy_chat_context(repo_data, summarizer):
+    """Context the chat prompt used before retrieval: every file's first 1000 chars plus the full tree"""
+    file_contents_summary = ""
+    for file_path, content in repo_data['file_contents'].items():
+        file_contents_summary += f"\n{file_path}:\n{content[:1000]}...\n"
+    return file_contents_summary + summarizer._format_folder_structure(repo_data['structure'])
+
+
+def bench_tech_stack(args):
+    """Compare the compiled tech stack index with the legacy nested indicator loop"""
+    root = tempfile.mkdtemp(prefix='bench-repo-')
+    try:
+        print(f"Generating {args.files} files in {root} ...")
+        generate_synthetic_repo(root, args.files)
+        parser = RepoParser()
+        file_index, _ = parser._scan_repository(root)
+
+        legacy = time_call(legacy_detect_tech_stack, file_index, repeat=args.repeat)
+        compiled = time_call(parser._detect_tech_stack, file_index, repeat=args.repeat)
+
+        print(f"legacy indicator loop: {legacy:8.3f}s  {sorted(legacy_detect_tech_stack(file_index))}")
+        print(f"compiled index:        {compiled:8.3f}s  {parser._detect_tech_stack(file_index)}")
+        print(f"speedup:               {legacy / compiled:8.1f}x")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def bench_fast(args):
+    """Time the LLM-free pipeline: parse, heuristic summaries and document generation"""
+    from analyzer.heuristic_summarizer import HeuristicSummarizer
+    from analyzer.generator import DocumentationGenerator
+
+    root = args.repo or tempfile.mkdtemp(prefix='bench-repo-')
+    try:
+        if not args.repo:
+            print(f"Generating {args.files} files in {root} ...")
+            generate_synthetic_repo(root, args.files)
+
+        timings = {}
+        start = time.perf_counter()
+        repo_data = RepoParser().analyze_repository(root)
+        timings['parse'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        summaries = HeuristicSummarizer().generate_summaries(repo_data)
+        timings['summarize'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        DocumentationGenerator().generate_documentation(repo_data, summaries)
+        timings['generate'] = time.perf_counter() - start
+
+        for stage, elapsed in timings.items():
+            print(f"{stage:10} {elapsed:8.3f}s")
+        total = sum(timings.values())
+        print(f"{'total':10} {total:8.3f}s  ({'within' if total < 1 else 'over'} the 1s target)")
+    finally:
+        if not args.repo:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+def bench_read(args):
+    """Compare the legacy important-file reader with the prefix reader and its byte budget"""
+    root = tempfile.mkdtemp(prefix='bench-repo-')
+    try:
+        print(f"Generating {args.files} files (up to {args.max_file_size} bytes each) in {root}...")
+        generate_synthetic_repo(root, args.files, max_file_size=args.max_file_size)
+
+        parser = RepoParser(read_budget_bytes=args.budget)
+        file_index, _ = parser._scan_repository(root)
+
+        legacy_time = time_call(legacy_read_important_files, file_index, repeat=args.repeat)
+        new_time = time_call(parser._read_important_files, file_index, repeat=args.repeat)
+        legacy_contents, legacy_bytes = legacy_read_important_files(file_index)
+        contents = parser._read_important_files(file_index)
+
+        print(f"{'reader':10} {'files':>7} {'bytes read':>12} {'seconds':>9}")
+        print(f"{'legacy':10} {len(legacy_contents):7d} {legacy_bytes:12d} {legacy_time:9.3f}")
+        print(f"{'budgeted':10} {len(contents):7d} {sum(len(c) for c in contents.values()):12d} {new_time:9.3f}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def bench_chat(args):
+    """Compare chat prompt size and assembly time with and without chunk retrieval"""
+    # Imported here so the filesystem benchmarks run without LangChain installed
+    from langchain.llms.fake import FakeListLLM
+    from analyzer.summarizer import RepoSummarizer
+
+    repo_data = RepoParser().analyze_repository(args.repo)
+    summarizer = RepoSummarizer(llm=FakeListLLM(responses=['ok']), cache=False)
+
+    start = time.perf_counter()
+    index = ChunkIndex(repo_data['chunks'])
+    build_time = time.perf_counter() - start
+
+    legacy = legacy_chat_context(repo_data, summarizer)
+    legacy_time = time_call(legacy_chat_context, repo_data, summarizer, repeat=args.repeat)
+
+    def retrieval_context(question):
+        return (summarizer._get_chat_context(repo_data, question, index) +
+                summarizer._truncate_lines(summarizer._format_folder_structure(repo_data['structure']),
+                                           summarizer.chat_structure_chars))
+
+    print(f"{len(repo_data['chunks'])} chunks indexed in {build_time:.3f}s")
+    print(f"{'question':40} {'legacy chars':>13} {'rag chars':>10} {'legacy s':>9} {'rag s':>9}")
+    for question in args.questions:
+        rag = retrieval_context(question)
+        rag_time = time_call(retrieval_context, question, repeat=args.repeat)
+        print(f"{question[:40]:40} {len(legacy):13d} {len(rag):10d} {legacy_time:9.4f} {rag_time:9.4f}")
+
+    print("Estimated prompt tokens are roughly chars / 4; LLM latency grows with prompt tokens.")
+
+
+def bench_prompts(args):
+    """Report the tokens of every summary prompt for a repository, without calling a real LLM"""
+    from langchain.llms.fake import FakeListLLM
+    from analyzer.summarizer import RepoSummarizer
+
+    repo_data = RepoParser().analyze_repository(args.repo)
+    summarizer = RepoSummarizer(llm=FakeListLLM(responses=['ok']), max_concurrency=1, cache=False)
+    summarizer.prompt_token_budget = args.budget
+    summarizer.file_prompt_token_budget = args.file_budget
+
+    start = time.perf_counter()
+    report = summarizer.generate_summaries(repo_data)['prompt_tokens']
+    elapsed = time.perf_counter() - start
+
+    for name, tokens in report['sections'].items():
+        print(f"{name:40} {tokens:8d}")
+    for file_path, tokens in report['files'].items():
+        print(f"{'file: ' + file_path:40} {tokens:8d}")
+    for file_paths, tokens in report['batches'].items():
+        print(f"{'batch: ' + file_paths:40} {tokens:8d}")
+    print(f"{'total':40} {report['total']:8d}  ({elapsed:.3f}s to build and send)")
+
+
+# Synthetic repository shapes for the benchmark suite
+#   files/files_per_dir/depth: how many files, how they are grouped and how deep directories nest
+#   sizes: 'uniform' up to max_file_size, or 'skewed' (mostly small files, a long tail of large ones)
+#   packages: workspaces of a monorepo, each with its own package.json
+SHAPES = {
+    'small': {'files': 500, 'files_per_dir': 20, 'depth': 2, 'sizes': 'uniform', 'max_file_size': 4096, 'packages': 0},
+    'medium': {'files': 5000, 'files_per_dir': 40, 'depth': 3, 'sizes': 'skewed', 'max_file_size': 65536, 'packages': 0},
+    'large': {'files': 50000, 'files_per_dir': 50, 'depth': 4, 'sizes': 'skewed', 'max_file_size': 65536, 'packages': 0},
+    'deep': {'files': 5000, 'files_per_dir': 5, 'depth': 12, 'sizes': 'uniform', 'max_file_size': 2048, 'packages': 0},
+    'monorepo': {'files': 10000, 'files_per_dir': 25, 'depth': 3, 'sizes': 'skewed', 'max_file_size': 16384, 'packages': 200},
+}
+
+SOURCE_TEMPLATES = {
+    '.py': 'def handler_{n}(request):\n    """Handle request {n}"""\n    return {{"status": {n}}}\n\n',
+    '.js': 'export function handler{n}(request) {{\n  return {{ status: {n} }};\n}}\n\n',
+    '.ts': 'export const value{n}: number = {n};\n',
+    '.go': 'func Handler{n}() int {{\n\treturn {n}\n}}\n\n',
+    '.md': 'Section {n} of the documentation.\n\n',
+}
+
+
+def generate_shaped_repo(root, files, files_per_dir, depth, sizes, max_file_size, packages, seed=42):
+    """Generate a deterministic synthetic repository of the given shape; see SHAPES"""
+    rng = random.Random(seed)
+    extensions = list(SOURCE_TEMPLATES) + ['.json', '.txt', '.png', '']
+
+    def file_size():
+        if sizes == 'skewed':
+            return min(int(rng.lognormvariate(6, 1.5)), max_file_size)
+        return rng.randint(0, max_file_size)
+
+    def write_file(path, size):
+        template = SOURCE_TEMPLATES.get(os.path.splitext(path)[1])
+        if template:
+            parts, length, n = [], 0, 0
+            while length < size:
+                parts.append(template.format(n=n))
+                length += len(parts[-1])
+                n += 1
+            data = ''.join(parts)[:size]
+        else:
+            data = 'x' * size
+        with open(path, 'w') as f:
+            f.write(data)
+
+    with open(os.path.join(root, 'README.md'), 'w') as f:
+        f.write('# Synthetic repository\n\nGenerated for benchmarking the analysis pipeline.\n')
+    with open(os.path.join(root, 'requirements.txt'), 'w') as f:
+        f.write('flask==2.3.3\nrequests>=2.31\npytest\n')
+
+    # Workspaces first, so a monorepo has its manifests however few files are generated
+    package_roots = []
+    for index in range(packages):
+        package_root = os.path.join(root, 'packages', f'pkg{index}')
+        os.makedirs(package_root, exist_ok=True)
+        dependencies = {f'dep{rng.randint(0, 50)}': f'^{rng.randint(1, 9)}.0.0' for _ in range(rng.randint(1, 8))}
+        if rng.random() < 0.3:
+            dependencies['react'] = '^18.2.0'
+        with open(os.path.join(package_root, 'package.json'), 'w') as f:
+            json.dump({'name': f'pkg{index}', 'version': '1.0.0', 'dependencies': dependencies,
+                       'devDependencies': {'jest': '^29.0.0'}}, f, indent=2)
+        package_roots.append(package_root)
+
+    created = 0
+    dir_count = 0
+    top_dirs = ['src', 'lib', 'tests', 'docs', 'assets']
+    while created < files:
+        base = package_roots[dir_count % len(package_roots)] if package_roots else os.path.join(root, rng.choice(top_dirs))
+        parts = [f"d{rng.randint(0, 9)}" for _ in range(rng.randint(0, depth - 1))]
+        dir_path = os.path.join(base, *parts, f"mod{dir_count}")
+        os.makedirs(dir_path, exist_ok=True)
+        dir_count += 1
+
+        for i in range(min(files_per_dir, files - created)):
+            write_file(os.path.join(dir_path, f"file{i}{rng.choice(extensions)}"), file_size())
+            created += 1
+
+    return root
+
+
+def zero_latency_llm():
+    """A LangChain LLM that answers instantly, so summarizer timings are pure overhead"""
+    from langchain.llms.base import LLM
+
+    class ZeroLatencyLLM(LLM):
+        @property
+        def _llm_type(self):
+            return 'zero-latency'
+
+        def _call(self, prompt, stop=None, run_manager=None, **kwargs):
+            # Batch file prompts expect a JSON object keyed by the files they list
+            file_paths = [line.strip()[len('File: '):] for line in prompt.splitlines()
+                          if line.strip().startswith('File: ')]
+            if 'JSON object' in prompt and file_paths:
+                return json.dumps({file_path: f'Explanation of {file_path}.' for file_path in file_paths})
+            return 'Generated summary.'
+
+    return ZeroLatencyLLM()
+
+
+def run_suite(root, repeat):
+    """Time the whole pipeline and each parser pass on a repository, returning {name: seconds}"""
+    from analyzer.summarizer import RepoSummarizer
+    from analyzer.generator import DocumentationGenerator
+
+    parser = RepoParser(outline_cache=False)  # Every repeat extracts outlines anew
+    file_index, _ = parser._scan_repository(root)
+    repo_data = parser.analyze_repository(root)
+    dependencies = repo_data['dependencies']
+    chunk_input = [(entry.relative_path, entry.path, entry.size) for entry in file_index]
+
+    results = {
+        'parse.analyze_repository': time_call(parser.analyze_repository, root, repeat=repeat),
+        'parse.scan': time_call(parser._scan_repository, root, repeat=repeat),
+        'parse.read': time_call(parser._read_important_files, file_index, repeat=repeat),
+        'parse.key_files': time_call(parser._find_key_files, file_index, repeat=repeat),
+        'parse.dependencies': time_call(extract_dependencies, file_index, repeat=repeat),
+        'parse.tech_stack': time_call(parser._detect_tech_stack, file_index, dependencies, repeat=repeat),
+        'parse.outlines': time_call(parser._get_outlines, root, file_index, repeat=repeat),
+        'parse.hashes': time_call(parser._get_file_hashes, root, file_index, repo_data['file_contents'], repeat=repeat),
+        'parse.chunks': time_call(chunk_files, chunk_input, repeat=repeat),
+        'parse.statistics': time_call(parser._get_repo_statistics, file_index, repeat=repeat),
+    }
+
+    llm = zero_latency_llm()
+    summaries = RepoSummarizer(llm=llm, cache=False).generate_summaries(repo_data)
+    results['summarize.sequential'] = time_call(
+        lambda: RepoSummarizer(llm=llm, max_concurrency=1, cache=False).generate_summaries(repo_data), repeat=repeat)
+    results['summarize.concurrent'] = time_call(
+        lambda: RepoSummarizer(llm=llm, cache=False).generate_summaries(repo_data), repeat=repeat)
+    results['generate'] = time_call(
+        lambda: DocumentationGenerator().generate_documentation(repo_data, summaries), repeat=repeat)
+
+    return {name: round(seconds, 6) for name, seconds in results.items()}
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """Print each timing against the baseline and return the names that regressed beyond tolerance"""
+    regressions = []
+    print(f"{'benchmark':28} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, seconds in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:28} {'-':>10} {seconds:10.4f} {'new':>8}")
+            continue
+        change = (seconds - before) / before if before else 0
+        flag = ''
+        if change > tolerance:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:28} {before:10.4f} {seconds:10.4f} {change:+8.1%}{flag}")
+    return regressions
+
+
+def bench_suite(args):
+    """Time the pipeline on synthetic repository shapes, write JSON results and compare to a baseline"""
+    shapes = args.shape or ['small', 'medium', 'monorepo']
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'seed': args.seed,
+        'shapes': {}
+    }
+
+    for shape in shapes:
+        params = {**SHAPES[shape], **{key: value for key, value in (('files', args.files),) if value}}
+        root = tempfile.mkdtemp(prefix='bench-repo-')
+        try:
+            print(f"Generating '{shape}' repository ({params['files']} files) in {root} ...")
+            generate_shaped_repo(root, seed=args.seed, **params)
+            results = run_suite(root, args.repeat)
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+
+        report['shapes'][shape] = {'params': params, 'results': results}
+        for name, seconds in results.items():
+            print(f"  {name:28} {seconds:10.4f}s")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = []
+        for shape, current in report['shapes'].items():
+            if shape not in baseline.get('shapes', {}):
+                print(f"No baseline for shape '{shape}'")
+                continue
+            print(f"\n{shape}:")
+            regressions += [f"{shape}/{name}" for name in
+                            compare_to_baseline(current['results'], baseline['shapes'][shape]['results'], args.tolerance)]
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+            return 1
+        print(f"\nNo regressions beyond {args.tolerance:.0%}")
+    return 0
+
+
+def legacy_generate_html(md, markdown_content):
+    """HTML conversion as done before: one shared converter, never reset, the shell formatted every call"""
+
+    html_content = md.convert(markdown_content)
+
+    # Wrap in a complete HTML document with professional dark theme
+    full_html = f"""
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Repository Analysis</title>
+    <style>
+        :root {{
+            --bg-primary: #0d1117;
+            --bg-secondary: #161b22;
+            --bg-tertiary: #21262d;
+            --border-primary: #30363d;
+            --border-secondary: #21262d;
+            --text-primary: #f0f6fc;
+            --text-secondary: #8b949e;
+            --text-muted: #656d76;
+            --accent-primary: #2f81f7;
+            --accent-secondary: #238636;
+            --accent-warning: #d29922;
+            --accent-danger: #da3633;
+            --code-bg: #0d1117;
+            --code-border: #30363d;
+            --shadow: 0 8px 32px rgba(0, 0, 0, 0.4);
+            --gradient-primary: linear-gradient(135deg, #2f81f7 0%, #238636 100%);
+        }}
+        
+        * {{
+            margin: 0;
+            padding: 0;
+            box-sizing: border-box;
+        }}
+        
+        body {{
+            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', 'Noto Sans', Helvetica, Arial, sans-serif;
+            line-height: 1.7;
+            color: var(--text-primary);
+            background: var(--bg-primary);
+            background-image: 
+                radial-gradient(circle at 25% 25%, rgba(47, 129, 247, 0.05) 0%, transparent 50%),
+                radial-gradient(circle at 75% 75%, rgba(35, 134, 54, 0.05) 0%, transparent 50%);
+            min-height: 100vh;
+            font-size: 16px;
+        }}
+        
+        .container {{
+            max-width: 1200px;
+            margin: 0 auto;
+            padding: 2rem;
+            background: var(--bg-secondary);
+            border: 1px solid var(--border-primary);
+            border-radius: 12px;
+            box-shadow: var(--shadow);
+            margin-top: 2rem;
+            margin-bottom: 2rem;
+            position: relative;
+        }}
+        
+        .container::before {{
+            content: '';
+            position: absolute;
+            top: 0;
+            left: 0;
+            right: 0;
+            height: 4px;
+            background: var(--gradient-primary);
+            border-radius: 12px 12px 0 0;
+        }}
+        
+        h1 {{
+            font-size: 2.5rem;
+            font-weight: 700;
+            color: var(--text-primary);
+            text-align: center;
+            margin-bottom: 2rem;
+            padding-bottom: 1rem;
+            border-bottom: 2px solid var(--border-primary);
+            background: var(--gradient-primary);
+            background-clip: text;
+            -webkit-background-clip: text;
+            -webkit-text-fill-color: transparent;
+            letter-spacing: -0.025em;
+        }}
+        
+        h2 {{
+            font-size: 1.875rem;
+            font-weight: 600;
+            color: var(--text-primary);
+            margin: 3rem 0 1.5rem 0;
+            padding-bottom: 0.75rem;
+            border-bottom: 2px solid var(--accent-primary);
+            position: relative;
+        }}
+        
+        h2::before {{
+            content: '';
+            position: absolute;
+            bottom: -2px;
+            left: 0;
+            width: 60px;
+            height: 2px;
+            background: var(--accent-secondary);
+        }}
+        
+        h3 {{
+            font-size: 1.5rem;
+            font-weight: 600;
+            color: var(--text-primary);
+            margin: 2rem 0 1rem 0;
+            padding-bottom: 0.5rem;
+            border-bottom: 1px solid var(--border-secondary);
+        }}
+        
+        p {{
+            margin-bottom: 1rem;
+            color: var(--text-secondary);
+            line-height: 1.8;
+        }}
+        
+        em {{
+            color: var(--text-muted);
+            font-style: italic;
+            font-size: 0.9rem;
+        }}
+        
+        strong {{
+            color: var(--text-primary);
+            font-weight: 600;
+        }}
+        
+        code {{
+            background: var(--code-bg);
+            border: 1px solid var(--code-border);
+            color: var(--accent-primary);
+            padding: 0.25rem 0.5rem;
+            border-radius: 6px;
+            font-family: 'SF Mono', Monaco, 'Cascadia Code', 'Roboto Mono', Consolas, 'Courier New', monospace;
+            font-size: 0.875rem;
+            font-weight: 500;
+        }}
+        
+        pre {{
+            background: var(--bg-tertiary);
+            border: 1px solid var(--border-primary);
+            border-radius: 8px;
+            padding: 1.5rem;
+            overflow-x: auto;
+            margin: 1rem 0;
+            position: relative;
+        }}
+        
+        pre code {{
+            background: none;
+            border: none;
+            color: var(--text-primary);
+            padding: 0;
+            font-size: 0.875rem;
+            line-height: 1.6;
+        }}
+        
+        ul, ol {{
+            margin: 1rem 0 1rem 2rem;
+            color: var(--text-secondary);
+        }}
+        
+        li {{
+            margin-bottom: 0.5rem;
+            line-height: 1.7;
+        }}
+        
+        li::marker {{
+            color: var(--accent-primary);
+        }}
+        
+        a {{
+            color: var(--accent-primary);
+            text-decoration: none;
+            transition: all 0.2s ease;
+            border-bottom: 1px solid transparent;
+        }}
+        
+        a:hover {{
+            color: var(--text-primary);
+            border-bottom-color: var(--accent-primary);
+        }}
+        
+        hr {{
+            border: none;
+            height: 2px;
+            background: var(--gradient-primary);
+            margin: 3rem 0;
+            border-radius: 1px;
+            opacity: 0.8;
+        }}
+        
+        .tech-stack {{
+            background: var(--bg-tertiary);
+            border: 1px solid var(--accent-primary);
+            border-left: 4px solid var(--accent-primary);
+            padding: 1.5rem;
+            border-radius: 8px;
+            margin: 1rem 0;
+            position: relative;
+            overflow: hidden;
+        }}
+        
+        .tech-stack::before {{
+            content: '';
+            position: absolute;
+            top: 0;
+            left: 0;
+            right: 0;
+            bottom: 0;
+            background: linear-gradient(135deg, rgba(47, 129, 247, 0.05) 0%, transparent 100%);
+            pointer-events: none;
+        }}
+        
+        .file-section {{
+            background: var(--bg-tertiary);
+            border: 1px solid var(--border-primary);
+            border-radius: 8px;
+            padding: 1.5rem;
+            margin: 1.5rem 0;
+            transition: all 0.3s ease;
+        }}
+        
+        .file-section:hover {{
+            border-color: var(--accent-primary);
+            box-shadow: 0 4px 16px rgba(47, 129, 247, 0.1);
+        }}
+        
+        .stats-grid {{
+            display: grid;
+            grid-template-columns: repeat(auto-fit, minmax(280px, 1fr));
+            gap: 1.5rem;
+            margin: 2rem 0;
+        }}
+        
+        .stat-card {{
+            background: var(--bg-tertiary);
+            border: 1px solid var(--border-primary);
+            border-radius: 8px;
+            padding: 2rem;
+            text-align: center;
+            transition: all 0.3s ease;
+            position: relative;
+            overflow: hidden;
+        }}
+        
+        .stat-card::before {{
+            content: '';
+            position: absolute;
+            top: 0;
+            left: 0;
+            right: 0;
+            height: 3px;
+            background: var(--gradient-primary);
+        }}
+        
+        .stat-card:hover {{
+            border-color: var(--accent-primary);
+            transform: translateY(-2px);
+            box-shadow: 0 8px 24px rgba(47, 129, 247, 0.15);
+        }}
+        
+        .stat-number {{
+            font-size: 2.5rem;
+            font-weight: 700;
+            background: var(--gradient-primary);
+            background-clip: text;
+            -webkit-background-clip: text;
+            -webkit-text-fill-color: transparent;
+            margin-bottom: 0.5rem;
+            display: block;
+        }}
+        
+        .stat-label {{
+            color: var(--text-secondary);
+            font-size: 0.875rem;
+            font-weight: 500;
+            text-transform: uppercase;
+            letter-spacing: 0.05em;
+        }}
+        
+        blockquote {{
+            border-left: 4px solid var(--accent-secondary);
+            padding: 1rem 1.5rem;
+            margin: 1.5rem 0;
+            background: var(--bg-tertiary);
+            border-radius: 0 8px 8px 0;
+            font-style: italic;
+            color: var(--text-secondary);
+        }}
+        
+        table {{
+            width: 100%;
+            border-collapse: collapse;
+            margin: 1.5rem 0;
+            background: var(--bg-tertiary);
+            border-radius: 8px;
+            overflow: hidden;
+            border: 1px solid var(--border-primary);
+        }}
+        
+        th, td {{
+            padding: 1rem;
+            text-align: left;
+            border-bottom: 1px solid var(--border-secondary);
+        }}
+        
+        th {{
+            background: var(--bg-primary);
+            color: var(--text-primary);
+            font-weight: 600;
+            font-size: 0.875rem;
+            text-transform: uppercase;
+            letter-spacing: 0.05em;
+        }}
+        
+        td {{
+            color: var(--text-secondary);
+        }}
+        
+        tr:last-child td {{
+            border-bottom: none;
+        }}
+        
+        .navigation {{
+            background: var(--bg-tertiary);
+            border: 1px solid var(--border-primary);
+            border-radius: 8px;
+            padding: 1.5rem;
+            margin: 2rem 0;
+        }}
+        
+        .navigation ul {{
+            list-style: none;
+            margin: 0;
+            padding: 0;
+            display: grid;
+            grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
+            gap: 0.5rem;
+        }}
+        
+        .navigation li {{
+            margin: 0;
+        }}
+        
+        .navigation a {{
+            display: block;
+            padding: 0.75rem 1rem;
+            background: var(--bg-secondary);
+            border: 1px solid var(--border-secondary);
+            border-radius: 6px;
+            transition: all 0.2s ease;
+            font-weight: 500;
+        }}
+        
+        .navigation a:hover {{
+            background: var(--accent-primary);
+            color: var(--text-primary);
+            border-color: var(--accent-primary);
+            transform: translateX(4px);
+        }}
+        
+        @media (max-width: 768px) {{
+            .container {{
+                margin: 1rem;
+                padding: 1.5rem;
+            }}
+            
+            h1 {{
+                font-size: 2rem;
+            }}
+            
+            h2 {{
+                font-size: 1.5rem;
+            }}
+            
+            .stats-grid {{
+                grid-template-columns: 1fr;
+            }}
+            
+            .navigation ul {{
+                grid-template-columns: 1fr;
+            }}
+        }}
+        
+        @media (prefers-reduced-motion: reduce) {{
+            * {{
+                animation-duration: 0.01ms !important;
+                animation-iteration-count: 1 !important;
+                transition-duration: 0.01ms !important;
+            }}
+        }}
+    </style>
+</head>
+<body>
+    <div class="container">
+        {html_content}
+    </div>
+</body>
+</html>
+"""
+
+    return full_html
+
+
+def bench_html(args):
+    """Compare repeated HTML rendering of a large document: legacy, per-thread converter and render cache"""
+    import markdown
+    from analyzer import generator
+    from analyzer.heuristic_summarizer import HeuristicSummarizer
+
+    root = tempfile.mkdtemp(prefix='bench-repo-')
+    try:
+        generate_shaped_repo(root, **SHAPES['small'])
+        repo_data = RepoParser().analyze_repository(root)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    summaries = HeuristicSummarizer().generate_summaries(repo_data)
+    # One explanation with a code sample per file makes a large document
+    summaries['file_explanations'] = {
+        f"src/module{n}.py": f"Request handlers of module {n}.\n\n```python\n" +
+                             ''.join(SOURCE_TEMPLATES['.py'].format(n=i) for i in range(10)) + "```"
+        for n in range(args.files)
+    }
+    documentation = generator.DocumentationGenerator()
+    markdown_doc = documentation._generate_markdown(repo_data, summaries)
+
+    shared_md = markdown.Markdown(extensions=['codehilite', 'fenced_code'])
+    legacy = time_call(lambda: [legacy_generate_html(shared_md, markdown_doc) for _ in range(args.repeat)], repeat=1)
+
+    def uncached():
+        for _ in range(args.repeat):
+            generator._html_cache.clear()
+            documentation._generate_html(markdown_doc)
+    converted = time_call(uncached, repeat=1)
+
+    generator._html_cache.clear()
+    cached = time_call(lambda: [documentation._generate_html(markdown_doc) for _ in range(args.repeat)], repeat=1)
+
+    print(f"{len(markdown_doc)} characters of Markdown, rendered {args.repeat} times")
+    print(f"{'legacy shared converter':28} {legacy:8.3f}s")
+    print(f"{'per-thread converter':28} {converted:8.3f}s  ({legacy / converted:.1f}x)")
+    print(f"{'render cache':28} {cached:8.3f}s  ({legacy / cached:.1f}x)")
+
+
+def legacy_structure(tree):
+    """The nested dict folder structure the parser used to build, from a DirectoryTree"""
+    from analyzer.tree import DIRECTORY
+
+    nodes = {0: {}}
+    for index in range(1, len(tree.names)):
+        size = tree.sizes[index]
+        if size == DIRECTORY:
+            nodes[index] = nodes[tree.parents[index]][tree.names[index] + '/'] = {}
+        elif size < 0:
+            nodes[tree.parents[index]][tree.names[index] + '/'] = "..."
+        else:
+            nodes[tree.parents[index]][tree.names[index]] = size
+    return nodes[0]
+
+
+def legacy_format_structure(structure, indent=0):
+    """Recursive string concatenation of the whole tree, as the summarizer did before compaction"""
+    formatted = ""
+    for name, content in structure.items():
+        formatted += "  " * indent + f"- {name}\n"
+        if isinstance(content, dict):
+            formatted += legacy_format_structure(content, indent + 1)
+    return formatted
+
+
+def bench_tree(args):
+    """Compare rendering the full nested folder structure with the compacted flat tree"""
+    from analyzer.tree import DirectoryTree, render_tree
+
+    root = tempfile.mkdtemp(prefix='bench-repo-')
+    try:
+        print(f"Generating {args.files} files, {args.files_per_dir} per directory, in {root} ...")
+        generate_synthetic_repo(root, args.files, files_per_dir=args.files_per_dir)
+        _, structure = RepoParser()._scan_repository(root)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    tree = DirectoryTree.from_dict(structure)
+    nested = legacy_structure(tree)
+    legacy_time = time_call(legacy_format_structure, nested, repeat=args.repeat)
+    compact_time = time_call(render_tree, structure, 'list', repeat=args.repeat)
+
+    print(f"{len(tree)} entries in the folder structure")
+    print(f"{'renderer':10} {'chars':>10} {'seconds':>9}")
+    print(f"{'legacy':10} {len(legacy_format_structure(nested)):10d} {legacy_time:9.4f}")
+    print(f"{'compact':10} {len(render_tree(structure, 'list')):10d} {compact_time:9.4f}")
+
+
+def legacy_repo_statistics(file_index):
+    """Statistics as computed before: a (path, size) tuple per file, fully sorted for the top 5"""
+    stats = {'total_files': 0, 'total_size': 0, 'file_types': {}, 'largest_files': []}
+    file_sizes = []
+    for entry in file_index:
+        if entry.name.startswith('.') or entry.size is None:
+            continue
+        stats['total_files'] += 1
+        stats['total_size'] += entry.size
+        ext = entry.extension or 'no_extension'
+        stats['file_types'][ext] = stats['file_types'].get(ext, 0) + 1
+        file_sizes.append((entry.relative_path, entry.size))
+    file_sizes.sort(key=lambda x: x[1], reverse=True)
+    stats['largest_files'] = file_sizes[:5]
+    return stats
+
+
+def peak_memory(func, *args):
+    """Peak bytes allocated by a call"""
+    tracemalloc.start()
+    try:
+        func(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_stats(args):
+    """Compare the legacy statistics loop with the array-backed statistics"""
+    root = tempfile.mkdtemp(prefix='bench-repo-')
+    try:
+        print(f"Generating {args.files} files in {root} ...")
+        generate_synthetic_repo(root, args.files, max_file_size=args.max_file_size)
+        parser = RepoParser()
+        file_index, _ = parser._scan_repository(root)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    legacy = legacy_repo_statistics(file_index)
+    stats = parser._get_repo_statistics(file_index)
+    if any(legacy[key] != stats[key] for key in legacy):
+        sys.exit("Array-backed statistics differ from the legacy ones")
+
+    legacy_time = time_call(legacy_repo_statistics, file_index, repeat=args.repeat)
+    stats_time = time_call(parser._get_repo_statistics, file_index, repeat=args.repeat)
+    print(f"{len(file_index)} files indexed")
+    print(f"{'statistics':12} {'seconds':>9} {'peak MB':>9}")
+    print(f"{'legacy':12} {legacy_time:9.3f} {peak_memory(legacy_repo_statistics, file_index) / 1e6:9.1f}")
+    print(f"{'arrays':12} {stats_time:9.3f} {peak_memory(parser._get_repo_statistics, file_index) / 1e6:9.1f}")
+    print(f"percentiles {stats['size_percentiles']}, languages {stats['languages']}")
+
+
+def bench_outline(args):
+    """Time outline extraction per worker count and from a warm cache, and compare its tokens with raw source"""
+    import git
+    from analyzer.llm_cache import LLMCache
+    from analyzer.outline import format_outlines
+    from analyzer.prompt_packer import count_tokens
+
+    root = tempfile.mkdtemp(prefix='bench-repo-')
+    try:
+        shape = dict(SHAPES['medium'], files=args.files)
+        print(f"Generating {args.files} files in {root} ...")
+        generate_shaped_repo(root, **shape)
+        # A git index lets a warm run find cached outlines without reading the files
+        repo = git.Repo.init(root)
+        repo.git.add(A=True)
+
+        file_index, _ = RepoParser()._scan_repository(root)
+        outlines = None
+        print(f"{'outlines':12} {'seconds':>9}")
+        for workers in args.workers:
+            parser = RepoParser(outline_workers=workers, outline_cache=False)
+            parser._get_outlines(root, file_index)  # Start the worker processes outside the timing
+            seconds = time_call(parser._get_outlines, root, file_index, repeat=args.repeat)
+            print(f"{f'{workers} workers':12} {seconds:9.3f}")
+            outlines = parser._get_outlines(root, file_index)[0]
+
+        cache = LLMCache(os.path.join(root, '.outline_cache.sqlite3'), ttl=0)
+        parser = RepoParser(outline_workers=1, outline_cache=cache)
+        parser._get_outlines(root, file_index)
+        print(f"{'warm cache':12} {time_call(parser._get_outlines, root, file_index, repeat=args.repeat):9.3f}")
+
+        # What the LLM would otherwise see: the first 2000 characters of each file
+        raw_tokens = 0
+        for entry in file_index:
+            if entry.relative_path in outlines:
+                with open(entry.path, 'r', encoding='utf-8', errors='ignore') as f:
+                    raw_tokens += count_tokens(f.read(2000))
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    symbols = sum(len(outline['symbols']) for outline in outlines.values())
+    print(f"{len(outlines)} files outlined, {symbols} top-level symbols")
+    print(f"outline tokens {count_tokens(format_outlines(outlines)):,}, "
+          f"first 2000 characters of each file {raw_tokens:,}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    scan = subparsers.add_parser('scan', help='Benchmark repository scanning')
+    scan.add_argument('--files', type=int, default=100000)
+    scan.add_argument('--repeat', type=int, default=3)
+    scan.set_defaults(func=bench_scan)
+
+    tech_stack = subparsers.add_parser('tech-stack', help='Benchmark tech stack detection')
+    tech_stack.add_argument('--files', type=int, default=100000)
+    tech_stack.add_argument('--repeat', type=int, default=3)
+    tech_stack.set_defaults(func=bench_tech_stack)
+
+    parallel_scan = subparsers.add_parser('parallel-scan', help='Benchmark parallel scanning on a slow filesystem')
+    parallel_scan.add_argument('--files', type=int, default=20000)
+    parallel_scan.add_argument('--latency-ms', type=float, default=0.5)
+    parallel_scan.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parallel_scan.add_argument('--repeat', type=int, default=1)
+    parallel_scan.set_defaults(func=bench_parallel_scan)
+
+    fast = subparsers.add_parser('fast', help='Benchmark the LLM-free fast mode')
+    fast.add_argument('--files', type=int, default=5000)
+    fast.add_argument('--repo', help='Existing repository to document instead of a synthetic one')
+    fast.set_defaults(func=bench_fast)
+
+    read = subparsers.add_parser('read', help='Benchmark reading important files')
+    read.add_argument('--files', type=int, default=20000)
+    read.add_argument('--max-file-size', type=int, default=200000)
+    read.add_argument('--budget', type=int, default=512 * 1024)
+    read.add_argument('--repeat', type=int, default=3)
+    read.set_defaults(func=bench_read)
+
+    chat = subparsers.add_parser('chat', help='Benchmark chat prompt construction')
+    chat.add_argument('--repo', default=os.path.dirname(os.path.abspath(__file__)))
+    chat.add_argument('--repeat', type=int, default=5)
+    chat.add_argument('questions', nargs='*', default=[
+        'How do I install and run this project?',
+        'Where are LLM responses cached?',
+        'How does the parser detect the tech stack?'
+    ])
+    chat.set_defaults(func=bench_chat)
+
+    prompts = subparsers.add_parser('prompts', help='Report tokens per summary prompt')
+    prompts.add_argument('--repo', default=os.path.dirname(os.path.abspath(__file__)))
+    prompts.add_argument('--budget', type=int, default=3000)
+    prompts.add_argument('--file-budget', type=int, default=1000)
+    prompts.set_defaults(func=bench_prompts)
+
+    suite = subparsers.add_parser('suite', help='Time the whole pipeline on synthetic repository shapes')
+    suite.add_argument('--shape', choices=sorted(SHAPES), action='append',
+                       help='Repository shape to benchmark, repeatable (default: small, medium and monorepo)')
+    suite.add_argument('--files', type=int, help='Override the number of files of every shape')
+    suite.add_argument('--seed', type=int, default=42)
+    suite.add_argument('--repeat', type=int, default=5)
+    suite.add_argument('--output', help='Write the results as JSON to this file')
+    suite.add_argument('--baseline', help='Results JSON of an earlier run to compare against')
+    suite.add_argument('--tolerance', type=float, default=0.2, help='Allowed slowdown before failing, e.g. 0.2 for 20%%')
+    suite.set_defaults(func=bench_suite)
+
+    html = subparsers.add_parser('html', help='Benchmark repeated HTML rendering of a large document')
+    html.add_argument('--files', type=int, default=200)
+    html.add_argument('--repeat', type=int, default=20)
+    html.set_defaults(func=bench_html)
+
+    tree = subparsers.add_parser('tree', help='Benchmark folder structure rendering and compaction')
+    tree.add_argument('--files', type=int, default=50000)
+    tree.add_argument('--files-per-dir', type=int, default=1000)
+    tree.add_argument('--repeat', type=int, default=3)
+    tree.set_defaults(func=bench_tree)
+
+    stats = subparsers.add_parser('stats', help='Benchmark repository statistics')
+    stats.add_argument('--files', type=int, default=200000)
+    stats.add_argument('--max-file-size', type=int, default=2048)
+    stats.add_argument('--repeat', type=int, default=3)
+    stats.set_defaults(func=bench_stats)
+
+    outline = subparsers.add_parser('outline', help='Benchmark source outline extraction and caching')
+    outline.add_argument('--files', type=int, default=5000)
+    outline.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    outline.add_argument('--repeat', type=int, default=3)
+    outline.set_defaults(func=bench_outline)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,265 @@
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from dotenv import load_dotenv
+from analyzer.clone import GitCloner
+from analyzer.parser import RepoParser
+from analyzer.generator import DocumentationGenerator
+
+# Shown after the options in --help
+USAGE = """
+Each repository goes through clone -> parse -> summarize/generate, with a separate pool per
+stage. Finished repositories are recorded in a checkpoint file, and a rerun with the same
+output directory skips them.
+
+examples:
+  python -m analyzer.cli https://github.com/org/a https://github.com/org/b -o docs/
+  python -m analyzer.cli --input repos.txt -o docs/ --clone-workers 8 --parse-workers 4 --llm-workers 4
+"""
+
+
+def parse_repository(repo_path):
+    """Parse a checked out repository; module level so the parse pool can run it in another process"""
+    # The parse pool already spreads repositories across workers; nested outline pools would oversubscribe
+    return RepoParser(outline_workers=1).analyze_repository(repo_path)
+
+
+def output_name(source):
+    """File name stem for a repository URL or path, e.g. 'org__repo'"""
+    path = re.sub(r'\.git$', '', source.rstrip('/\\'))
+    parts = [part for part in re.split(r'[/\\:]', path) if part]
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', '__'.join(parts[-2:])) or 'repository'
+
+
+def is_working_tree(source):
+    """True for a local directory to document in place, false for URLs and bare repositories to clone"""
+    return os.path.isdir(source) and not os.path.exists(os.path.join(source, 'HEAD'))
+
+
+class Checkpoint:
+    """Append-only JSON lines record of finished repositories, safe to read back after a crash"""
+
+    def __init__(self, path):
+        self.path = path
+        self.completed = {}
+        self._lock = threading.Lock()
+
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # A line cut short by a crash
+                    if record.get('status') == 'completed':
+                        self.completed[record['source']] = record
+
+    def record(self, **record):
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({**record, 'finished_at': time.time()}) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            if record.get('status') == 'completed':
+                self.completed[record['source']] = record
+
+
+class BatchRunner:
+    """Runs the analysis pipeline over many repositories with one pool per stage"""
+
+    def __init__(self, output_dir, clone_workers=4, parse_workers=2, llm_workers=2,
+                 cloner=None, summarizer_factory=None, checkpoint_path=None, parse_processes=True,
+                 max_in_flight=None):
+        """
+        summarizer_factory: returns an object with generate_summaries(repo_data), e.g. a
+        RepoSummarizer with a stub LLM; defaults to RepoSummarizer()
+        parse_processes: parse in worker processes rather than threads
+        max_in_flight: repositories between clone and write at once; defaults to twice the workers
+        """
+        self.output_dir = output_dir
+        os.makedirs(output_dir, exist_ok=True)
+        self.cloner = cloner or GitCloner.from_options(None)
+        self.summarizer_factory = summarizer_factory or self._default_summarizer
+        self.checkpoint = Checkpoint(checkpoint_path or os.path.join(output_dir, 'checkpoint.jsonl'))
+
+        self.clone_pool = ThreadPoolExecutor(max_workers=clone_workers, thread_name_prefix='clone')
+        if parse_processes:
+            # spawn rather than fork: the other pools' threads may hold locks at fork time
+            self.parse_pool = ProcessPoolExecutor(max_workers=parse_workers,
+                                                  mp_context=multiprocessing.get_context('spawn'))
+        else:
+            self.parse_pool = ThreadPoolExecutor(max_workers=parse_workers, thread_name_prefix='parse')
+        self.llm_pool = ThreadPoolExecutor(max_workers=llm_workers, thread_name_prefix='llm')
+
+        # Back-pressure: clones wait for a slot, so parsed repositories cannot pile up ahead of the LLM stage
+        self.max_in_flight = max_in_flight or 2 * (clone_workers + parse_workers + llm_workers)
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._pending = 0
+        self._done = threading.Condition()
+        self.results = {}  # source -> 'completed', 'failed' or 'skipped'
+
+    def _default_summarizer(self):
+        from analyzer.summarizer import RepoSummarizer
+        return RepoSummarizer()
+
+    def run(self, sources):
+        """Document every source, returning {source: status}"""
+        for source in dict.fromkeys(sources):
+            if source in self.checkpoint.completed:
+                self.results[source] = 'skipped'
+                continue
+
+            self._slots.acquire()
+            with self._done:
+                self._pending += 1
+            self._chain(self.clone_pool.submit(self._clone, source), source, self._after_clone)
+
+        with self._done:
+            while self._pending:
+                self._done.wait()
+
+        for pool in (self.clone_pool, self.parse_pool, self.llm_pool):
+            pool.shutdown()
+        return self.results
+
+    def _chain(self, future, source, next_step, *context):
+        """Hand a finished stage's result to the next stage, or record the failure"""
+        def callback(done):
+            try:
+                next_step(source, done.result(), *context)
+            except Exception as e:
+                self._finish(source, 'failed', error=f"{type(e).__name__}: {e}", context=context)
+        future.add_done_callback(callback)
+
+    def _clone(self, source):
+        start = time.perf_counter()
+        if is_working_tree(source):
+            return source, None, time.perf_counter() - start
+
+        temp_dir = tempfile.mkdtemp(prefix='batch-')
+        try:
+            return self.cloner.clone_repository(source, temp_dir), temp_dir, time.perf_counter() - start
+        except Exception:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            raise
+
+    def _after_clone(self, source, cloned):
+        repo_path, temp_dir, clone_time = cloned
+        timings = {'clone': round(clone_time, 3)}
+        start = time.perf_counter()
+        future = self.parse_pool.submit(parse_repository, repo_path)
+        self._chain(future, source, self._after_parse, temp_dir, timings, start)
+
+    def _after_parse(self, source, repo_data, temp_dir, timings, start):
+        timings['parse'] = round(time.perf_counter() - start, 3)
+        # Everything later stages need is in repo_data, so the checkout can go
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        self._chain(self.llm_pool.submit(self._document, source, repo_data, timings), source, self._write)
+
+    def _document(self, source, repo_data, timings):
+        start = time.perf_counter()
+        summaries = self.summarizer_factory().generate_summaries(repo_data)
+        timings['summarize'] = round(time.perf_counter() - start, 3)
+
+        start = time.perf_counter()
+        documentation = DocumentationGenerator().generate_documentation(repo_data, summaries, timings)
+        timings['generate'] = round(time.perf_counter() - start, 3)
+        documentation['metadata']['timings']['generate'] = timings['generate']
+        return documentation, timings
+
+    def _write(self, source, documented):
+        documentation, timings = documented
+        stem = os.path.join(self.output_dir, output_name(source))
+
+        with open(stem + '.md', 'w', encoding='utf-8') as f:
+            f.write(documentation['markdown'])
+        with open(stem + '.html', 'w', encoding='utf-8') as f:
+            f.write(documentation['html'])
+        with open(stem + '.json', 'w', encoding='utf-8') as f:
+            json.dump({**documentation['metadata'], 'source': source}, f, indent=2, default=str)
+
+        self._finish(source, 'completed', output=stem + '.md', timings=timings)
+
+    def _finish(self, source, status, context=(), **details):
+        # A parse or LLM failure may leave the clone behind
+        temp_dir = context[0] if context and isinstance(context[0], str) else None
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+        self.checkpoint.record(source=source, status=status, **details)
+        print(f"[{status}] {source}" + (f": {details['error']}" if 'error' in details else ""), file=sys.stderr)
+
+        with self._done:
+            self.results[source] = status
+            self._pending -= 1
+            self._done.notify_all()
+        self._slots.release()
+
+
+def read_sources(args):
+    sources = list(args.sources)
+    if args.input:
+        with open(args.input, 'r', encoding='utf-8') as f:
+            sources += [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+    return sources
+
+
+def main(argv=None):
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description='Generate documentation for many repositories', epilog=USAGE,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('sources', nargs='*', help='Repository URLs or local paths')
+    parser.add_argument('-i', '--input', help='File with one repository URL or path per line')
+    parser.add_argument('-o', '--output-dir', default='docs-output')
+    parser.add_argument('--checkpoint', help='Checkpoint file (default: <output-dir>/checkpoint.jsonl)')
+    parser.add_argument('--clone-workers', type=int, default=4)
+    parser.add_argument('--parse-workers', type=int, default=2)
+    parser.add_argument('--llm-workers', type=int, default=2)
+    parser.add_argument('--max-in-flight', type=int, help='Repositories in the pipeline at once (default: 2x workers)')
+    parser.add_argument('--mode', choices=['llm', 'fast'], default=os.getenv('ANALYSIS_MODE', 'llm'))
+    parser.add_argument('--depth', type=int, help='Shallow clone depth')
+    parser.add_argument('--filter', help="Partial clone filter, e.g. 'blob:none'")
+    parser.add_argument('--sparse', action='store_true', help='Skip checking out directories the parser ignores')
+    args = parser.parse_args(argv)
+
+    sources = read_sources(args)
+    if not sources:
+        parser.error('no repositories given')
+
+    try:
+        cloner = GitCloner.from_options({
+            key: value for key, value in (('depth', args.depth), ('filter', args.filter), ('sparse', args.sparse))
+            if value
+        })
+    except ValueError as e:
+        parser.error(str(e))
+
+    summarizer_factory = None
+    if args.mode == 'fast':
+        from analyzer.heuristic_summarizer import HeuristicSummarizer
+        summarizer_factory = HeuristicSummarizer
+
+    runner = BatchRunner(args.output_dir, args.clone_workers, args.parse_workers, args.llm_workers,
+                         cloner=cloner, summarizer_factory=summarizer_factory, checkpoint_path=args.checkpoint,
+                         max_in_flight=args.max_in_flight)
+
+    start = time.perf_counter()
+    results = runner.run(sources)
+    counts = {status: list(results.values()).count(status) for status in ('completed', 'skipped', 'failed')}
+    print(f"{counts['completed']} completed, {counts['skipped']} skipped, {counts['failed']} failed "
+          f"in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    return 1 if counts['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,13 +1,75 @@
 import os
+import re
+import shutil
+import hashlib
+import threading
 import git
 from urllib.parse import urlparse
+from analyzer.parser import SKIPPED_DIRS
+from analyzer.metrics import StageTimer
+
+# One lock per mirror so concurrent analyses of a repo don't fetch into it at the same time
+_mirror_locks = {}
+_mirror_locks_guard = threading.Lock()
+
+# Last measured size of each mirror, so eviction does not re-measure every mirror on every clone
+_mirror_sizes = {}
+
+def _parse_bool(value):
+    """Interpret a JSON or environment value as a boolean"""
+    if isinstance(value, bool):
+        return value
+    return str(value).lower() in ('1', 'true', 'yes')
 
 class GitCloner:
-    def __init__(self):
-        pass
+    def __init__(self, depth=None, blob_filter=None, sparse=False, mirror_dir=None,
+                 mirror_max_bytes=5 * 1024 * 1024 * 1024):
+        """
+        depth: only fetch the latest N commits (--depth)
+        blob_filter: partial clone filter, 'blob:none' or 'blob:limit=<size>' (--filter)
+        sparse: skip checking out directories the parser never reads
+        mirror_dir: keep a bare mirror per repository here and check out worktrees from it
+        mirror_max_bytes: total size of mirror_dir before least recently used mirrors are evicted;
+        mirrors with a worktree still on disk are in use and never evicted
+        """
+        if depth is not None and (not isinstance(depth, int) or depth < 1):
+            raise ValueError(f"Clone depth must be a positive integer, got {depth!r}")
+        if blob_filter is not None and not re.fullmatch(r'blob:none|blob:limit=\d+[kmg]?', blob_filter):
+            raise ValueError(f"Unsupported clone filter: {blob_filter!r}")
+        
+        self.depth = depth
+        self.blob_filter = blob_filter
+        self.sparse = sparse
+        self.mirror_dir = mirror_dir
+        self.mirror_max_bytes = mirror_max_bytes
+        
+        # 'clone' or 'fetch', depending on whether the last checkout reused a mirror
+        self.last_clone_mode = None
+        # Durations of the steps of the last checkout, e.g. {'clone.fetch': 1.2, 'clone.worktree': 0.1}
+        self.last_timings = {}
     
-    def clone_repository(self, repo_url, destination_dir):
-        """Clone a GitHub repository to the specified directory"""
+    @classmethod
+    def from_options(cls, options):
+        """Create a cloner from request options, falling back to environment defaults"""
+        options = options or {}
+        depth = options.get('depth', os.getenv('CLONE_DEPTH'))
+        # Opt-in: mirrors take disk space until evicted
+        use_mirror = _parse_bool(options.get('mirror', os.getenv('CLONE_MIRROR_ENABLED', 'false')))
+        
+        return cls(
+            depth=int(depth) if depth not in (None, '') else None,
+            blob_filter=options.get('filter', os.getenv('CLONE_FILTER')) or None,
+            sparse=_parse_bool(options.get('sparse', os.getenv('CLONE_SPARSE', 'false'))),
+            mirror_dir=os.getenv('CLONE_MIRROR_DIR', os.path.join('.cache', 'mirrors')) if use_mirror else None,
+            mirror_max_bytes=int(os.getenv('CLONE_MIRROR_MAX_BYTES', str(5 * 1024 * 1024 * 1024)))
+        )
+    
+    def options_key(self):
+        """The settings that change what a checkout contains, e.g. to tell apart jobs for one repository"""
+        return (self.depth, self.blob_filter, bool(self.sparse))
+    
+    def clone_repository(self, repo_url, destination_dir, commit=None):
+        """Clone a GitHub repository to the specified directory, optionally at a given commit"""
         try:
             # Parse the URL to get repository name
             parsed_url = urlparse(repo_url)
@@ -15,17 +77,216 @@ class GitCloner:
             
             # Create full path for cloning
             clone_path = os.path.join(destination_dir, repo_name)
+            timer = StageTimer()
+            
+            if self.mirror_dir:
+                repo = self._checkout_from_mirror(repo_url, repo_name, clone_path, commit, timer)
+                if self.sparse:
+                    with timer.stage('clone.checkout'):
+                        self._sparse_checkout(repo)
+                self.last_timings = timer.report()
+                return clone_path
             
             # Clone the repository
-            git.Repo.clone_from(repo_url, clone_path)
+            clone_options = {}
+            if self.depth:
+                clone_options['depth'] = self.depth
+            if self.blob_filter:
+                clone_options['filter'] = self.blob_filter
+            if self.sparse:
+                # Check out only after the sparse patterns are in place
+                clone_options['no_checkout'] = True
             
-            return clone_path
+            with timer.stage('clone.fetch'):
+                repo = git.Repo.clone_from(repo_url, clone_path, **clone_options)
+                self.last_clone_mode = 'clone'
+                
+                if commit:
+                    self._ensure_commit(repo.git, commit)
+            
+            with timer.stage('clone.checkout'):
+                if self.sparse:
+                    self._sparse_checkout(repo, commit)
+                elif commit:
+                    repo.git.checkout(commit)
             
+            self.last_timings = timer.report()
+            return clone_path
+        
         except git.exc.GitCommandError as e:
             raise Exception(f"Failed to clone repository: {str(e)}")
         except Exception as e:
             raise Exception(f"Error during cloning: {str(e)}")
     
+    def _checkout_from_mirror(self, repo_url, repo_name, clone_path, commit=None, timer=None):
+        """Update (or create) the bare mirror for repo_url and add a worktree for it at clone_path"""
+        url_hash = hashlib.sha1(repo_url.rstrip('/').encode('utf-8')).hexdigest()[:12]
+        mirror_path = os.path.join(self.mirror_dir, f"{url_hash}-{repo_name}.git")
+        
+        timer = timer or StageTimer()
+        
+        with self._mirror_lock(mirror_path):
+            with timer.stage('clone.fetch'):
+                mirror = None
+                if os.path.isdir(mirror_path):
+                    try:
+                        mirror = self._fetch_mirror(mirror_path)
+                        self.last_clone_mode = 'fetch'
+                    except git.exc.GitError:
+                        shutil.rmtree(mirror_path, ignore_errors=True)  # Corrupt mirror, start over
+                
+                if mirror is None:
+                    mirror = self._create_mirror(repo_url, mirror_path)
+                    self.last_clone_mode = 'clone'
+                
+                if commit:
+                    self._ensure_commit(mirror, commit)
+            
+            # Detached, so later fetches can move branches the worktree was created from
+            with timer.stage('clone.worktree'):
+                worktree_args = ['add', '--detach']
+                if self.sparse:
+                    worktree_args.append('--no-checkout')
+                mirror.worktree(*worktree_args, os.path.abspath(clone_path), commit or 'HEAD')
+            
+            # Mark as most recently used, and measure only the mirror that changed
+            os.utime(mirror_path)
+            self._measure_mirror(mirror_path)
+        
+        with timer.stage('clone.evict'):
+            self._evict_mirrors(keep=mirror_path)
+        
+        return git.Repo(clone_path)
+    
+    def _create_mirror(self, repo_url, mirror_path):
+        """Clone a bare mirror that tracks every branch of the remote"""
+        os.makedirs(self.mirror_dir, exist_ok=True)
+        
+        clone_options = {'bare': True}
+        if self.depth:
+            clone_options['depth'] = self.depth
+        if self.blob_filter:
+            clone_options['filter'] = self.blob_filter
+        
+        git.Repo.clone_from(repo_url, mirror_path, **clone_options)
+        
+        # Plain git commands: GitPython misreads a bare repo whose core.bare is per-worktree
+        mirror = git.Git(mirror_path)
+        mirror.config('remote.origin.fetch', '+refs/heads/*:refs/heads/*')
+        
+        # Keep core.bare per-worktree so sparse worktrees (which need per-worktree config) stay non-bare
+        mirror.config('core.repositoryformatversion', '1')
+        mirror.config('extensions.worktreeConfig', 'true')
+        mirror.config('--worktree', 'core.bare', 'true')
+        mirror.config('--unset', 'core.bare')
+        
+        return mirror
+    
+    def _fetch_mirror(self, mirror_path):
+        """Bring an existing mirror up to date with an incremental fetch"""
+        mirror = git.Git(mirror_path)
+        
+        # Forget worktrees whose temporary directories have been removed
+        mirror.worktree('prune')
+        
+        fetch_args = ['--prune', 'origin']
+        if self.depth:
+            fetch_args.insert(0, f'--depth={self.depth}')
+        elif mirror.rev_parse('--is-shallow-repository') == 'true':
+            fetch_args.insert(0, '--unshallow')
+        mirror.fetch(*fetch_args)
+        
+        return mirror
+    
+    def _evict_mirrors(self, keep):
+        """
+        Remove least recently used mirrors until the cache fits in mirror_max_bytes, skipping
+        keep and mirrors whose worktrees another analysis is still reading
+        """
+        mirrors = []
+        for name in os.listdir(self.mirror_dir):
+            path = os.path.join(self.mirror_dir, name)
+            if os.path.isdir(path):
+                with _mirror_locks_guard:
+                    size = _mirror_sizes.get(path)
+                mirrors.append((os.path.getmtime(path), size if size is not None else self._measure_mirror(path), path))
+        
+        total = sum(size for _, size, _ in mirrors)
+        for _, size, path in sorted(mirrors):
+            if total <= self.mirror_max_bytes:
+                break
+            if path == keep:
+                continue
+            # Under the lock, so no checkout can add a worktree between the check and the removal
+            with self._mirror_lock(path):
+                if self._has_live_worktrees(path):
+                    continue
+                shutil.rmtree(path, ignore_errors=True)
+            with _mirror_locks_guard:
+                _mirror_sizes.pop(path, None)
+            total -= size
+    
+    def _has_live_worktrees(self, mirror_path):
+        """Whether any worktree checked out from a mirror still exists on disk"""
+        worktrees = os.path.join(mirror_path, 'worktrees')
+        if not os.path.isdir(worktrees):
+            return False
+        for name in os.listdir(worktrees):
+            try:
+                with open(os.path.join(worktrees, name, 'gitdir'), 'r', encoding='utf-8') as f:
+                    if os.path.exists(f.read().strip()):
+                        return True
+            except OSError:
+                continue
+        return False
+    
+    def _measure_mirror(self, mirror_path):
+        """Record and return the size of a mirror, from git's object counts when possible"""
+        try:
+            counts = dict(line.split(': ', 1) for line in git.Git(mirror_path).count_objects('-v').splitlines())
+            size = sum(int(counts.get(key, 0)) for key in ('size', 'size-pack', 'size-garbage')) * 1024
+        except (git.exc.GitError, ValueError):
+            size = self._dir_size(mirror_path)
+        with _mirror_locks_guard:
+            _mirror_sizes[mirror_path] = size
+        return size
+    
+    def _mirror_lock(self, mirror_path):
+        """Return the lock guarding a mirror directory"""
+        with _mirror_locks_guard:
+            return _mirror_locks.setdefault(mirror_path, threading.Lock())
+    
+    def _dir_size(self, path):
+        """Total size of all files below path"""
+        total = 0
+        for root, dirs, files in os.walk(path):
+            for file in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, file))
+                except OSError:
+                    pass
+        return total
+    
+    def _ensure_commit(self, git_cmd, commit):
+        """Fetch a commit from origin if the (possibly shallow) clone does not have it yet"""
+        try:
+            git_cmd.rev_parse('--verify', '--quiet', f'{commit}^{{commit}}')
+        except git.exc.GitCommandError:
+            fetch_args = ['origin', commit]
+            if self.depth:
+                fetch_args.insert(0, f'--depth={self.depth}')
+            git_cmd.fetch(*fetch_args)
+    
+    def _sparse_checkout(self, repo, commit=None):
+        """Check out the working tree without the directories the parser skips"""
+        patterns = ['/*'] + [f'!{directory}/' for directory in SKIPPED_DIRS]
+        
+        repo.git.sparse_checkout('set', '--no-cone', *patterns)
+        if commit:
+            repo.git.checkout(commit)
+        else:
+            repo.git.checkout()
+    
     def is_valid_github_url(self, url):
         """Validate if the URL is a valid GitHub repository URL"""
         try:
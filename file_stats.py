@@ -0,0 +1,102 @@
+import os
+import numpy as np
+from analyzer.tech_stack import TECH_STACK_RULES
+
+# Size percentiles reported for the files of a repository
+SIZE_PERCENTILES = (50, 90, 99)
+
+# Directory reported for files at the top level of the repository
+ROOT_DIRECTORY = '.'
+
+
+def language_extensions(rules=TECH_STACK_RULES):
+    """Map each file extension of an 'extension' tech stack rule to its technology"""
+    return {rule.target: rule.tech for rule in rules if rule.kind == 'extension'}
+
+
+def compute_statistics(file_index, top_k=5, top_directories=10, languages=None):
+    """
+    Repository statistics from the file index, computed over NumPy columns (size,
+    extension id, depth, top-level directory id) rather than per-file Python objects.
+    Hidden files and files whose size could not be read are left out.
+    """
+    languages = language_extensions() if languages is None else languages
+    extension_ids = {}  # Assigned in scan order, so dicts built from ids keep first-seen order
+    directory_ids = {}
+
+    # Columns sized for every entry and filled in one pass; skipped entries leave the tail unused
+    capacity = len(file_index)
+    positions = np.empty(capacity, dtype=np.int64)  # Index of each counted file in file_index
+    sizes = np.empty(capacity, dtype=np.int64)
+    depths = np.empty(capacity, dtype=np.int16)
+    extensions = np.empty(capacity, dtype=np.int32)
+    directories = np.empty(capacity, dtype=np.int32)
+
+    count = 0
+    for position, entry in enumerate(file_index):
+        if entry.size is None or entry.name.startswith('.'):
+            continue
+        extension = entry.extension or 'no_extension'
+        extension_id = extension_ids.get(extension)
+        if extension_id is None:
+            extension_id = extension_ids[extension] = len(extension_ids)
+        separator = entry.relative_path.find(os.sep)
+        directory = entry.relative_path[:separator] if separator >= 0 else ROOT_DIRECTORY
+        directory_id = directory_ids.get(directory)
+        if directory_id is None:
+            directory_id = directory_ids[directory] = len(directory_ids)
+
+        positions[count] = position
+        sizes[count] = entry.size
+        depths[count] = entry.depth
+        extensions[count] = extension_id
+        directories[count] = directory_id
+        count += 1
+
+    positions, sizes, depths = positions[:count], sizes[:count], depths[:count]
+    extensions, directories = extensions[:count], directories[:count]
+
+    extension_names = list(extension_ids)
+    extension_counts = np.bincount(extensions, minlength=len(extension_names))
+    extension_bytes = np.bincount(extensions, weights=sizes, minlength=len(extension_names))
+
+    language_bytes = {}
+    for extension, total in zip(extension_names, extension_bytes):
+        language = languages.get(extension, 'Other')
+        language_bytes[language] = language_bytes.get(language, 0) + int(total)
+
+    directory_names = list(directory_ids)
+    directory_counts = np.bincount(directories, minlength=len(directory_names))
+    directory_bytes = np.bincount(directories, weights=sizes, minlength=len(directory_names))
+    directory_order = sorted(range(len(directory_names)), key=lambda i: (-directory_bytes[i], directory_names[i]))
+
+    return {
+        'total_files': count,
+        'total_size': int(sizes.sum()),
+        'file_types': {name: int(total) for name, total in zip(extension_names, extension_counts)},
+        'largest_files': [(file_index[positions[i]].relative_path, int(sizes[i])) for i in largest(sizes, top_k)],
+        'size_percentiles': ({str(p): int(value) for p, value in
+                              zip(SIZE_PERCENTILES, np.percentile(sizes, SIZE_PERCENTILES))} if count else {}),
+        'max_depth': int(depths.max()) if count else 0,
+        'languages': dict(sorted(language_bytes.items(), key=lambda item: (-item[1], item[0]))),
+        'directories': [
+            {'path': directory_names[i], 'files': int(directory_counts[i]), 'size': int(directory_bytes[i])}
+            for i in directory_order[:top_directories]
+        ]
+    }
+
+
+def largest(sizes, k):
+    """
+    Indexes of the k largest sizes, largest first and earlier files first among equal sizes,
+    in O(n) plus a sort of the files tied at the cut-off
+    """
+    if k <= 0 or not len(sizes):
+        return []
+    if len(sizes) > k:
+        threshold = np.partition(sizes, len(sizes) - k)[len(sizes) - k]
+        candidates = np.flatnonzero(sizes >= threshold)
+    else:
+        candidates = np.arange(len(sizes))
+    order = np.lexsort((candidates, -sizes[candidates]))
+    return [int(i) for i in candidates[order[:k]]]
@@ -1,105 +1,39 @@
+import os
+import json
+import hashlib
+import threading
 import markdown
-from datetime import datetime
+from collections import OrderedDict
+from analyzer.metrics import StageTimer
+from analyzer.tree import render_tree
 
-class DocumentationGenerator:
-    def __init__(self):
-        self.md = markdown.Markdown(extensions=['codehilite', 'fenced_code'])
-    
-    def generate_documentation(self, repo_data, summaries):
-        """Generate comprehensive documentation in Markdown format"""
-        
-        # Generate Markdown documentation
-        markdown_doc = self._generate_markdown(repo_data, summaries)
-        
-        # Convert to HTML
-        html_doc = self._generate_html(markdown_doc)
-        
-        return {
-            'markdown': markdown_doc,
-            'html': html_doc,
-            'metadata': {
-                'generated_at': datetime.now().isoformat(),
-                'repo_name': repo_data['name'],
-                'tech_stack': repo_data['tech_stack']
-            }
-        }
-    
-    def _generate_markdown(self, repo_data, summaries):
-        """Generate Markdown documentation"""
-        
-        md_content = f"""# 📊 Repository Analysis: {repo_data['name']}
-
-*Generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*
-
----
-
-## 🧾 Project Summary
-
-{summaries.get('project_overview', 'Project overview not available')}
-
----
-
-## 🛠️ Tech Stack
-
-**Detected Technologies:** {', '.join(repo_data['tech_stack']) if repo_data['tech_stack'] else 'None detected'}
-
-{summaries.get('tech_stack_explanation', 'Tech stack explanation not available')}
-
----
-
-## 📂 Folder Structure
-
-{summaries.get('structure_explanation', 'Folder structure explanation not available')}
-
-### Directory Tree
-
----
-
-## 🚀 Installation & Setup
-
-{summaries.get('installation_guide', 'Installation guide not available')}
-
----
-
-## 📜 Key Files Overview
-
-{self._generate_files_section(repo_data, summaries)}
-
----
-
-## 📊 Repository Statistics
-
-- **Total Files:** {repo_data['statistics']['total_files']}
-- **Total Size:** {self._format_size(repo_data['statistics']['total_size'])}
-- **File Types:** {self._format_file_types(repo_data['statistics']['file_types'])}
-
-### Largest Files
-{self._format_largest_files(repo_data['statistics']['largest_files'])}
-
----
-
-## 🔍 Quick Navigation
+# Document sections in output order
+SECTIONS = ['header', 'summary', 'tech_stack', 'structure', 'installation', 'key_files', 'statistics', 'footer']
 
-- [Project Summary](#project-summary)
-- [Tech Stack](#tech-stack)
-- [Installation](#installation--setup)
-- [Key Files](#key-files-overview)
-- [Statistics](#repository-statistics)
+# Inputs each section's Markdown depends on: (repo_data keys, summaries keys). A section is
+# rendered again only when one of these changes; key files are keyed per file instead
+SECTION_INPUTS = {
+    'header': (('name', 'commit'), ()),
+    'summary': ((), ('project_overview',)),
+    'tech_stack': (('tech_stack', 'dependencies'), ('tech_stack_explanation',)),
+    'structure': (('structure',), ('structure_explanation',)),
+    'installation': ((), ('installation_guide',)),
+    'statistics': (('statistics',), ()),
+    'footer': ((), ()),
+}
 
----
+# Summary keys produced by RepoSummarizer and the section each one fills in
+SUMMARY_SECTIONS = {
+    'project_overview': 'summary',
+    'tech_stack_explanation': 'tech_stack',
+    'structure_explanation': 'structure',
+    'installation_guide': 'installation',
+    'file_explanations': 'key_files'
+}
 
-*This documentation was automatically generated using AI analysis. For the most up-to-date information, please refer to the repository's README and source code.*
-"""
-        
-        return md_content
-    
-    def _generate_html(self, markdown_content):
-        """Convert Markdown to HTML with professional dark theme styling"""
-        
-        html_content = self.md.convert(markdown_content)
-        
-        # Wrap in a complete HTML document with professional dark theme
-        full_html = f"""
+# Standalone HTML document around the converted Markdown, with the dark theme inlined so
+# downloaded documents need no other files. Split once here instead of formatting per document
+HTML_SHELL = """
 <!DOCTYPE html>
 <html lang="en">
 <head>
@@ -107,7 +41,7 @@ class DocumentationGenerator:
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Repository Analysis</title>
     <style>
-        :root {{
+        :root {
             --bg-primary: #0d1117;
             --bg-secondary: #161b22;
             --bg-tertiary: #21262d;
@@ -124,15 +58,15 @@ class DocumentationGenerator:
             --code-border: #30363d;
             --shadow: 0 8px 32px rgba(0, 0, 0, 0.4);
             --gradient-primary: linear-gradient(135deg, #2f81f7 0%, #238636 100%);
-        }}
+        }
         
-        * {{
+        * {
             margin: 0;
             padding: 0;
             box-sizing: border-box;
-        }}
+        }
         
-        body {{
+        body {
             font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', 'Noto Sans', Helvetica, Arial, sans-serif;
             line-height: 1.7;
             color: var(--text-primary);
@@ -142,9 +76,9 @@ class DocumentationGenerator:
                 radial-gradient(circle at 75% 75%, rgba(35, 134, 54, 0.05) 0%, transparent 50%);
             min-height: 100vh;
             font-size: 16px;
-        }}
+        }
         
-        .container {{
+        .container {
             max-width: 1200px;
             margin: 0 auto;
             padding: 2rem;
@@ -155,9 +89,9 @@ class DocumentationGenerator:
             margin-top: 2rem;
             margin-bottom: 2rem;
             position: relative;
-        }}
+        }
         
-        .container::before {{
+        .container::before {
             content: '';
             position: absolute;
             top: 0;
@@ -166,9 +100,9 @@ class DocumentationGenerator:
             height: 4px;
             background: var(--gradient-primary);
             border-radius: 12px 12px 0 0;
-        }}
+        }
         
-        h1 {{
+        h1 {
             font-size: 2.5rem;
             font-weight: 700;
             color: var(--text-primary);
@@ -181,9 +115,9 @@ class DocumentationGenerator:
             -webkit-background-clip: text;
             -webkit-text-fill-color: transparent;
             letter-spacing: -0.025em;
-        }}
+        }
         
-        h2 {{
+        h2 {
             font-size: 1.875rem;
             font-weight: 600;
             color: var(--text-primary);
@@ -191,9 +125,9 @@ class DocumentationGenerator:
             padding-bottom: 0.75rem;
             border-bottom: 2px solid var(--accent-primary);
             position: relative;
-        }}
+        }
         
-        h2::before {{
+        h2::before {
             content: '';
             position: absolute;
             bottom: -2px;
@@ -201,35 +135,35 @@ class DocumentationGenerator:
             width: 60px;
             height: 2px;
             background: var(--accent-secondary);
-        }}
+        }
         
-        h3 {{
+        h3 {
             font-size: 1.5rem;
             font-weight: 600;
             color: var(--text-primary);
             margin: 2rem 0 1rem 0;
             padding-bottom: 0.5rem;
             border-bottom: 1px solid var(--border-secondary);
-        }}
+        }
         
-        p {{
+        p {
             margin-bottom: 1rem;
             color: var(--text-secondary);
             line-height: 1.8;
-        }}
+        }
         
-        em {{
+        em {
             color: var(--text-muted);
             font-style: italic;
             font-size: 0.9rem;
-        }}
+        }
         
-        strong {{
+        strong {
             color: var(--text-primary);
             font-weight: 600;
-        }}
+        }
         
-        code {{
+        code {
             background: var(--code-bg);
             border: 1px solid var(--code-border);
             color: var(--accent-primary);
@@ -238,9 +172,9 @@ class DocumentationGenerator:
             font-family: 'SF Mono', Monaco, 'Cascadia Code', 'Roboto Mono', Consolas, 'Courier New', monospace;
             font-size: 0.875rem;
             font-weight: 500;
-        }}
+        }
         
-        pre {{
+        pre {
             background: var(--bg-tertiary);
             border: 1px solid var(--border-primary);
             border-radius: 8px;
@@ -248,53 +182,53 @@ class DocumentationGenerator:
             overflow-x: auto;
             margin: 1rem 0;
             position: relative;
-        }}
+        }
         
-        pre code {{
+        pre code {
             background: none;
             border: none;
             color: var(--text-primary);
             padding: 0;
             font-size: 0.875rem;
             line-height: 1.6;
-        }}
+        }
         
-        ul, ol {{
+        ul, ol {
             margin: 1rem 0 1rem 2rem;
             color: var(--text-secondary);
-        }}
+        }
         
-        li {{
+        li {
             margin-bottom: 0.5rem;
             line-height: 1.7;
-        }}
+        }
         
-        li::marker {{
+        li::marker {
             color: var(--accent-primary);
-        }}
+        }
         
-        a {{
+        a {
             color: var(--accent-primary);
             text-decoration: none;
             transition: all 0.2s ease;
             border-bottom: 1px solid transparent;
-        }}
+        }
         
-        a:hover {{
+        a:hover {
             color: var(--text-primary);
             border-bottom-color: var(--accent-primary);
-        }}
+        }
         
-        hr {{
+        hr {
             border: none;
             height: 2px;
             background: var(--gradient-primary);
             margin: 3rem 0;
             border-radius: 1px;
             opacity: 0.8;
-        }}
+        }
         
-        .tech-stack {{
+        .tech-stack {
             background: var(--bg-tertiary);
             border: 1px solid var(--accent-primary);
             border-left: 4px solid var(--accent-primary);
@@ -303,9 +237,9 @@ class DocumentationGenerator:
             margin: 1rem 0;
             position: relative;
             overflow: hidden;
-        }}
+        }
         
-        .tech-stack::before {{
+        .tech-stack::before {
             content: '';
             position: absolute;
             top: 0;
@@ -314,30 +248,30 @@ class DocumentationGenerator:
             bottom: 0;
             background: linear-gradient(135deg, rgba(47, 129, 247, 0.05) 0%, transparent 100%);
             pointer-events: none;
-        }}
+        }
         
-        .file-section {{
+        .file-section {
             background: var(--bg-tertiary);
             border: 1px solid var(--border-primary);
             border-radius: 8px;
             padding: 1.5rem;
             margin: 1.5rem 0;
             transition: all 0.3s ease;
-        }}
+        }
         
-        .file-section:hover {{
+        .file-section:hover {
             border-color: var(--accent-primary);
             box-shadow: 0 4px 16px rgba(47, 129, 247, 0.1);
-        }}
+        }
         
-        .stats-grid {{
+        .stats-grid {
             display: grid;
             grid-template-columns: repeat(auto-fit, minmax(280px, 1fr));
             gap: 1.5rem;
             margin: 2rem 0;
-        }}
+        }
         
-        .stat-card {{
+        .stat-card {
             background: var(--bg-tertiary);
             border: 1px solid var(--border-primary);
             border-radius: 8px;
@@ -346,9 +280,9 @@ class DocumentationGenerator:
             transition: all 0.3s ease;
             position: relative;
             overflow: hidden;
-        }}
+        }
         
-        .stat-card::before {{
+        .stat-card::before {
             content: '';
             position: absolute;
             top: 0;
@@ -356,15 +290,15 @@ class DocumentationGenerator:
             right: 0;
             height: 3px;
             background: var(--gradient-primary);
-        }}
+        }
         
-        .stat-card:hover {{
+        .stat-card:hover {
             border-color: var(--accent-primary);
             transform: translateY(-2px);
             box-shadow: 0 8px 24px rgba(47, 129, 247, 0.15);
-        }}
+        }
         
-        .stat-number {{
+        .stat-number {
             font-size: 2.5rem;
             font-weight: 700;
             background: var(--gradient-primary);
@@ -373,17 +307,17 @@ class DocumentationGenerator:
             -webkit-text-fill-color: transparent;
             margin-bottom: 0.5rem;
             display: block;
-        }}
+        }
         
-        .stat-label {{
+        .stat-label {
             color: var(--text-secondary);
             font-size: 0.875rem;
             font-weight: 500;
             text-transform: uppercase;
             letter-spacing: 0.05em;
-        }}
+        }
         
-        blockquote {{
+        blockquote {
             border-left: 4px solid var(--accent-secondary);
             padding: 1rem 1.5rem;
             margin: 1.5rem 0;
@@ -391,9 +325,9 @@ class DocumentationGenerator:
             border-radius: 0 8px 8px 0;
             font-style: italic;
             color: var(--text-secondary);
-        }}
+        }
         
-        table {{
+        table {
             width: 100%;
             border-collapse: collapse;
             margin: 1.5rem 0;
@@ -401,53 +335,53 @@ class DocumentationGenerator:
             border-radius: 8px;
             overflow: hidden;
             border: 1px solid var(--border-primary);
-        }}
+        }
         
-        th, td {{
+        th, td {
             padding: 1rem;
             text-align: left;
             border-bottom: 1px solid var(--border-secondary);
-        }}
+        }
         
-        th {{
+        th {
             background: var(--bg-primary);
             color: var(--text-primary);
             font-weight: 600;
             font-size: 0.875rem;
             text-transform: uppercase;
             letter-spacing: 0.05em;
-        }}
+        }
         
-        td {{
+        td {
             color: var(--text-secondary);
-        }}
+        }
         
-        tr:last-child td {{
+        tr:last-child td {
             border-bottom: none;
-        }}
+        }
         
-        .navigation {{
+        .navigation {
             background: var(--bg-tertiary);
             border: 1px solid var(--border-primary);
             border-radius: 8px;
             padding: 1.5rem;
             margin: 2rem 0;
-        }}
+        }
         
-        .navigation ul {{
+        .navigation ul {
             list-style: none;
             margin: 0;
             padding: 0;
             display: grid;
             grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
             gap: 0.5rem;
-        }}
+        }
         
-        .navigation li {{
+        .navigation li {
             margin: 0;
-        }}
+        }
         
-        .navigation a {{
+        .navigation a {
             display: block;
             padding: 0.75rem 1rem;
             background: var(--bg-secondary);
@@ -455,45 +389,45 @@ class DocumentationGenerator:
             border-radius: 6px;
             transition: all 0.2s ease;
             font-weight: 500;
-        }}
+        }
         
-        .navigation a:hover {{
+        .navigation a:hover {
             background: var(--accent-primary);
             color: var(--text-primary);
             border-color: var(--accent-primary);
             transform: translateX(4px);
-        }}
+        }
         
-        @media (max-width: 768px) {{
-            .container {{
+        @media (max-width: 768px) {
+            .container {
                 margin: 1rem;
                 padding: 1.5rem;
-            }}
+            }
             
-            h1 {{
+            h1 {
                 font-size: 2rem;
-            }}
+            }
             
-            h2 {{
+            h2 {
                 font-size: 1.5rem;
-            }}
+            }
             
-            .stats-grid {{
+            .stats-grid {
                 grid-template-columns: 1fr;
-            }}
+            }
             
-            .navigation ul {{
+            .navigation ul {
                 grid-template-columns: 1fr;
-            }}
-        }}
+            }
+        }
         
-        @media (prefers-reduced-motion: reduce) {{
-            * {{
+        @media (prefers-reduced-motion: reduce) {
+            * {
                 animation-duration: 0.01ms !important;
                 animation-iteration-count: 1 !important;
                 transition-duration: 0.01ms !important;
-            }}
-        }}
+            }
+        }
     </style>
 </head>
 <body>
@@ -503,8 +437,244 @@ class DocumentationGenerator:
 </body>
 </html>
 """
+HTML_SHELL_HEAD, HTML_SHELL_TAIL = HTML_SHELL.split('{html_content}')
+
+# Markdown shared by the whole key files section and its per-file fragments
+KEY_FILES_HEADING = "## 📜 Key Files Overview\n\n"
+NO_KEY_FILES = "No key files analyzed."
+SECTION_END = "\n\n---\n\n"
+
+# Per-thread Markdown converters, reused across generator instances
+_converters = threading.local()
+
+# Rendered HTML of documents and document sections by Markdown hash, least recently used first
+_html_cache = OrderedDict()
+_html_cache_lock = threading.Lock()
+
+# Markdown of document sections by a hash of their inputs, least recently used first
+_markdown_cache = OrderedDict()
+_markdown_cache_lock = threading.Lock()
+
+class DocumentationGenerator:
+    def __init__(self, html_cache_size=None):
+        # Rendered sections kept, Markdown keyed by a hash of their inputs and HTML by a hash of their Markdown
+        self.html_cache_size = html_cache_size or int(os.getenv('HTML_CACHE_SIZE', '2048'))
+    
+    def generate_documentation(self, repo_data, summaries, timings=None):
+        """
+        Generate comprehensive documentation in Markdown format.
+        timings: stage durations measured by the caller (e.g. clone), merged into the
+        metadata's timing breakdown with those of the parser, summarizer and generator
+        """
+        timer = StageTimer()
+        
+        # Generate Markdown documentation, one independently hashed fragment per section and key file;
+        # fragments whose inputs did not change come from the cache
+        section_cache_stats = {'markdown': {'reused': 0, 'rendered': 0}, 'html': {'reused': 0, 'rendered': 0}}
+        with timer.stage('generate.markdown'):
+            fragments = list(self._fragments(repo_data, summaries, section_cache_stats['markdown']))
+            markdown_doc = "".join(markdown_content for _, markdown_content in fragments)
+        
+        # Convert to HTML, splicing together the cached HTML of fragments that did not change
+        with timer.stage('generate.html'):
+            html_doc = HTML_SHELL_HEAD + "\n".join(
+                self._fragment_html(markdown_content, section_cache_stats['html']) for _, markdown_content in fragments
+            ) + HTML_SHELL_TAIL
+        
+        return {
+            'markdown': markdown_doc,
+            'html': html_doc,
+            'metadata': {
+                # Same repository, commit and summaries give the same hash, usable as an ETag
+                'content_hash': self._hash(markdown_doc),
+                'section_hashes': {name: self._hash(markdown_content) for name, markdown_content in fragments},
+                'section_cache_stats': section_cache_stats,
+                'repo_name': repo_data['name'],
+                'tech_stack': repo_data['tech_stack'],
+                'file_cache_stats': summaries.get('file_cache_stats', {'reused': 0, 'regenerated': 0}),
+                'prompt_tokens': summaries.get('prompt_tokens', {}),
+                'timings': {**(timings or {}), **repo_data.get('timings', {}),
+                            **summaries.get('timings', {}), **timer.report()}
+            }
+        }
+    
+    def _generate_markdown(self, repo_data, summaries):
+        """Generate Markdown documentation"""
+        
+        md_content = "".join(markdown_content for _, markdown_content in self._fragments(repo_data, summaries))
         
-        return full_html
+        return md_content
+    
+    def _fragments(self, repo_data, summaries, stats=None):
+        """
+        Yield (name, markdown) for each part of the document in order: one per section,
+        with the key files section split into its heading, one fragment per file and its end.
+        """
+        for name in SECTIONS:
+            if name != 'key_files':
+                repo_keys, summary_keys = SECTION_INPUTS[name]
+                inputs = ([repo_data.get(key) for key in repo_keys], [summaries.get(key) for key in summary_keys])
+                yield name, self._cached_markdown(name, inputs, stats, self.render_section, name, repo_data, summaries)
+                continue
+            
+            yield 'key_files', KEY_FILES_HEADING
+            file_explanations = summaries.get('file_explanations', {})
+            if not file_explanations:
+                yield 'key_files:none', NO_KEY_FILES
+            for file_path, explanation in file_explanations.items():
+                yield f'key_files:{file_path}', self._cached_markdown(
+                    'key_files', [file_path, explanation], stats, self.render_file_explanation, file_path, explanation)
+            yield 'key_files:end', SECTION_END
+    
+    def _cached_markdown(self, name, inputs, stats, render, *args):
+        """Markdown of a fragment from the cache when its inputs were rendered before, else render(*args)"""
+        key = self._hash(json.dumps([name, inputs], sort_keys=True, default=str))
+        with _markdown_cache_lock:
+            if key in _markdown_cache:
+                _markdown_cache.move_to_end(key)
+                if stats is not None:
+                    stats['reused'] += 1
+                return _markdown_cache[key]
+        
+        markdown_content = render(*args)
+        
+        with _markdown_cache_lock:
+            _markdown_cache[key] = markdown_content
+            while len(_markdown_cache) > self.html_cache_size:
+                _markdown_cache.popitem(last=False)
+        if stats is not None:
+            stats['rendered'] += 1
+        
+        return markdown_content
+    
+    def _hash(self, text):
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+    
+    def render_section(self, name, repo_data, summaries):
+        """Render one named section of the Markdown document"""
+        return getattr(self, f'_render_{name}_section')(repo_data, summaries)
+    
+    def _render_header_section(self, repo_data, summaries):
+        # No generation time here: identical inputs must give an identical document
+        commit = repo_data.get('commit')
+        return f"""# 📊 Repository Analysis: {repo_data['name']}
+
+{f"*Generated from commit `{commit[:12]}`*" if commit else "*Generated from the working tree*"}
+
+---
+
+"""
+    
+    def _render_summary_section(self, repo_data, summaries):
+        return f"""## 🧾 Project Summary
+
+{summaries.get('project_overview', 'Project overview not available')}
+
+---
+
+"""
+    
+    def _render_tech_stack_section(self, repo_data, summaries):
+        return f"""## 🛠️ Tech Stack
+
+**Detected Technologies:** {', '.join(repo_data['tech_stack']) if repo_data['tech_stack'] else 'None detected'}
+{self._format_dependencies(repo_data.get('dependencies'))}
+{summaries.get('tech_stack_explanation', 'Tech stack explanation not available')}
+
+---
+
+"""
+    
+    def _render_structure_section(self, repo_data, summaries):
+        return f"""## 📂 Folder Structure
+
+{summaries.get('structure_explanation', 'Folder structure explanation not available')}
+
+### Directory Tree
+
+```
+{self._format_directory_tree(repo_data['structure'])}```
+
+---
+
+"""
+    
+    def _render_installation_section(self, repo_data, summaries):
+        return f"""## 🚀 Installation & Setup
+
+{summaries.get('installation_guide', 'Installation guide not available')}
+
+---
+
+"""
+    
+    def _render_key_files_section(self, repo_data, summaries):
+        return KEY_FILES_HEADING + self._generate_files_section(repo_data, summaries) + SECTION_END
+    
+    def _render_statistics_section(self, repo_data, summaries):
+        return f"""## 📊 Repository Statistics
+
+- **Total Files:** {repo_data['statistics']['total_files']}
+- **Total Size:** {self._format_size(repo_data['statistics']['total_size'])}
+- **File Types:** {self._format_file_types(repo_data['statistics']['file_types'])}
+{self._format_size_distribution(repo_data['statistics'])}
+### Largest Files
+{self._format_largest_files(repo_data['statistics']['largest_files'])}{self._format_languages(repo_data['statistics'])}{self._format_directories(repo_data['statistics'])}
+
+---
+
+"""
+    
+    def _render_footer_section(self, repo_data, summaries):
+        return """## 🔍 Quick Navigation
+
+- [Project Summary](#project-summary)
+- [Tech Stack](#tech-stack)
+- [Installation](#installation--setup)
+- [Key Files](#key-files-overview)
+- [Statistics](#repository-statistics)
+
+---
+
+*This documentation was automatically generated using AI analysis. For the most up-to-date information, please refer to the repository's README and source code.*
+"""
+    
+    def _generate_html(self, markdown_content):
+        """Convert Markdown to HTML with professional dark theme styling"""
+        # Wrap in a complete HTML document with professional dark theme
+        return HTML_SHELL_HEAD + self._fragment_html(markdown_content) + HTML_SHELL_TAIL
+    
+    def _fragment_html(self, markdown_content, stats=None):
+        """Convert Markdown to HTML, reusing the result for Markdown converted before"""
+        key = self._hash(markdown_content)
+        with _html_cache_lock:
+            if key in _html_cache:
+                _html_cache.move_to_end(key)
+                if stats is not None:
+                    stats['reused'] += 1
+                return _html_cache[key]
+        
+        md = self._markdown()
+        try:
+            html_content = md.convert(markdown_content)
+        finally:
+            md.reset()  # Converters keep footnotes, references and the like between calls
+        
+        with _html_cache_lock:
+            _html_cache[key] = html_content
+            while len(_html_cache) > self.html_cache_size:
+                _html_cache.popitem(last=False)
+        if stats is not None:
+            stats['rendered'] += 1
+        
+        return html_content
+    
+    def _markdown(self):
+        """This thread's Markdown converter; instances are not safe to share between threads"""
+        md = getattr(_converters, 'md', None)
+        if md is None:
+            md = _converters.md = markdown.Markdown(extensions=['codehilite', 'fenced_code'])
+        return md
     
     def _generate_files_section(self, repo_data, summaries):
         """Generate the key files section"""
@@ -513,34 +683,45 @@ class DocumentationGenerator:
         file_explanations = summaries.get('file_explanations', {})
         
         if not file_explanations:
-            return "No key files analyzed."
+            return NO_KEY_FILES
         
         for file_path, explanation in file_explanations.items():
-            files_section += f"""
+            files_section += self.render_file_explanation(file_path, explanation)
+        
+        return files_section
+    
+    def render_file_explanation(self, file_path, explanation):
+        """Render the entry for a single key file"""
+        return f"""
 ### 📄 `{file_path}`
 
 {explanation}
 
 ---
 """
-        
-        return files_section
     
-    def _format_directory_tree(self, structure, prefix="", is_last=True):
-        """Format directory structure as a tree"""
-        tree = ""
-        items = list(structure.items())
-        
-        for i, (name, content) in enumerate(items):
-            is_last_item = i == len(items) - 1
-            current_prefix = "└── " if is_last_item else "├── "
-            tree += f"{prefix}{current_prefix}{name}\n"
-            
-            if isinstance(content, dict) and content:
-                extension = "    " if is_last_item else "│   "
-                tree += self._format_directory_tree(content, prefix + extension, is_last_item)
-        
-        return tree
+    def _format_directory_tree(self, structure):
+        """Format directory structure as a tree, large directories summarised"""
+        return render_tree(structure)
+    
+    def _format_dependencies(self, manifests, max_names=8):
+        """Format the dependencies declared in each manifest"""
+        if not manifests:
+            return ""
+        
+        formatted = "\n### Dependencies\n\n"
+        for manifest in manifests:
+            runtime = [item['name'] for item in manifest['dependencies'] if item['scope'] == 'runtime']
+            build = [item['name'] for item in manifest['dependencies'] if item['scope'] == 'build']
+            dev = [item['name'] for item in manifest['dependencies'] if item['scope'] == 'dev']
+            names = ', '.join(f"`{name}`" for name in runtime[:max_names])
+            more = f", +{len(runtime) - max_names} more" if len(runtime) > max_names else ""
+            counts = f"{len(runtime)} runtime, {len(build)} build, {len(dev)} dev" if build else \
+                f"{len(runtime)} runtime, {len(dev)} dev"
+            formatted += f"- `{manifest['path']}` ({manifest['ecosystem']}): {counts}"
+            formatted += f" — {names}{more}\n" if names else "\n"
+        
+        return formatted
     
     def _format_size(self, size_bytes):
         """Format file size in human-readable format"""
@@ -563,6 +744,40 @@ class DocumentationGenerator:
         
         return ", ".join(formatted)
     
+    def _format_size_distribution(self, statistics):
+        """Format file size percentiles"""
+        percentiles = statistics.get('size_percentiles')
+        if not percentiles:
+            return ""
+        
+        formatted = ", ".join(f"p{p}: {self._format_size(size)}" for p, size in percentiles.items())
+        return f"- **File Sizes:** {formatted}, deepest file at depth {statistics['max_depth']}\n"
+    
+    def _format_languages(self, statistics):
+        """Format bytes per language, largest first"""
+        languages = statistics.get('languages')
+        if not languages or not statistics['total_size']:
+            return ""
+        
+        formatted = "\n### Languages by Size\n"
+        for language, size in languages.items():
+            formatted += f"- {language}: {self._format_size(size)} ({size / statistics['total_size']:.1%})\n"
+        
+        return formatted
+    
+    def _format_directories(self, statistics):
+        """Format the top-level directories holding the most bytes"""
+        directories = statistics.get('directories')
+        if not directories:
+            return ""
+        
+        formatted = "\n### Largest Directories\n"
+        for directory in directories:
+            files = f"{directory['files']} file{'s' if directory['files'] != 1 else ''}"
+            formatted += f"- `{directory['path']}/`: {files}, {self._format_size(directory['size'])}\n"
+        
+        return formatted
+    
     def _format_largest_files(self, largest_files):
         """Format largest files list"""
         if not largest_files:
@@ -0,0 +1,329 @@
+import os
+import re
+import ast
+import json
+from analyzer.tree import DirectoryTree
+from analyzer.outline import outline_symbol_names
+
+# One-line roles of common technologies for the tech stack section
+TECH_DESCRIPTIONS = {
+    'Python': 'general-purpose language used for the application code',
+    'JavaScript/Node.js': 'JavaScript runtime and package ecosystem',
+    'TypeScript': 'typed superset of JavaScript',
+    'React': 'component-based UI library',
+    'Next.js': 'React framework with server-side rendering and routing',
+    'Vue.js': 'progressive UI framework',
+    'Angular': 'full-featured front-end framework',
+    'Express.js': 'minimal Node.js web server framework',
+    'Flask': 'lightweight Python web framework',
+    'Django': 'batteries-included Python web framework',
+    'FastAPI': 'async Python API framework',
+    'LangChain': 'framework for composing LLM calls',
+    'Java': 'JVM language used for the application code',
+    'Spring Boot': 'opinionated Java application framework',
+    'C#': '.NET language used for the application code',
+    'Go': 'compiled language with built-in concurrency',
+    'Rust': 'memory-safe systems language',
+    'PHP': 'server-side scripting language',
+    'Ruby': 'dynamic language, often used with Rails',
+    'Docker': 'container images for building and running the project',
+    'Kubernetes': 'manifests for deploying to a Kubernetes cluster',
+    'Terraform': 'infrastructure as code',
+}
+
+# Usual purpose of well-known top-level directories
+DIRECTORY_ROLES = {
+    'src': 'main source code', 'lib': 'library code', 'app': 'application code',
+    'pkg': 'reusable packages', 'cmd': 'command-line entry points', 'internal': 'private packages',
+    'packages': 'workspace packages of the monorepo', 'apps': 'applications of the monorepo',
+    'test': 'tests', 'tests': 'tests', 'spec': 'tests', '__tests__': 'tests',
+    'docs': 'documentation', 'doc': 'documentation', 'examples': 'usage examples',
+    'scripts': 'helper scripts', 'bin': 'executables', 'tools': 'developer tooling',
+    'config': 'configuration', 'configs': 'configuration', 'deploy': 'deployment manifests',
+    'templates': 'templates', 'static': 'static assets', 'public': 'public assets', 'assets': 'assets',
+    'components': 'UI components', 'pages': 'page routes', 'api': 'API handlers',
+    'migrations': 'database migrations', '.github': 'GitHub workflows and templates',
+}
+
+# Manifest file name -> install command
+INSTALL_COMMANDS = {
+    'requirements.txt': 'pip install -r requirements.txt',
+    'pyproject.toml': 'pip install .',
+    'setup.py': 'pip install .',
+    'Pipfile': 'pipenv install',
+    'package.json': 'npm install',
+    'go.mod': 'go build ./...',
+    'Cargo.toml': 'cargo build',
+    'pom.xml': 'mvn install',
+    'build.gradle': 'gradle build',
+    'Gemfile': 'bundle install',
+    'composer.json': 'composer install',
+}
+
+ENTRY_POINT_NAMES = ['main.py', 'app.py', 'manage.py', 'index.js', 'main.js', 'server.js',
+                     'main.go', 'main.rs', 'index.tsx', 'main.tsx', 'App.tsx']
+
+INSTALL_HEADING = re.compile(r'install|setup|set up|getting started|quick ?start|usage', re.IGNORECASE)
+MARKDOWN_HEADING = re.compile(r'^(#{1,6})\s+(.*)$')
+BLOCK_COMMENT = re.compile(r'\A\s*/\*+(.*?)\*/', re.DOTALL)
+LINE_COMMENTS = re.compile(r'\A(?:\s*(?://|#)(?!!).*\n)+')
+JS_DECLARATION = re.compile(
+    r'^\s*(?:export\s+(?:default\s+)?)?(?:async\s+)?(?:function\*?|class|const|let)\s+([A-Za-z_$][\w$]*)', re.MULTILINE)
+GO_DECLARATION = re.compile(r'^func\s+(?:\([^)]*\)\s*)?([A-Za-z_]\w*)', re.MULTILINE)
+PY_DECLARATION = re.compile(r'^(?:async\s+)?(?:def|class)\s+([A-Za-z_]\w*)', re.MULTILINE)
+
+
+class HeuristicSummarizer:
+    """
+    LLM-free stand-in for RepoSummarizer: builds the same summaries dict from the README,
+    manifests, entry points and file docstrings, in milliseconds and deterministically.
+    """
+
+    def __init__(self, max_names=8):
+        self.max_names = max_names  # Functions/classes listed per file
+
+    def generate_summaries(self, repo_data, on_section=None, on_token=None):
+        """Generate every summary section locally; on_token is accepted for compatibility and never called"""
+        notify = on_section or (lambda key, value: None)
+        summaries = {}
+
+        summaries['project_overview'] = self._project_overview(repo_data)
+        notify('project_overview', summaries['project_overview'])
+
+        summaries['tech_stack_explanation'] = self._tech_stack(repo_data)
+        notify('tech_stack_explanation', summaries['tech_stack_explanation'])
+
+        summaries['installation_guide'] = self._installation_guide(repo_data)
+        notify('installation_guide', summaries['installation_guide'])
+
+        summaries['file_explanations'] = {}
+        outlines = repo_data.get('outlines', {})
+        for file_path, content in repo_data['file_contents'].items():
+            if len(content) > 100:
+                explanation = self._explain_file(file_path, content, outlines.get(file_path))
+                summaries['file_explanations'][file_path] = explanation
+                notify('file_explanations', {file_path: summaries['file_explanations'][file_path]})
+        summaries['file_cache_stats'] = {'reused': 0, 'regenerated': 0}
+
+        summaries['structure_explanation'] = self._structure(repo_data)
+        notify('structure_explanation', summaries['structure_explanation'])
+
+        summaries['prompt_tokens'] = {'sections': {}, 'files': {}, 'batches': {}, 'total': 0}
+        summaries['timings'] = {}  # No LLM to wait on
+        return summaries
+
+    def _project_overview(self, repo_data):
+        """First prose paragraph of the README, followed by what the repository is made of"""
+        overview = []
+        paragraph = self._first_paragraph(self._readme(repo_data))
+        if paragraph:
+            overview.append(paragraph)
+
+        stats = repo_data['statistics']
+        tech = ', '.join(repo_data['tech_stack']) or 'no recognised technologies'
+        overview.append(f"**{repo_data['name']}** contains {stats['total_files']} files built with {tech}.")
+
+        entry_points = self._entry_points(repo_data)
+        if entry_points:
+            overview.append("Entry points: " + ', '.join(f"`{path}`" for path in entry_points) + ".")
+
+        return "\n\n".join(overview)
+
+    def _tech_stack(self, repo_data):
+        """Role of each detected technology and the main dependencies declared for it"""
+        if not repo_data['tech_stack']:
+            return "No technologies were detected."
+
+        lines = [f"- **{tech}**: {TECH_DESCRIPTIONS.get(tech, 'detected from the repository files')}"
+                 for tech in repo_data['tech_stack']]
+
+        runtime = {}
+        for manifest in repo_data.get('dependencies', []):
+            for item in manifest['dependencies']:
+                if item['scope'] == 'runtime':
+                    runtime.setdefault(manifest['ecosystem'], []).append(item['name'])
+        for ecosystem, names in runtime.items():
+            names = list(dict.fromkeys(names))
+            more = f" and {len(names) - self.max_names} more" if len(names) > self.max_names else ""
+            lines.append(f"- Main {ecosystem} dependencies: {', '.join(names[:self.max_names])}{more}")
+
+        return "\n".join(lines)
+
+    def _installation_guide(self, repo_data):
+        """The README's installation section if it has one, otherwise steps derived from the manifests"""
+        section = self._readme_section(self._readme(repo_data), INSTALL_HEADING)
+        if section:
+            return section
+
+        steps = []
+        names = {os.path.basename(path) for path in repo_data['key_files']}
+        names.update(os.path.basename(manifest['path']) for manifest in repo_data.get('dependencies', []))
+        for name, command in INSTALL_COMMANDS.items():
+            if name in names:
+                steps.append(f"Install dependencies: `{command}`")
+        if 'Dockerfile' in names:
+            steps.append(f"Or build the container: `docker build -t {repo_data['name'].lower()} .`")
+
+        for path in self._entry_points(repo_data):
+            command = self._run_command(path, repo_data)
+            if command:
+                steps.append(f"Run: `{command}`")
+                break
+
+        if not steps:
+            return "No installation instructions could be derived from the repository."
+        return "\n".join(f"{i}. {step}" for i, step in enumerate(["Clone the repository"] + steps, 1))
+
+    def _structure(self, repo_data):
+        """Top-level directories with the role their names usually imply"""
+        lines = []
+        tree = DirectoryTree.from_dict(repo_data['structure'])
+        for index in tree.children(0):
+            if not tree.is_dir(index):
+                continue
+            directory = tree.names[index]
+            role = DIRECTORY_ROLES.get(directory.lower())
+            lines.append(f"- `{directory}/`: {role}" if role else f"- `{directory}/`")
+
+        if not lines:
+            return "All files are at the top level of the repository."
+        return "Top-level directories:\n\n" + "\n".join(lines)
+
+    def _explain_file(self, file_path, content, outline=None):
+        """
+        Describe a file from its docstring or leading comment and its top-level declarations,
+        taken from the file's outline when it has one since content is only the start of the file
+        """
+        name = os.path.basename(file_path)
+        extension = os.path.splitext(name)[1].lower()
+
+        if name == 'package.json':
+            return self._describe_package_json(content)
+        if extension in ('.md', '.rst', '.txt') and 'readme' in name.lower():
+            return self._first_paragraph(content) or "Project README."
+        if name.startswith('requirements') and extension == '.txt':
+            packages = [line.split('#')[0].strip() for line in content.splitlines()]
+            packages = [package for package in packages if package and not package.startswith('-')]
+            return f"Python dependency list with {len(packages)} packages: {', '.join(packages[:self.max_names])}."
+
+        if extension == '.py':
+            summary, names = self._describe_python(content)
+        else:
+            summary = self._leading_comment(content)
+            pattern = GO_DECLARATION if extension == '.go' else JS_DECLARATION
+            names = pattern.findall(content)
+        if outline is not None:
+            summary = summary or outline['doc']
+            names = outline_symbol_names(outline)
+
+        parts = [summary] if summary else []
+        if names:
+            names = list(dict.fromkeys(names))
+            more = f" and {len(names) - self.max_names} more" if len(names) > self.max_names else ""
+            parts.append("Defines " + ', '.join(f"`{n}`" for n in names[:self.max_names]) + more + ".")
+        if "__name__ == '__main__'" in content or '__name__ == "__main__"' in content:
+            parts.append("Can be run directly as a script.")
+        return "\n\n".join(parts) or f"`{name}` has no docstring or leading comment."
+
+    def _describe_python(self, content):
+        """Module docstring and top-level function/class names, tolerating truncated source"""
+        try:
+            tree = ast.parse(content)
+        except (SyntaxError, ValueError):
+            # The parser keeps only the start of each file, which may cut a statement in half
+            return self._leading_comment(content), PY_DECLARATION.findall(content)
+
+        names = [node.name for node in tree.body
+                 if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))]
+        docstring = ast.get_docstring(tree)
+        return (self._first_paragraph(docstring) if docstring else self._leading_comment(content)), names
+
+    def _describe_package_json(self, content):
+        try:
+            data = json.loads(content)
+        except ValueError:
+            return "npm package manifest."
+
+        parts = [f"npm package manifest for `{data['name']}`." if data.get('name') else "npm package manifest."]
+        if data.get('description'):
+            parts.append(data['description'])
+        if data.get('scripts'):
+            parts.append("Scripts: " + ', '.join(f"`{name}`" for name in list(data['scripts'])[:self.max_names]) + ".")
+        count = len(data.get('dependencies') or {}) + len(data.get('devDependencies') or {})
+        parts.append(f"Declares {count} dependencies.")
+        return " ".join(parts)
+
+    def _leading_comment(self, content):
+        """Text of a /* */ block or run of // or # lines at the top of a file"""
+        match = BLOCK_COMMENT.match(content) or LINE_COMMENTS.match(content)
+        if not match:
+            return ""
+        text = match.group(1) if match.re is BLOCK_COMMENT else match.group(0)
+        lines = [re.sub(r'^\s*(?://+|#+|\*+)\s?', '', line).strip() for line in text.splitlines()]
+        return self._first_paragraph("\n".join(lines))
+
+    def _first_paragraph(self, text):
+        """First paragraph of prose, skipping headings, badges, HTML and code"""
+        paragraph = []
+        in_code = False
+        for line in (text or "").splitlines():
+            stripped = line.strip()
+            if stripped.startswith('```'):
+                in_code = not in_code
+                continue
+            if in_code:
+                continue
+            # Italic-only lines are usually bylines or timestamps rather than a description
+            skip = (not stripped or stripped.startswith(('#', '<', '![', '[![', '|', '---', '===')) or
+                    re.fullmatch(r'[\W_]+|\*[^*].*\*|_[^_].*_', stripped))
+            if skip:
+                if paragraph:
+                    break
+                continue
+            paragraph.append(stripped)
+        return " ".join(paragraph)
+
+    def _readme_section(self, readme, heading_pattern):
+        """Body of the first Markdown section whose heading matches, up to the next heading of its level"""
+        lines = readme.splitlines()
+        for i, line in enumerate(lines):
+            match = MARKDOWN_HEADING.match(line)
+            if not match or not heading_pattern.search(match.group(2)):
+                continue
+
+            level = len(match.group(1))
+            body = []
+            for following in lines[i + 1:]:
+                heading = MARKDOWN_HEADING.match(following)
+                if heading and len(heading.group(1)) <= level:
+                    break
+                body.append(following)
+            return "\n".join(body).strip()
+        return ""
+
+    def _readme(self, repo_data):
+        for file_path, content in repo_data['file_contents'].items():
+            if 'readme' in file_path.lower():
+                return content
+        return ""
+
+    def _entry_points(self, repo_data):
+        """Key files that start the application, shallowest first"""
+        paths = [path for path in repo_data['key_files'] if os.path.basename(path) in ENTRY_POINT_NAMES]
+        return sorted(paths, key=lambda path: (path.count(os.sep), path))
+
+    def _run_command(self, path, repo_data):
+        name = os.path.basename(path)
+        if name.endswith('.py'):
+            return f"python {path}"
+        if name.endswith('.go'):
+            # cmd/<name>/main.go layouts build the package in that directory, not the module root
+            directory = os.path.dirname(path).replace(os.sep, '/')
+            return f"go run ./{directory}" if directory else "go run ."
+        if name.endswith('.rs'):
+            return "cargo run"
+        if name.endswith('.js'):
+            return f"node {path}"
+        if 'package.json' in repo_data['file_contents'] or 'package.json' in repo_data['key_files']:
+            return "npm start"
+        return None
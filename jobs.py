@@ -0,0 +1,198 @@
+import time
+import uuid
+import bisect
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+class Job:
+    """A queued analysis with per-stage progress and timing"""
+
+    def __init__(self, key, stages, max_events=5000):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = 'queued'
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.stages = {name: {'status': 'pending', 'duration': None} for name in stages}
+        self._lock = threading.Lock()
+
+        # Ordered (seq, event, data) log replayed to every stream subscriber
+        self.events = []
+        self.max_events = max_events
+        self._next_seq = 0
+        self._closed = False
+        self.subscribers = 0  # Streams currently reading the event log
+        self._events_changed = threading.Condition()
+
+    @contextmanager
+    def stage(self, name):
+        """Record the status and duration of one pipeline stage"""
+        with self._lock:
+            self.stages.setdefault(name, {'status': 'pending', 'duration': None})
+            self.stages[name]['status'] = 'running'
+        self.publish('stage', {'name': name, 'status': 'running'})
+        start = time.perf_counter()
+
+        try:
+            yield
+        except Exception:
+            self._finish_stage(name, 'failed', start)
+            raise
+        self._finish_stage(name, 'completed', start)
+
+    def _finish_stage(self, name, status, start):
+        with self._lock:
+            self.stages[name]['status'] = status
+            self.stages[name]['duration'] = round(time.perf_counter() - start, 3)
+        self.publish('stage', {'name': name, **self.stages[name]})
+
+    def publish(self, event, data):
+        """Append an event for stream subscribers"""
+        with self._events_changed:
+            if event == 'section':
+                # The published section supersedes the tokens streamed while it was generated
+                self.events = [item for item in self.events
+                               if not (item[1] == 'token' and item[2].get('name') == data.get('name'))]
+            self.events.append((self._next_seq, event, data))
+            self._next_seq += 1
+            self._trim_events()
+            self._events_changed.notify_all()
+
+    def _trim_events(self):
+        """Keep the log within max_events, dropping the oldest tokens before other events"""
+        overflow = len(self.events) - self.max_events
+        if overflow <= 0:
+            return
+
+        kept = []
+        for item in self.events:
+            if overflow > 0 and item[1] == 'token':
+                overflow -= 1
+            else:
+                kept.append(item)
+        self.events = kept[overflow:] if overflow > 0 else kept
+
+    def close(self):
+        """Mark the event log complete so streams can finish"""
+        with self._events_changed:
+            self._closed = True
+            self._events_changed.notify_all()
+
+    def iter_events(self, heartbeat=15):
+        """
+        Yield (event, data) pairs from the start of the log until the job is closed.
+        Yields None after heartbeat seconds without events so callers can keep connections alive.
+        """
+        with self._events_changed:
+            self.subscribers += 1
+        try:
+            next_seq = 0  # Events may be dropped from the log, so track sequence numbers rather than positions
+            while True:
+                with self._events_changed:
+                    if next_seq >= self._next_seq and not self._closed:
+                        self._events_changed.wait(heartbeat)
+                    pending = self.events[bisect.bisect_left(self.events, (next_seq,)):]
+                    next_seq = self._next_seq
+                    closed = self._closed
+
+                for _, event, data in pending:
+                    yield event, data
+
+                if closed:
+                    return
+                if not pending:
+                    yield None
+        finally:
+            with self._events_changed:
+                self.subscribers -= 1
+
+    @property
+    def done(self):
+        return self.status in ('completed', 'failed')
+
+    def to_dict(self):
+        """Serialize the job status for the /jobs endpoint"""
+        with self._lock:
+            stages = [{'name': name, **info} for name, info in self.stages.items()]
+
+        completed = sum(1 for stage in stages if stage['status'] == 'completed')
+        current = next((stage['name'] for stage in stages if stage['status'] == 'running'), None)
+        end = self.finished_at or time.time()
+
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'stage': current,
+            'progress': round(completed / len(stages), 2) if stages else 0,
+            'stages': stages,
+            'queued_for': round((self.started_at or end) - self.created_at, 3),
+            'elapsed': round(end - self.started_at, 3) if self.started_at else 0,
+            'error': self.error
+        }
+
+
+class JobQueue:
+    """Bounded worker pool that runs jobs and coalesces duplicate submissions"""
+
+    def __init__(self, max_workers=2, stages=(), retention=3600, max_events=5000):
+        self.stages = list(stages)
+        self.retention = retention  # Seconds a finished job stays pollable
+        self.max_events = max_events  # Events kept per job for stream subscribers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='analysis')
+        self._jobs = {}
+        self._active = {}  # key -> job, for queued or running jobs
+        self._lock = threading.Lock()
+
+    def submit(self, key, func, *args):
+        """
+        Queue func(job, *args) unless a job with the same key is already pending.
+        Returns (job, created).
+        """
+        with self._lock:
+            self._prune()
+
+            job = self._active.get(key)
+            if job is not None:
+                return job, False
+
+            job = Job(key, self.stages, self.max_events)
+            self._jobs[job.id] = job
+            self._active[key] = job
+
+        self._executor.submit(self._run, job, func, args)
+        return job, True
+
+    def get(self, job_id):
+        """Return a job by ID, or None if unknown or expired"""
+        with self._lock:
+            self._prune()
+            return self._jobs.get(job_id)
+
+    def _run(self, job, func, args):
+        job.status = 'running'
+        job.started_at = time.time()
+
+        try:
+            job.result = func(job, *args)
+            job.status = 'completed'
+        except Exception as e:
+            job.error = str(e)
+            job.status = 'failed'
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                if self._active.get(job.key) is job:
+                    del self._active[job.key]
+            job.close()
+
+    def _prune(self):
+        """Forget finished jobs older than the retention period"""
+        cutoff = time.time() - self.retention
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.done and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
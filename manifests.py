@@ -0,0 +1,243 @@
+import os
+import re
+import json
+import xml.etree.ElementTree as ET
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+# Manifests larger than this are not parsed
+MAX_MANIFEST_BYTES = 1024 * 1024
+
+# Optional dependency groups treated as development-only
+DEV_GROUPS = {'dev', 'develop', 'development', 'test', 'tests', 'testing', 'lint', 'docs', 'doc', 'typing'}
+
+REQUIREMENT_PATTERN = re.compile(r'^\s*([A-Za-z0-9][A-Za-z0-9._-]*)\s*(?:\[[^\]]*\])?\s*([^;#]*)')
+GO_REQUIRE_PATTERN = re.compile(r'^\s*(?:require\s+)?([^\s()]+)\s+(v[^\s]+)')
+GRADLE_DEPENDENCY_PATTERN = re.compile(
+    r'''\b(\w+)\s*\(?\s*['"]([^'":\s]+):([^'":\s]+)(?::([^'"\s]+))?['"]'''
+)
+# Dependency scopes: 'runtime' ships with the project, 'build' is needed only to compile it, 'dev' only to develop it
+GRADLE_CONFIGURATIONS = {
+    'implementation': 'runtime', 'api': 'runtime', 'compile': 'runtime', 'runtimeOnly': 'runtime',
+    'compileOnly': 'build', 'annotationProcessor': 'build', 'kapt': 'build',
+    'testImplementation': 'dev', 'testCompile': 'dev', 'testRuntimeOnly': 'dev',
+    'testCompileOnly': 'dev', 'androidTestImplementation': 'dev', 'testAnnotationProcessor': 'dev'
+}
+
+
+def normalize_python_name(name):
+    """Canonical PyPI project name (PEP 503)"""
+    return re.sub(r'[-_.]+', '-', name).lower()
+
+
+def dependency(name, version, scope, ecosystem):
+    return {'name': name, 'version': version or '*', 'scope': scope, 'ecosystem': ecosystem}
+
+
+def parse_requirement(line, scope):
+    """Parse one PEP 508 requirement string, or return None for options, URLs and blanks"""
+    line = line.strip()
+    if not line or line.startswith(('#', '-', 'git+', 'http://', 'https://')):
+        return None
+    match = REQUIREMENT_PATTERN.match(line)
+    if not match:
+        return None
+    return dependency(normalize_python_name(match.group(1)), match.group(2).strip(), scope, 'pypi')
+
+
+def parse_requirements_txt(content, file_name):
+    # requirements-dev.txt, dev-requirements.txt and the like; directories such as docs/ or tests/ say nothing
+    name_parts = re.split(r'[-_.]', os.path.basename(file_name).lower())
+    scope = 'dev' if any(group in name_parts for group in DEV_GROUPS) else 'runtime'
+    dependencies = []
+    for line in content.splitlines():
+        requirement = parse_requirement(line, scope)
+        if requirement:
+            dependencies.append(requirement)
+    return dependencies
+
+
+def parse_pyproject_toml(content, file_name):
+    if tomllib is None:
+        return []
+    data = tomllib.loads(content)
+    dependencies = []
+
+    project = data.get('project', {})
+    for line in project.get('dependencies', []):
+        dependencies.append(parse_requirement(line, 'runtime'))
+    for group, lines in project.get('optional-dependencies', {}).items():
+        for line in lines:
+            dependencies.append(parse_requirement(line, 'dev' if group.lower() in DEV_GROUPS else 'runtime'))
+
+    poetry = data.get('tool', {}).get('poetry', {})
+    groups = [('runtime', poetry.get('dependencies', {})), ('dev', poetry.get('dev-dependencies', {}))]
+    groups += [('dev' if name.lower() in DEV_GROUPS else 'runtime', group.get('dependencies', {}))
+               for name, group in poetry.get('group', {}).items()]
+    for scope, table in groups:
+        for name, spec in table.items():
+            if name.lower() == 'python':
+                continue
+            version = spec.get('version') if isinstance(spec, dict) else spec
+            dependencies.append(dependency(normalize_python_name(name), version, scope, 'pypi'))
+
+    return [item for item in dependencies if item]
+
+
+def parse_package_json(content, file_name):
+    data = json.loads(content)
+    dependencies = []
+    for key, scope in (('dependencies', 'runtime'), ('peerDependencies', 'runtime'),
+                       ('optionalDependencies', 'runtime'), ('devDependencies', 'dev')):
+        for name, version in (data.get(key) or {}).items():
+            dependencies.append(dependency(name, version, scope, 'npm'))
+    return dependencies
+
+
+def parse_go_mod(content, file_name):
+    dependencies = []
+    in_require = False
+    for line in content.splitlines():
+        stripped = line.split('//')[0].strip()
+        if stripped.startswith('require ('):
+            in_require = True
+            continue
+        if in_require and stripped == ')':
+            in_require = False
+            continue
+        if in_require or stripped.startswith('require '):
+            match = GO_REQUIRE_PATTERN.match(stripped)
+            if match:
+                dependencies.append(dependency(match.group(1), match.group(2), 'runtime', 'go'))
+    return dependencies
+
+
+def parse_cargo_toml(content, file_name):
+    if tomllib is None:
+        return []
+    data = tomllib.loads(content)
+    dependencies = []
+    tables = [('runtime', data.get('dependencies', {})), ('build', data.get('build-dependencies', {})),
+              ('dev', data.get('dev-dependencies', {})),
+              ('runtime', data.get('workspace', {}).get('dependencies', {}))]
+    for scope, table in tables:
+        for name, spec in table.items():
+            if isinstance(spec, dict):
+                version = 'workspace' if spec.get('workspace') else spec.get('version')
+            else:
+                version = spec
+            dependencies.append(dependency(name, version, scope, 'cargo'))
+    return dependencies
+
+
+def parse_pom_xml(content, file_name):
+    root = ET.fromstring(content)
+    namespace = root.tag[:root.tag.index('}') + 1] if root.tag.startswith('{') else ''
+    dependencies = []
+    # Direct and dependencyManagement dependencies; plugins are build tooling, not dependencies
+    plugin_dependencies = {id(node) for plugin in root.iter(f'{namespace}plugin')
+                           for node in plugin.iter(f'{namespace}dependency')}
+    for node in root.iter(f'{namespace}dependency'):
+        if id(node) in plugin_dependencies:
+            continue
+        group = node.findtext(f'{namespace}groupId', '').strip()
+        artifact = node.findtext(f'{namespace}artifactId', '').strip()
+        if not artifact:
+            continue
+        scope = 'dev' if node.findtext(f'{namespace}scope', '').strip() == 'test' else 'runtime'
+        dependencies.append(dependency(f'{group}:{artifact}', node.findtext(f'{namespace}version', '').strip(),
+                                       scope, 'maven'))
+    return dependencies
+
+
+def parse_build_gradle(content, file_name):
+    dependencies = []
+    for configuration, group, artifact, version in GRADLE_DEPENDENCY_PATTERN.findall(content):
+        if configuration in GRADLE_CONFIGURATIONS:
+            dependencies.append(dependency(f'{group}:{artifact}', version, GRADLE_CONFIGURATIONS[configuration], 'maven'))
+    return dependencies
+
+
+# Manifest file name -> parser(content, file name) returning dependency dicts
+MANIFEST_PARSERS = {
+    'requirements.txt': parse_requirements_txt,
+    'pyproject.toml': parse_pyproject_toml,
+    'package.json': parse_package_json,
+    'go.mod': parse_go_mod,
+    'Cargo.toml': parse_cargo_toml,
+    'pom.xml': parse_pom_xml,
+    'build.gradle': parse_build_gradle,
+    'build.gradle.kts': parse_build_gradle,
+}
+
+REQUIREMENTS_FILE_PATTERN = re.compile(r'(?:.*[-_])?requirements(?:[-_].*)?\.txt$')
+
+
+def manifest_parser(file_name):
+    """Return the parser for a manifest file name, or None if it is not a manifest"""
+    if file_name in MANIFEST_PARSERS:
+        return MANIFEST_PARSERS[file_name]
+    if REQUIREMENTS_FILE_PATTERN.match(file_name):
+        return parse_requirements_txt
+    return None
+
+
+def extract_dependencies(file_index):
+    """
+    Parse every manifest in the file index, one entry per manifest (so every
+    workspace of a monorepo is listed): {'path', 'ecosystem', 'dependencies'}.
+    """
+    manifests = []
+    for entry in file_index:
+        parser = manifest_parser(entry.name)
+        if parser is None or entry.size is None or entry.size > MAX_MANIFEST_BYTES:
+            continue
+        # Build output of Java/Rust projects carries copies of the real manifests
+        if 'target' in entry.relative_path.split(os.sep)[:-1]:
+            continue
+
+        try:
+            with open(entry.path, 'r', encoding='utf-8', errors='ignore') as f:
+                dependencies = parser(f.read(), entry.relative_path)
+        except Exception:
+            continue  # A malformed manifest contributes nothing rather than failing the analysis
+
+        if dependencies:
+            manifests.append({
+                'path': entry.relative_path,
+                'ecosystem': dependencies[0]['ecosystem'],
+                'dependencies': dependencies
+            })
+
+    return manifests
+
+
+def declared_dependency_names(manifests):
+    """Map each ecosystem to the set of dependency names declared anywhere in the repository"""
+    names = {}
+    for manifest in manifests:
+        for item in manifest['dependencies']:
+            names.setdefault(item['ecosystem'], set()).add(item['name'])
+    return names
+
+
+def format_dependency_summary(manifests, max_per_scope=25):
+    """Compact text listing of each manifest's dependencies for LLM prompts"""
+    lines = []
+    for manifest in manifests:
+        lines.append(f"{manifest['path']} ({manifest['ecosystem']}):")
+        for scope in ('runtime', 'build', 'dev'):
+            items = [item for item in manifest['dependencies'] if item['scope'] == scope]
+            if not items:
+                continue
+            listed = ', '.join(f"{item['name']} {item['version']}" if item['version'] != '*' else item['name']
+                               for item in items[:max_per_scope])
+            more = f" (+{len(items) - max_per_scope} more)" if len(items) > max_per_scope else ""
+            lines.append(f"  {scope}: {listed}{more}")
+    return "\n".join(lines)
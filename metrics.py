@@ -0,0 +1,135 @@
+import time
+import threading
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds in seconds, from a cached file read to a slow clone
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+class Metric:
+    """Base of the process-wide metrics, each a set of samples keyed by label values"""
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _label_values(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _format_labels(self, values, extra=()):
+        pairs = list(zip(self.labelnames, values)) + list(extra)
+        if not pairs:
+            return ''
+        escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+        return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            lines += self._render_samples()
+        return lines
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._label_values(labels), 0)
+
+    def _render_samples(self):
+        return [f"{self.name}{self._format_labels(key)} {value:g}" for key, value in sorted(self._values.items())]
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DURATION_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}  # label values -> [per-bucket counts, sum, count]
+
+    def observe(self, value, **labels):
+        key = self._label_values(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key) or ([0] * len(self.buckets), 0, 0)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            self._values[key] = (counts, total + value, count + 1)
+
+    def _render_samples(self):
+        lines = []
+        for key, (counts, total, count) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{self._format_labels(key, [('le', f'{bound:g}')])} {cumulative}")
+            lines.append(f"{self.name}_bucket{self._format_labels(key, [('le', '+Inf')])} {count}")
+            lines.append(f"{self.name}_sum{self._format_labels(key)} {total:g}")
+            lines.append(f"{self.name}_count{self._format_labels(key)} {count}")
+        return lines
+
+
+REGISTRY = []
+
+STAGE_SECONDS = Histogram('analyzer_stage_duration_seconds', 'Time spent in each pipeline stage', ['stage'])
+FILES_SCANNED = Counter('analyzer_files_scanned_total', 'Files indexed by repository scans')
+BYTES_READ = Counter('analyzer_bytes_read_total', 'Bytes of repository files read', ['stage'])
+LLM_CALLS = Counter('analyzer_llm_calls_total', 'LLM calls made, by prompt kind', ['kind'])
+LLM_TOKENS = Counter('analyzer_llm_tokens_total', 'LLM tokens sent and received', ['direction'])
+LLM_CACHE_REQUESTS = Counter('analyzer_llm_cache_requests_total', 'LLM response cache lookups', ['result'])
+OUTLINE_CACHE_REQUESTS = Counter('analyzer_outline_cache_requests_total', 'Source outline cache lookups', ['result'])
+
+
+def render_metrics():
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in REGISTRY:
+        lines += metric.render()
+    return "\n".join(lines) + "\n"
+
+
+class StageTimer:
+    """
+    Per-analysis stage durations, also observed in STAGE_SECONDS. Stages timed
+    more than once (e.g. concurrent LLM calls) add up.
+    """
+
+    def __init__(self):
+        self.timings = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        STAGE_SECONDS.observe(seconds, stage=name)
+        with self._lock:
+            self.timings[name] = self.timings.get(name, 0) + seconds
+
+    def report(self):
+        """Stage durations in seconds, rounded for display"""
+        with self._lock:
+            return {name: round(seconds, 4) for name, seconds in self.timings.items()}
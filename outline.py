@@ -0,0 +1,430 @@
+import os
+import re
+import ast
+import json
+import hashlib
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from analyzer.llm_cache import LLMCache
+
+# Bumped whenever extraction changes, so cached outlines of older versions are not reused
+OUTLINE_VERSION = 1
+
+# Extension -> language of the files outlined
+OUTLINE_LANGUAGES = {
+    '.py': 'Python',
+    '.js': 'JavaScript', '.jsx': 'JavaScript', '.mjs': 'JavaScript', '.cjs': 'JavaScript',
+    '.ts': 'TypeScript', '.tsx': 'TypeScript',
+    '.go': 'Go',
+    '.java': 'Java',
+}
+
+MAX_SYMBOLS = 200  # Symbols kept per file, members included
+MAX_DOC_CHARS = 120  # Docstrings are cut to their first sentence and at most this long
+BATCH_SIZE = 64  # Files sent to a worker process at a time
+
+# Leading bytes checked for NUL to tell binary files from text
+BINARY_SNIFF_BYTES = 1024
+
+STRING_OR_COMMENT = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|`(?:\\.|[^`\\])*`|/\*.*?\*/|//.*')
+SENTENCE = re.compile(r'(.+?[.!?])(?:\s|$)')
+LICENSE_HEADER = re.compile(r'copyright|licen[cs]ed?\b|spdx-license', re.IGNORECASE)
+COMMENT_TEXT = re.compile(r'^\s*(?:/\*+|\*+/?|//+)\s?|\s*\*+/\s*$')
+CONTROL_KEYWORDS = {'if', 'for', 'while', 'switch', 'catch', 'return', 'new', 'else', 'do', 'try',
+                    'synchronized', 'throw', 'super', 'this', 'function'}
+
+JS_IMPORT = re.compile(r'''\bfrom\s+['"]([^'"]+)['"]|^\s*import\s+['"]([^'"]+)['"]'''
+                       r'''|\b(?:require|import)\(\s*['"]([^'"]+)['"]\s*\)''', re.MULTILINE)
+JS_FUNCTION = re.compile(r'^(?:export\s+(?:default\s+)?)?(?:declare\s+)?(?:async\s+)?function\s*\*?\s*'
+                         r'([A-Za-z_$][\w$]*)\s*(?:<[^>]*>)?\s*(\([^)]*\)?)')
+JS_ARROW = re.compile(r'^(?:export\s+)?(?:const|let|var)\s+([A-Za-z_$][\w$]*)\s*(?::[^=]+)?=\s*'
+                      r'(?:async\s+)?(?:function\b[^(]*(\([^)]*\)?)|(\([^)]*\)|[A-Za-z_$][\w$]*)\s*(?::[^=]+)?=>)')
+JS_CLASS = re.compile(r'^(?:export\s+(?:default\s+)?)?(?:declare\s+)?(?:abstract\s+)?'
+                      r'(class|interface|enum)\s+([A-Za-z_$][\w$]*)([^{]*)')
+JS_TYPE = re.compile(r'^(?:export\s+)?(?:declare\s+)?type\s+([A-Za-z_$][\w$]*)')
+JS_METHOD = re.compile(r'^(?:(?:public|private|protected|static|async|readonly|override|abstract|get|set)\s+)*'
+                       r'\*?\s*(#?[A-Za-z_$][\w$]*)\s*(?:<[^>]*>)?\s*(?:\(|=\s*(?:async\s+)?'
+                       r'(?:\([^)]*\)|[A-Za-z_$][\w$]*)\s*(?::[^=]+)?=>)')
+
+GO_IMPORT = re.compile(r'^\s*(?:import\s+)?(?:[A-Za-z_.]\w*\s+)?"([^"]+)"')
+GO_FUNCTION = re.compile(r'^func\s+(?:\(\s*(?:\w+\s+)?\*?\s*([A-Za-z_]\w*)[^)]*\)\s*)?([A-Za-z_]\w*)\s*'
+                         r'(?:\[[^\]]*\]\s*)?(\([^)]*\)?)')
+GO_TYPE = re.compile(r'^type\s+([A-Za-z_]\w*)\s*(?:\[[^\]]*\]\s*)?(struct|interface|[^{=]*)')
+
+JAVA_IMPORT = re.compile(r'^\s*import\s+(?:static\s+)?([\w.]+(?:\.\*)?)\s*;', re.MULTILINE)
+JAVA_CLASS = re.compile(r'^(?:@\w+(?:\([^)]*\))?\s*)*(?:(?:public|protected|private|abstract|final|static|sealed|'
+                        r'non-sealed|strictfp)\s+)*(class|interface|enum|record|@interface)\s+([A-Za-z_]\w*)([^{]*)')
+JAVA_METHOD = re.compile(r'^(?:@\w+(?:\([^)]*\))?\s*)*(?:(?:public|protected|private|abstract|final|static|'
+                         r'synchronized|native|default|strictfp)\s+)*(?:<[^>]*>\s*)?'
+                         r'(?:[\w.$]+(?:<[^()]*>)?(?:\[\])*\s+)?([A-Za-z_]\w*)\s*(\([^)]*\)?)')
+
+
+def outline_language(file_name):
+    """Language outlined for a file name, or None"""
+    return OUTLINE_LANGUAGES.get(os.path.splitext(file_name)[1].lower())
+
+
+def extract_outline(file_name, content):
+    """
+    Outline of one file's source (imports, classes, functions and their docstrings), or None
+    for languages without an extractor. Python is read with ast; the other languages with
+    line-based extractors that track brace depth, so they never fail on code they do not
+    fully understand. E.g. {'language': 'Python', 'lines': 120, 'doc': '...', 'imports': [...],
+    'symbols': [{'kind', 'name', 'signature', 'doc', 'line', 'members'}]}
+    """
+    language = outline_language(file_name)
+    if language is None:
+        return None
+
+    if language == 'Python':
+        outline = _python_outline(content)
+    elif language == 'Go':
+        outline = _brace_outline(content, _go_declaration, _go_imports(content))
+    elif language == 'Java':
+        outline = _brace_outline(content, _java_declaration, JAVA_IMPORT.findall(content))
+    else:
+        imports = [''.join(groups) for groups in JS_IMPORT.findall(content)]
+        outline = _brace_outline(content, _js_declaration, imports)
+
+    outline['imports'] = list(dict.fromkeys(outline['imports']))
+    _limit_symbols(outline['symbols'], MAX_SYMBOLS)
+    return {'language': language, 'lines': content.count('\n') + 1, **outline}
+
+
+def _first_sentence(text):
+    """First sentence of a docstring or comment, on one line and at most MAX_DOC_CHARS long"""
+    if not text:
+        return ''
+    paragraph = ' '.join(text.strip().split('\n\n')[0].split())
+    match = SENTENCE.match(paragraph)
+    sentence = match.group(1) if match else paragraph
+    return sentence if len(sentence) <= MAX_DOC_CHARS else sentence[:MAX_DOC_CHARS - 3].rstrip() + '...'
+
+
+def _limit_symbols(symbols, limit):
+    """Drop symbols past the limit, counting members, so huge generated files stay small"""
+    kept = 0
+    for position, symbol in enumerate(symbols):
+        if kept >= limit:
+            del symbols[position:]
+            return
+        kept += 1
+        members = symbol.get('members')
+        if members:
+            del members[max(limit - kept, 0):]
+            kept += len(members)
+
+
+def _python_outline(content):
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return _python_fallback(content)
+
+    imports = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            imports.append('.' * node.level + (node.module or ''))
+
+    return {
+        'doc': _first_sentence(ast.get_docstring(tree)),
+        'imports': imports,
+        'symbols': [_python_symbol(node, members=True) for node in tree.body
+                    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))]
+    }
+
+
+def _python_symbol(node, members=False):
+    if isinstance(node, ast.ClassDef):
+        bases = ', '.join(ast.unparse(base) for base in node.bases + node.keywords)
+        symbol = {'kind': 'class', 'name': node.name,
+                  'signature': f"class {node.name}({bases})" if bases else f"class {node.name}"}
+    else:
+        prefix = 'async def' if isinstance(node, ast.AsyncFunctionDef) else 'def'
+        returns = f" -> {ast.unparse(node.returns)}" if node.returns else ''
+        symbol = {'kind': 'function', 'name': node.name,
+                  'signature': f"{prefix} {node.name}({ast.unparse(node.args)}){returns}"}
+
+    symbol['doc'] = _first_sentence(ast.get_docstring(node))
+    symbol['line'] = node.lineno
+    if members and isinstance(node, ast.ClassDef):
+        symbol['members'] = [_python_symbol(child) for child in node.body
+                             if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef))]
+    return symbol
+
+
+def _python_fallback(content):
+    """Declarations found line by line, for files ast cannot parse (e.g. Python 2)"""
+    imports, symbols = [], []
+    for number, line in enumerate(content.splitlines(), 1):
+        match = re.match(r'(\s*)(?:async\s+)?(def|class)\s+([A-Za-z_]\w*)\s*(\([^)]*\)?)?', line)
+        if match:
+            indent, keyword, name, arguments = match.groups()
+            symbol = {'kind': 'class' if keyword == 'class' else 'function', 'name': name,
+                      'signature': f"{keyword} {name}{arguments or ''}", 'doc': '', 'line': number}
+            if not indent:
+                symbols.append(symbol)
+            elif symbols and symbols[-1]['kind'] == 'class' and keyword == 'def':
+                symbols[-1].setdefault('members', []).append(symbol)
+            continue
+        match = re.match(r'\s*(?:from\s+(\S+)\s+import|import\s+([\w.]+))', line)
+        if match:
+            imports.append(match.group(1) or match.group(2))
+    return {'doc': '', 'imports': imports, 'symbols': symbols}
+
+
+def _brace_outline(content, declaration, imports):
+    """
+    Outline of a C-like file. Strings and comments are blanked before brace depth is
+    counted, and only lines at depth 0 or directly inside a class body are passed to
+    declaration(line, in_class), which returns a symbol dict (with 'members' for
+    classes) or None. Comments directly above a declaration become its doc.
+    """
+    symbols = []
+    depth = 0
+    class_depth = None  # Depth of the body of the class collecting members
+    class_open = False  # Whether that body's brace has been seen yet
+    comment = []
+    in_block_comment = False
+    file_doc = None
+
+    for number, line in enumerate(content.splitlines(), 1):
+        stripped = line.strip()
+        if in_block_comment or stripped.startswith(('/*', '//')):
+            comment.append(COMMENT_TEXT.sub('', stripped))
+            in_block_comment = (in_block_comment or stripped.startswith('/*')) and '*/' not in stripped
+            continue
+        if file_doc is None:
+            # The header comment describes the file, unless it is a license notice
+            file_doc = '' if LICENSE_HEADER.search(' '.join(comment)) else _comment_doc(comment)
+        if not stripped:
+            comment = []
+            continue
+
+        code = STRING_OR_COMMENT.sub('""', line)
+        if '/*' in code:  # A block comment opened after code
+            code = code[:code.index('/*')]
+            in_block_comment = True
+
+        in_class = class_open and depth == class_depth
+        if (depth == 0 or in_class) and not stripped.startswith('@'):
+            symbol = declaration(stripped, in_class)
+            if symbol is not None:
+                symbol['doc'] = _comment_doc(comment)
+                symbol['line'] = number
+                if in_class:
+                    symbol.pop('members', None)  # Nested classes are listed without their members
+                    symbols[-1]['members'].append(symbol)
+                else:
+                    symbols.append(symbol)
+                    class_depth, class_open = (1, False) if 'members' in symbol else (None, False)
+        if not stripped.startswith('@'):
+            comment = []  # Annotations sit between a declaration and its doc comment
+
+        depth = max(depth + code.count('{') - code.count('}'), 0)
+        if class_depth is not None:
+            if depth >= class_depth:
+                class_open = True
+            elif class_open:
+                class_depth, class_open = None, False
+
+    return {'doc': file_doc or '', 'imports': imports, 'symbols': symbols}
+
+
+def _comment_doc(comment):
+    """First sentence of comment lines, leaving out tags such as @param"""
+    if not comment:
+        return ''
+    return _first_sentence(' '.join(text for text in comment if not text.startswith('@')))
+
+
+def _signature(text):
+    """A declaration line without its body, e.g. 'function load(path, options)'"""
+    return ' '.join(text.split('{')[0].rstrip(' =;').split())
+
+
+def _js_declaration(line, in_class):
+    if in_class:
+        match = JS_METHOD.match(line)
+        if match and match.group(1) not in CONTROL_KEYWORDS:
+            return {'kind': 'function', 'name': match.group(1), 'signature': _signature(line)}
+        return None
+
+    match = JS_CLASS.match(line)
+    if match:
+        return {'kind': match.group(1), 'name': match.group(2), 'signature': _signature(line), 'members': []}
+    match = JS_FUNCTION.match(line) or JS_ARROW.match(line)
+    if match:
+        return {'kind': 'function', 'name': match.group(1), 'signature': _signature(line)}
+    match = JS_TYPE.match(line)
+    if match:
+        return {'kind': 'type', 'name': match.group(1), 'signature': _signature(line)}
+    return None
+
+
+def _go_imports(content):
+    imports = []
+    for block in re.findall(r'^import\s*\((.*?)^\)', content, re.MULTILINE | re.DOTALL):
+        imports += [match.group(1) for match in map(GO_IMPORT.match, block.splitlines()) if match]
+    imports += re.findall(r'^import\s+(?:[A-Za-z_.]\w*\s+)?"([^"]+)"', content, re.MULTILINE)
+    return imports
+
+
+def _go_declaration(line, in_class):
+    match = GO_FUNCTION.match(line)
+    if match:
+        receiver, name = match.group(1), match.group(2)
+        return {'kind': 'function', 'name': f"{receiver}.{name}" if receiver else name,
+                'signature': _signature(line)}
+    match = GO_TYPE.match(line)
+    if match:
+        kind = match.group(2) if match.group(2) in ('struct', 'interface') else 'type'
+        return {'kind': kind, 'name': match.group(1), 'signature': _signature(line)}
+    return None
+
+
+def _java_declaration(line, in_class):
+    match = JAVA_CLASS.match(line)
+    if match:
+        return {'kind': match.group(1).lstrip('@'), 'name': match.group(2), 'signature': _signature(line),
+                'members': []}
+    if in_class:
+        match = JAVA_METHOD.match(line)
+        # Enum constants with arguments look like calls but end in a comma
+        if match and match.group(1) not in CONTROL_KEYWORDS and not line.endswith(','):
+            return {'kind': 'function', 'name': match.group(1), 'signature': _signature(line)}
+    return None
+
+
+def format_outline(file_path, outline, max_imports=10):
+    """Compact text form of an outline, one line per symbol, members indented"""
+    header = f"{file_path} ({outline['language']}, {outline['lines']} lines)"
+    lines = [f"{header}: {outline['doc']}" if outline['doc'] else header]
+    if outline['imports']:
+        more = f" +{len(outline['imports']) - max_imports}" if len(outline['imports']) > max_imports else ""
+        lines.append(f"  imports: {', '.join(outline['imports'][:max_imports])}{more}")
+    for symbol in outline['symbols']:
+        lines.append(_format_symbol(symbol, '  '))
+        lines += [_format_symbol(member, '    ') for member in symbol.get('members', ())]
+    return "\n".join(lines) + "\n"
+
+
+def _format_symbol(symbol, indent):
+    return f"{indent}{symbol['signature']}" + (f"  # {symbol['doc']}" if symbol['doc'] else "")
+
+
+def format_outlines(outlines):
+    """Outlines of several files, e.g. for a prompt; order is that of the dict"""
+    return "\n".join(format_outline(file_path, outline) for file_path, outline in outlines.items())
+
+
+def outline_symbol_names(outline):
+    """Names of an outline's top-level declarations"""
+    return [symbol['name'] for symbol in outline['symbols']]
+
+
+def outline_cache_key(language, blob_sha):
+    return f"outline:{OUTLINE_VERSION}:{language}:{blob_sha}"
+
+
+def outline_files(files):
+    """
+    Read and outline (relative_path, path) pairs, returning (relative_path, blob SHA,
+    outline, bytes read) tuples; unreadable and binary files get a None outline.
+    Module level so worker processes can run it.
+    """
+    results = []
+    for relative_path, path in files:
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            results.append((relative_path, None, None, 0))
+            continue
+
+        blob_sha = hashlib.sha1(b'blob %d\0' % len(data) + data).hexdigest()
+        if b'\0' in data[:BINARY_SNIFF_BYTES]:
+            results.append((relative_path, blob_sha, None, len(data)))
+            continue
+        outline = extract_outline(relative_path, data.decode('utf-8', errors='ignore'))
+        results.append((relative_path, blob_sha, outline, len(data)))
+    return results
+
+
+def extract_outlines(files, workers=1):
+    """
+    Outline (relative_path, path) pairs, in batches across a pool of worker processes
+    when there are enough files to repay starting them; workers=1 runs in this process.
+    """
+    files = list(files)
+    if workers <= 1 or len(files) <= BATCH_SIZE:
+        return outline_files(files)
+
+    batches = [files[start:start + BATCH_SIZE] for start in range(0, len(files), BATCH_SIZE)]
+    results = []
+    for batch_results in _get_pool(workers).map(outline_files, batches):
+        results += batch_results
+    return results
+
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers):
+    """Process pool kept for the life of the process; spawning workers costs more than outlining a small repository"""
+    global _pool, _pool_workers
+
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # spawn rather than fork: the web server's threads may hold locks at fork time
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            _pool_workers = workers
+        return _pool
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_outline_cache():
+    """
+    Return the process-wide outline cache configured from the environment, or None if
+    disabled. Entries are keyed by blob SHA, so they never go stale and have no TTL.
+    """
+    global _default_cache
+
+    if os.getenv('OUTLINE_CACHE_ENABLED', 'true').lower() in ('0', 'false', 'no'):
+        return None
+
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = LLMCache(
+                os.getenv('OUTLINE_CACHE_PATH', os.path.join('.cache', 'outline_cache.sqlite3')),
+                max_bytes=int(os.getenv('OUTLINE_CACHE_MAX_BYTES', str(50 * 1024 * 1024))),
+                ttl=0
+            )
+
+    return _default_cache
+
+
+def load_cached_outlines(cache, keys):
+    """{key: outline} of the keys found in the cache; a broken cache is treated as empty"""
+    try:
+        return {key: json.loads(value) for key, value in cache.get_many(keys).items()}
+    except Exception:
+        return {}
+
+
+def store_outlines(cache, outlines):
+    """Store {key: outline} in the cache, ignoring cache errors"""
+    try:
+        cache.set_many({key: json.dumps(outline) for key, outline in outlines.items()})
+    except Exception:
+        pass  # A broken cache must never fail the analysis
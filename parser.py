@@ -1,67 +1,225 @@
 import os
-import json
-from pathlib import Path
+import re
+import fnmatch
+import hashlib
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import git
+from analyzer.retrieval import chunk_files
+from analyzer.tech_stack import TechStackIndex, TECH_STACK_RULES
+from analyzer.manifests import extract_dependencies
+from analyzer.metrics import StageTimer, FILES_SCANNED, BYTES_READ, OUTLINE_CACHE_REQUESTS
+from analyzer.tree import DirectoryTree, DIRECTORY, ELIDED_DIRECTORY
+from analyzer.file_stats import compute_statistics, language_extensions
+from analyzer.outline import (extract_outlines, outline_language, outline_cache_key, get_outline_cache,
+                              load_cached_outlines, store_outlines)
+
+# One record per regular file seen by the repository scan
+FileEntry = namedtuple('FileEntry', ['path', 'relative_path', 'name', 'extension', 'size', 'depth', 'is_symlink'])
+
+# Directories never descended into when indexing files
+SKIPPED_DIRS = ['node_modules', '__pycache__', 'build', 'dist']
+
+# Hidden entries still shown in the folder structure
+VISIBLE_HIDDEN = ['.env', '.gitignore', '.github']
+
+# File name patterns whose content is read for the LLM, highest priority first
+IMPORTANT_FILE_PATTERNS = [
+    ['README.md', 'README.txt', 'README.rst'],
+    ['package.json', 'requirements.txt', 'setup.py'],
+    ['main.py', 'app.py', 'index.js', 'main.js', 'main.tsx', 'index.tsx', 'App.tsx']
+]
+
+# Leading bytes checked for NUL to tell binary files from text
+BINARY_SNIFF_BYTES = 1024
 
 class RepoParser:
-    def __init__(self):
-        self.tech_stack_indicators = {
-            'Python': ['.py', 'requirements.txt', 'setup.py', 'pyproject.toml', 'Pipfile'],
-            'JavaScript/Node.js': ['.js', '.jsx', 'package.json', '.npmrc'],
-            'TypeScript': ['.ts', '.tsx', 'tsconfig.json'],
-            'React': ['package.json'],  # Will check content
-            'Vue.js': ['package.json'],  # Will check content
-            'Angular': ['package.json', 'angular.json'],
-            'Java': ['.java', 'pom.xml', 'build.gradle'],
-            'C#': ['.cs', '.csproj', '.sln'],
-            'Go': ['.go', 'go.mod', 'go.sum'],
-            'Rust': ['.rs', 'Cargo.toml'],
-            'PHP': ['.php', 'composer.json'],
-            'Ruby': ['.rb', 'Gemfile'],
-            'Docker': ['Dockerfile', 'docker-compose.yml'],
-            'Kubernetes': ['.yaml', '.yml'],  # Will check content
-        }
+    def __init__(self, max_read_bytes=5000, read_budget_bytes=512 * 1024, scan_workers=None, tech_stack_rules=None,
+                 outline_workers=None, outline_cache=None):
+        # Threads listing directories in parallel; 1 scans serially. Helps most on network filesystems
+        self.scan_workers = scan_workers or int(os.getenv('SCAN_WORKERS', '1'))
+        # Processes outlining source files; 1 outlines in this process
+        self.outline_workers = outline_workers or int(os.getenv('OUTLINE_WORKERS', str(min(os.cpu_count() or 1, 4))))
+        self.outline_max_files = int(os.getenv('OUTLINE_MAX_FILES', '2000'))  # Shallowest files first
+        # Larger source files are likely generated or minified
+        self.outline_max_file_bytes = int(os.getenv('OUTLINE_MAX_FILE_BYTES', str(512 * 1024)))
+        # Outlines cached by blob SHA across analyses; False disables caching
+        self.outline_cache = outline_cache if outline_cache is not None else get_outline_cache()
+        self.max_read_bytes = max_read_bytes  # Bytes read from the start of each important file
+        self.read_budget_bytes = read_budget_bytes  # Bytes read across all important files
+        self.important_file_patterns = [
+            re.compile('|'.join(fnmatch.translate(pattern) for pattern in patterns))
+            for patterns in IMPORTANT_FILE_PATTERNS
+        ]
+        
+        self.tech_stack_index = TechStackIndex(tech_stack_rules or TECH_STACK_RULES)
+        self.languages = language_extensions(tech_stack_rules or TECH_STACK_RULES)  # Extension -> language
     
     def analyze_repository(self, repo_path):
         """Analyze repository structure and detect technologies"""
+        timer = StageTimer()
+        with timer.stage('parse.scan'):
+            file_index, structure = self._scan_repository(repo_path)
+        FILES_SCANNED.inc(len(file_index))
+        with timer.stage('parse.read'):
+            file_contents = self._read_important_files(file_index)
+        with timer.stage('parse.dependencies'):
+            dependencies = extract_dependencies(file_index)
+        with timer.stage('parse.tech_stack'):
+            tech_stack = self._detect_tech_stack(file_index, dependencies)
+        with timer.stage('parse.outlines'):
+            tracked = self._tracked_blobs(repo_path)
+            outlines, outline_hashes = self._get_outlines(repo_path, file_index, tracked)
+        with timer.stage('parse.hashes'):
+            file_hashes = self._get_file_hashes(repo_path, file_index, file_contents, outline_hashes, tracked)
+        with timer.stage('parse.chunks'):
+            chunks = chunk_files((entry.relative_path, entry.path, entry.size) for entry in file_index)
+        with timer.stage('parse.statistics'):
+            statistics = self._get_repo_statistics(file_index)
+        
         repo_data = {
             'path': repo_path,
             'name': os.path.basename(repo_path),
-            'structure': self._get_folder_structure(repo_path),
-            'key_files': self._find_key_files(repo_path),
-            'tech_stack': self._detect_tech_stack(repo_path),
-            'file_contents': self._read_important_files(repo_path),
-            'statistics': self._get_repo_statistics(repo_path)
+            'commit': self._head_commit(repo_path),
+            'structure': structure,
+            'key_files': self._find_key_files(file_index),
+            'tech_stack': tech_stack,
+            'dependencies': dependencies,
+            'file_contents': file_contents,
+            'file_hashes': file_hashes,
+            'outlines': outlines,
+            'chunks': chunks,
+            'statistics': statistics,
+            'timings': timer.report()
         }
         
         return repo_data
     
-    def _get_folder_structure(self, repo_path, max_depth=3):
-        """Get repository folder structure"""
-        structure = {}
+    def _scan_repository(self, repo_path, max_depth=3):
+        """Walk the repository once, returning the file index and folder structure"""
+        if self.scan_workers > 1:
+            return self._scan_repository_parallel(repo_path, max_depth)
+        
+        file_index = []
+        tree = DirectoryTree()
+        
+        # ((directory path, relative path, depth of its children, in tree, indexed), tree index)
+        stack = [((repo_path, '', 0, True, True), 0)]
+        
+        while stack:
+            directory, tree_index = stack.pop()
+            files, subdirs, listing = self._scan_directory(*directory, max_depth)
+            file_index.extend(files)
+            tree_indexes = self._add_listing(tree, tree_index, listing)
+            
+            # Reverse so subdirectories are visited in listing order (top-down, like os.walk)
+            stack.extend((subdir, tree_indexes.get(subdir[1])) for subdir in reversed(subdirs))
+        
+        return file_index, tree.to_dict()
+    
+    def _scan_repository_parallel(self, repo_path, max_depth=3):
+        """
+        Scan directories on a thread pool, then assemble the results in the order of the
+        serial walk so the file index and structure are identical to _scan_repository.
+        """
+        root = (repo_path, '', 0, True, True)
+        results = {}  # relative directory path -> (files, subdirs, listing)
+        
+        with ThreadPoolExecutor(max_workers=self.scan_workers, thread_name_prefix='scan') as executor:
+            futures = {executor.submit(self._scan_directory, *root, max_depth): root[1]}
+            
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    relative_dir = futures.pop(future)
+                    results[relative_dir] = future.result()
+                    for subdir in results[relative_dir][1]:
+                        futures[executor.submit(self._scan_directory, *subdir, max_depth)] = subdir[1]
+        
+        # Same pre-order traversal as the serial stack walk
+        file_index = []
+        tree = DirectoryTree()
+        stack = [('', 0)]
+        while stack:
+            relative_dir, tree_index = stack.pop()
+            files, subdirs, listing = results[relative_dir]
+            file_index.extend(files)
+            tree_indexes = self._add_listing(tree, tree_index, listing)
+            stack.extend((subdir[1], tree_indexes.get(subdir[1])) for subdir in reversed(subdirs))
+        
+        return file_index, tree.to_dict()
+    
+    def _scan_directory(self, dir_path, relative_dir, depth, in_tree, indexed, max_depth):
+        """
+        List one directory. Returns the indexed files, the (path, relative path, depth, in tree,
+        indexed) subdirectories to visit and the (name, size) entries to add to the folder structure.
+        """
+        files = []
+        subdirs = []
+        listing = []
+        
+        try:
+            with os.scandir(dir_path) as it:
+                entries = list(it)
+        except OSError:
+            return files, subdirs, listing
         
-        def build_tree(path, current_depth=0):
-            if current_depth >= max_depth:
-                return "..."
+        for entry in entries:
+            name = entry.name
+            relative_path = os.path.join(relative_dir, name) if relative_dir else name
+            in_structure = in_tree and (not name.startswith('.') or name in VISIBLE_HIDDEN)
             
-            items = {}
             try:
-                for item in os.listdir(path):
-                    if item.startswith('.') and item not in ['.env', '.gitignore', '.github']:
-                        continue
-                    
-                    item_path = os.path.join(path, item)
-                    if os.path.isdir(item_path):
-                        items[item + '/'] = build_tree(item_path, current_depth + 1)
-                    else:
-                        items[item] = os.path.getsize(item_path)
-            except PermissionError:
-                pass
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
             
-            return items
+            if is_dir:
+                child_in_tree = in_structure and depth + 1 < max_depth
+                if in_structure:
+                    listing.append((relative_path, DIRECTORY if child_in_tree else ELIDED_DIRECTORY))
+                
+                # Symlinked directories are listed but never indexed, like os.walk
+                child_indexed = (indexed and not entry.is_symlink() and
+                                 not name.startswith('.') and name not in SKIPPED_DIRS)
+                if child_indexed or child_in_tree:
+                    subdirs.append((entry.path, relative_path, depth + 1, child_in_tree, child_indexed))
+                continue
+            
+            if not (in_structure or indexed):
+                continue
+            
+            try:
+                size = entry.stat().st_size
+            except OSError:
+                size = None
+            
+            if in_structure:
+                listing.append((relative_path, size or 0))
+            
+            if indexed:
+                files.append(FileEntry(
+                    entry.path, relative_path, name, self._file_extension(name),
+                    size, depth, entry.is_symlink()
+                ))
         
-        return build_tree(repo_path)
+        return files, subdirs, listing
+    
+    def _add_listing(self, tree, parent, listing):
+        """
+        Add a directory's entries to the folder structure under parent (None when the
+        directory is not part of it), returning the tree index of each subdirectory by relative path
+        """
+        tree_indexes = {}
+        if parent is None:
+            return tree_indexes
+        for relative_path, size in listing:
+            index = tree.add(os.path.basename(relative_path), parent, size)
+            if size == DIRECTORY:
+                tree_indexes[relative_path] = index
+        return tree_indexes
     
-    def _find_key_files(self, repo_path):
+    def _find_key_files(self, file_index):
         """Find important files in the repository"""
         key_files = {}
         important_files = [
@@ -69,128 +227,198 @@ class RepoParser:
             'package.json', 'requirements.txt', 'setup.py',
             'Dockerfile', 'docker-compose.yml',
             'main.py', 'index.js', 'main.js', 'app.py',
+            'manage.py', 'server.js', 'main.go', 'main.rs',
             'main.tsx', 'index.tsx', 'App.tsx',
             'pom.xml', 'build.gradle', 'Cargo.toml'
         ]
         
-        for root, dirs, files in os.walk(repo_path):
-            # Skip hidden directories and common build/cache directories
-            dirs[:] = [d for d in dirs if not d.startswith('.') and 
-                      d not in ['node_modules', '__pycache__', 'build', 'dist', 'target']]
-            
-            for file in files:
-                if file in important_files:
-                    file_path = os.path.join(root, file)
-                    relative_path = os.path.relpath(file_path, repo_path)
-                    key_files[relative_path] = file_path
+        for entry in file_index:
+            if entry.name in important_files:
+                # Build output of Java/Rust projects is not worth documenting
+                if 'target' in entry.relative_path.split(os.sep)[:-1]:
+                    continue
+                key_files[entry.relative_path] = entry.path
         
         return key_files
     
-    def _detect_tech_stack(self, repo_path):
+    def _detect_tech_stack(self, file_index, dependencies=()):
         """Detect technologies used in the repository"""
-        detected_tech = set()
+        return self.tech_stack_index.detect(file_index, dependencies)
+    
+    def _read_important_files(self, file_index):
+        """
+        Read the start of each important file, highest priority and shallowest first,
+        until the total byte budget runs out. Binary files are skipped.
+        """
+        candidates = []
+        for position, entry in enumerate(file_index):
+            priority = self._important_file_priority(entry.name)
+            if priority is not None:
+                candidates.append((priority, entry.depth, position, entry))
+        candidates.sort(key=lambda candidate: candidate[:3])
         
-        # Check file extensions and specific files
-        for root, dirs, files in os.walk(repo_path):
-            dirs[:] = [d for d in dirs if not d.startswith('.') and 
-                      d not in ['node_modules', '__pycache__', 'build', 'dist']]
+        selected = {}
+        remaining = self.read_budget_bytes
+        for priority, depth, position, entry in candidates:
+            if remaining <= 0:
+                break
             
-            for file in files:
-                file_path = os.path.join(root, file)
-                file_ext = Path(file).suffix
-                
-                # Check against tech stack indicators
-                for tech, indicators in self.tech_stack_indicators.items():
-                    if file in indicators or file_ext in indicators:
-                        detected_tech.add(tech)
-                        
-                        # Special checks for package.json content
-                        if file == 'package.json':
-                            try:
-                                with open(file_path, 'r', encoding='utf-8') as f:
-                                    package_data = json.loads(f.read())
-                                    dependencies = {**package_data.get('dependencies', {}), 
-                                                  **package_data.get('devDependencies', {})}
-                                    
-                                    if 'react' in dependencies:
-                                        detected_tech.add('React')
-                                    if 'vue' in dependencies:
-                                        detected_tech.add('Vue.js')
-                                    if '@angular/core' in dependencies:
-                                        detected_tech.add('Angular')
-                                    if 'express' in dependencies:
-                                        detected_tech.add('Express.js')
-                            except:
-                                pass
-        
-        return list(detected_tech)
-    
-    def _read_important_files(self, repo_path):
-        """Read content of important files"""
-        file_contents = {}
-        max_file_size = 50000  # 50KB limit
-        
-        important_patterns = [
-            'README.md', 'README.txt', 'README.rst',
-            'main.py', 'app.py', 'index.js', 'main.js',
-            'main.tsx', 'index.tsx', 'App.tsx',
-            'package.json', 'requirements.txt', 'setup.py'
-        ]
-        
-        for root, dirs, files in os.walk(repo_path):
-            dirs[:] = [d for d in dirs if not d.startswith('.') and 
-                      d not in ['node_modules', '__pycache__', 'build', 'dist']]
+            if entry.size is None:
+                selected[position] = (entry.relative_path, "Could not read file content")
+                continue
             
-            for file in files:
-                if any(pattern in file for pattern in important_patterns):
-                    file_path = os.path.join(root, file)
-                    relative_path = os.path.relpath(file_path, repo_path)
-                    
-                    try:
-                        if os.path.getsize(file_path) <= max_file_size:
-                            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                                content = f.read()
-                                file_contents[relative_path] = content[:5000]  # Limit content
-                    except:
-                        file_contents[relative_path] = "Could not read file content"
-        
-        return file_contents
-    
-    def _get_repo_statistics(self, repo_path):
-        """Get basic repository statistics"""
-        stats = {
-            'total_files': 0,
-            'total_size': 0,
-            'file_types': {},
-            'largest_files': []
-        }
+            try:
+                data = self._read_prefix(entry.path, min(self.max_read_bytes, remaining))
+            except OSError:
+                selected[position] = (entry.relative_path, "Could not read file content")
+                continue
+            
+            remaining -= len(data)
+            BYTES_READ.inc(len(data), stage='parse.read')
+            if b'\0' in data[:BINARY_SNIFF_BYTES]:
+                continue
+            selected[position] = (entry.relative_path, data.decode('utf-8', errors='ignore'))
         
-        file_sizes = []
+        # Keep the scan order so documents list files the same way regardless of priority
+        return dict(selected[position] for position in sorted(selected))
+    
+    def _important_file_priority(self, name):
+        """Return the priority tier of an important file name (0 is highest), or None"""
+        for priority, pattern in enumerate(self.important_file_patterns):
+            if pattern.match(name):
+                return priority
+        return None
+    
+    def _read_prefix(self, file_path, limit):
+        """Read at most limit bytes from the start of a file"""
+        with open(file_path, 'rb') as f:
+            return f.read(limit)
+    
+    def _head_commit(self, repo_path):
+        """SHA of the checked out commit, or None outside a git checkout"""
+        try:
+            return git.Repo(repo_path).head.commit.hexsha
+        except Exception:
+            return None
+    
+    def _get_outlines(self, repo_path, file_index, tracked=None):
+        """
+        Outline the source files of languages with an extractor, shallowest first and up to
+        outline_max_files. Outlines of blobs seen before come from the cache without reading
+        the file. Returns ({relative_path: outline}, {relative_path: blob SHA}) for the files read.
+        """
+        candidates = [entry for entry in file_index
+                      if entry.size is not None and entry.size <= self.outline_max_file_bytes
+                      and outline_language(entry.name)]
+        candidates.sort(key=lambda entry: entry.depth)  # Stable, so scan order within a depth
+        candidates = candidates[:self.outline_max_files]
         
-        for root, dirs, files in os.walk(repo_path):
-            dirs[:] = [d for d in dirs if not d.startswith('.') and 
-                      d not in ['node_modules', '__pycache__', 'build', 'dist']]
+        if tracked is None:
+            tracked = self._tracked_blobs(repo_path) if candidates else {}
+        keys = {}
+        for entry in candidates:
+            index_sha = self._indexed_sha(tracked, entry)
+            if index_sha:
+                keys[entry.relative_path] = outline_cache_key(outline_language(entry.name), index_sha)
+        
+        cached = load_cached_outlines(self.outline_cache, keys.values()) if self.outline_cache and keys else {}
+        outlines = {}
+        pending = []
+        for entry in candidates:
+            key = keys.get(entry.relative_path)
+            if key in cached:
+                outlines[entry.relative_path] = cached[key]
+            else:
+                pending.append((entry.relative_path, entry.path))
+        OUTLINE_CACHE_REQUESTS.inc(len(outlines), result='hit')
+        OUTLINE_CACHE_REQUESTS.inc(len(pending), result='miss')
+        
+        blob_hashes = {}
+        new_outlines = {}
+        for relative_path, blob_sha, outline, size in extract_outlines(pending, self.outline_workers):
+            BYTES_READ.inc(size, stage='parse.outlines')
+            if blob_sha:
+                blob_hashes[relative_path] = blob_sha
+            if outline is not None:
+                outlines[relative_path] = outline
+                new_outlines[outline_cache_key(outline['language'], blob_sha)] = outline
+        if self.outline_cache and new_outlines:
+            store_outlines(self.outline_cache, new_outlines)
+        
+        # Keep the scan order so documents list files the same way whatever came from the cache
+        return {entry.relative_path: outlines[entry.relative_path] for entry in file_index
+                if entry.relative_path in outlines}, blob_hashes
+    
+    def _tracked_blobs(self, repo_path):
+        """Git index entries by path, or {} outside a git checkout"""
+        try:
+            index_entries = git.Repo(repo_path).index.entries
+            return {path: entry for (path, stage), entry in index_entries.items()}
+        except Exception:
+            return {}
+    
+    def _indexed_sha(self, tracked, entry):
+        """
+        Blob SHA of a file from the git index, trusted like git's own stat check only while
+        the file still has the indexed size, mtime and ctime. An edit that keeps the size
+        changes the mtime, so the file is hashed instead.
+        """
+        index_entry = tracked.get(entry.relative_path.replace(os.sep, '/'))
+        if index_entry is None or index_entry.size != entry.size:
+            return None
+        try:
+            stat = os.stat(entry.path)
+        except OSError:
+            return None
+        if not (self._same_time(index_entry.mtime, stat.st_mtime_ns) and
+                self._same_time(index_entry.ctime, stat.st_ctime_ns)):
+            return None
+        return index_entry.hexsha
+    
+    def _same_time(self, index_time, time_ns):
+        """Compare an index (seconds, nanoseconds) time with a stat time; git may store 0 nanoseconds"""
+        seconds, nanoseconds = index_time
+        return seconds == time_ns // 1_000_000_000 and nanoseconds in (0, time_ns % 1_000_000_000)
+    
+    def _get_file_hashes(self, repo_path, file_index, file_contents, known_hashes=None, tracked=None):
+        """
+        Map each read file to its git blob SHA. known_hashes are SHAs already computed from the
+        files, tracked the git index entries if already loaded.
+        """
+        if tracked is None:
+            tracked = self._tracked_blobs(repo_path)  # Empty outside a git checkout, hash the files ourselves
+        known_hashes = known_hashes or {}
+        
+        file_hashes = {}
+        for entry in file_index:
+            if entry.relative_path not in file_contents:
+                continue
             
-            for file in files:
-                if not file.startswith('.'):
-                    file_path = os.path.join(root, file)
-                    try:
-                        size = os.path.getsize(file_path)
-                        stats['total_files'] += 1
-                        stats['total_size'] += size
-                        
-                        # Track file types
-                        ext = Path(file).suffix or 'no_extension'
-                        stats['file_types'][ext] = stats['file_types'].get(ext, 0) + 1
-                        
-                        # Track large files
-                        relative_path = os.path.relpath(file_path, repo_path)
-                        file_sizes.append((relative_path, size))
-                    except:
-                        pass
-        
-        # Get top 5 largest files
-        file_sizes.sort(key=lambda x: x[1], reverse=True)
-        stats['largest_files'] = file_sizes[:5]
-        
-        return stats
+            blob_sha = (self._indexed_sha(tracked, entry) or known_hashes.get(entry.relative_path)
+                        or self._hash_blob(entry.path))
+            if blob_sha:
+                file_hashes[entry.relative_path] = blob_sha
+        
+        return file_hashes
+    
+    def _hash_blob(self, file_path):
+        """Compute the git blob SHA of a file on disk"""
+        try:
+            with open(file_path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        
+        BYTES_READ.inc(len(data), stage='parse.hashes')
+        return hashlib.sha1(b'blob %d\0' % len(data) + data).hexdigest()
+    
+    def _get_repo_statistics(self, file_index):
+        """Get repository statistics: totals, file types, largest files and size distribution"""
+        return compute_statistics(file_index, languages=self.languages)
+    
+    def _file_extension(self, name):
+        """Return the suffix of a file name, matching pathlib's Path.suffix"""
+        i = name.rfind('.')
+        if 0 < i < len(name) - 1:
+            return name[i:]
+        return ''
@@ -0,0 +1,126 @@
+import re
+
+try:
+    import tiktoken
+except ImportError:  # Optional: fall back to the local approximation below
+    tiktoken = None
+
+# Runs of letters, single digits and single punctuation marks, roughly how BPE tokenizers split text
+APPROX_TOKEN_PATTERN = re.compile(r"[A-Za-z]+|\d{1,3}|[^\sA-Za-z\d]")
+
+TRUNCATION_MARKER = "\n..."
+
+# Places text may be cut, coarsest first: before headings and blank lines, line ends, between words
+BOUNDARY_PATTERNS = [r'\n(?=#)|\n\s*\n', r'\n', r'\s+']
+
+_encoding = None
+
+
+def count_tokens(text):
+    """Count prompt tokens with tiktoken when installed, otherwise with a fast local estimate"""
+    global _encoding
+
+    if not text:
+        return 0
+    if tiktoken is not None:
+        if _encoding is None:
+            _encoding = tiktoken.get_encoding('p50k_base')  # Encoding of the completion models
+        return len(_encoding.encode(text, disallowed_special=()))
+
+    # Long words split into several tokens, about four characters each
+    return sum((len(word) + 3) // 4 for word in APPROX_TOKEN_PATTERN.findall(text))
+
+
+def truncate_tokens(text, max_tokens, count=count_tokens):
+    """
+    Cut text to at most max_tokens, preferring to end before a Markdown heading or blank line,
+    then on a line boundary, then between words, and only as a last resort inside a word.
+    """
+    if count(text) <= max_tokens:
+        return text
+
+    budget = max_tokens - count(TRUNCATION_MARKER)
+    if budget <= 0:
+        return ""
+
+    return _truncate(text, budget, count, 0).rstrip() + TRUNCATION_MARKER
+
+
+def _truncate(text, budget, count, level):
+    """Keep the leading pieces of text that fit, splitting at the boundaries of the given level"""
+    if level == len(BOUNDARY_PATTERNS):
+        # No boundary left: binary search for the longest prefix that fits
+        low, high = 0, len(text)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if count(text[:middle]) <= budget:
+                low = middle
+            else:
+                high = middle - 1
+        return text[:low]
+
+    kept = []
+    used = 0
+    for piece in re.split(f'({BOUNDARY_PATTERNS[level]})', text):
+        tokens = count(piece)
+        if used + tokens > budget:
+            # Rather than waste most of the budget, cut inside the piece at a finer boundary
+            if used < budget // 2:
+                kept.append(_truncate(piece, budget - used, count, level + 1))
+            break
+        kept.append(piece)
+        used += tokens
+    return "".join(kept)
+
+
+class PromptPacker:
+    """
+    Fits named prompt sections into a shared token budget. Each section gets a share of the
+    budget proportional to its weight; budget a section does not need is passed on to the rest.
+    """
+
+    def __init__(self, budget, count=count_tokens):
+        self.budget = max(budget, 0)
+        self.count = count
+        self.sections = []  # (name, text, weight) in insertion order
+        self.tokens = {}  # name -> tokens of the packed text
+
+    def add(self, name, text, weight=1):
+        self.sections.append((name, text or "", weight))
+
+    def pack(self):
+        """Return {name: text} with every section truncated to its allocated budget"""
+        needs = {name: self.count(text) for name, text, _ in self.sections}
+        allocation = self._allocate(needs)
+
+        packed = {}
+        for name, text, _ in self.sections:
+            packed[name] = text if needs[name] <= allocation[name] else truncate_tokens(text, allocation[name], self.count)
+            self.tokens[name] = self.count(packed[name])
+        return packed
+
+    def _allocate(self, needs):
+        """Split the budget by weight, repeatedly granting sections that need less than their share"""
+        allocation = {}
+        pending = [(name, weight) for name, _, weight in self.sections]
+        remaining = self.budget
+
+        while pending:
+            total_weight = sum(weight for _, weight in pending) or 1
+            satisfied = [(name, weight) for name, weight in pending
+                         if needs[name] <= remaining * weight / total_weight]
+            if not satisfied:
+                for name, weight in pending:
+                    allocation[name] = int(remaining * weight / total_weight)
+                break
+
+            for name, weight in satisfied:
+                allocation[name] = needs[name]
+                remaining -= needs[name]
+            pending = [item for item in pending if item not in satisfied]
+
+        return allocation
+
+    @property
+    def total_tokens(self):
+        return sum(self.tokens.values())
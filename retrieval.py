@@ -0,0 +1,151 @@
+import re
+import sys
+import math
+import numpy as np
+from analyzer.metrics import BYTES_READ
+
+# Text files worth indexing for chat retrieval
+SOURCE_EXTENSIONS = {
+    '.py', '.js', '.jsx', '.ts', '.tsx', '.go', '.java', '.kt', '.rs', '.rb', '.php', '.cs',
+    '.c', '.h', '.cpp', '.hpp', '.swift', '.scala', '.sh', '.sql', '.html', '.css', '.scss',
+    '.vue', '.md', '.rst', '.txt', '.json', '.yml', '.yaml', '.toml', '.cfg', '.ini', '.gradle', '.xml'
+}
+SOURCE_FILENAMES = {'Dockerfile', 'Makefile', 'Gemfile', 'Pipfile', 'Procfile'}
+SKIPPED_FILENAMES = {'package-lock.json', 'yarn.lock', 'pnpm-lock.yaml', 'poetry.lock', 'Cargo.lock', 'go.sum'}
+
+STOPWORDS = {
+    'the', 'a', 'an', 'and', 'or', 'of', 'to', 'in', 'is', 'it', 'for', 'on', 'with', 'as', 'by',
+    'this', 'that', 'be', 'are', 'what', 'how', 'does', 'do', 'where', 'which', 'from', 'at', 'i', 'me'
+}
+
+WORD_PATTERN = re.compile(r'[A-Za-z_][A-Za-z0-9_]*|\d+')
+CAMEL_PATTERN = re.compile(r'[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+')
+
+
+def tokenize(text):
+    """Split text into lowercase terms, adding the parts of snake_case and camelCase identifiers"""
+    terms = []
+    for word in WORD_PATTERN.findall(text):
+        lower = word.lower()
+        if lower not in STOPWORDS:
+            terms.append(lower)
+        parts = [part.lower() for piece in word.split('_') for part in CAMEL_PATTERN.findall(piece)]
+        if len(parts) > 1:
+            terms.extend(part for part in parts if part not in STOPWORDS)
+    return terms
+
+
+def chunk_files(files, lines_per_chunk=40, max_file_size=200000, max_total_bytes=4 * 1024 * 1024):
+    """
+    Split (relative_path, absolute_path, size) source files into line-based chunks.
+    Returns a list of {'path', 'start_line', 'end_line', 'text'} dicts.
+    """
+    chunks = []
+    total = 0
+
+    for relative_path, path, size in files:
+        name = relative_path.replace('\\', '/').rsplit('/', 1)[-1]
+        extension = name[name.rfind('.'):] if '.' in name[1:] else ''
+        if name in SKIPPED_FILENAMES or (extension not in SOURCE_EXTENSIONS and name not in SOURCE_FILENAMES):
+            continue
+        if size is None or size > max_file_size or total + size > max_total_bytes:
+            continue
+
+        try:
+            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                lines = f.readlines()
+        except OSError:
+            continue
+        total += size
+
+        for start in range(0, len(lines), lines_per_chunk):
+            text = ''.join(lines[start:start + lines_per_chunk])
+            if text.strip():
+                chunks.append({
+                    'path': relative_path,
+                    'start_line': start + 1,
+                    'end_line': min(start + lines_per_chunk, len(lines)),
+                    'text': text
+                })
+
+    BYTES_READ.inc(total, stage='parse.chunks')
+    return chunks
+
+
+class ChunkIndex:
+    """BM25 ranking over repository chunks, computed locally with NumPy"""
+
+    def __init__(self, chunks, k1=1.5, b=0.75):
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+
+        # Inverted index: term -> (chunk ids, term frequencies)
+        postings = {}
+        lengths = np.zeros(len(chunks), dtype=np.float32)
+        for chunk_id, chunk in enumerate(chunks):
+            # The path is part of the searchable text so questions about a file find it
+            terms = tokenize(chunk['path']) + tokenize(chunk['text'])
+            lengths[chunk_id] = len(terms)
+            counts = {}
+            for term in terms:
+                counts[term] = counts.get(term, 0) + 1
+            for term, count in counts.items():
+                postings.setdefault(term, ([], []))
+                postings[term][0].append(chunk_id)
+                postings[term][1].append(count)
+
+        self.postings = {
+            term: (np.array(ids, dtype=np.int32), np.array(tfs, dtype=np.float32))
+            for term, (ids, tfs) in postings.items()
+        }
+        self.lengths = lengths
+        self.avg_length = float(lengths.mean()) if len(chunks) else 0.0
+
+    @property
+    def nbytes(self):
+        """Approximate memory held by the index, excluding the chunks it ranks"""
+        return sys.getsizeof(self.postings) + self.lengths.nbytes + sum(
+            sys.getsizeof(term) + sys.getsizeof(ids) + sys.getsizeof(tfs)
+            for term, (ids, tfs) in self.postings.items()
+        )
+
+    def search(self, query, top_k=8):
+        """Return up to top_k (score, chunk) pairs for the query, best first"""
+        if not self.chunks:
+            return []
+
+        scores = np.zeros(len(self.chunks), dtype=np.float32)
+        n = len(self.chunks)
+        norm = self.k1 * (1 - self.b + self.b * self.lengths / (self.avg_length or 1.0))
+
+        for term in set(tokenize(query)):
+            if term not in self.postings:
+                continue
+            ids, tfs = self.postings[term]
+            idf = math.log(1 + (n - len(ids) + 0.5) / (len(ids) + 0.5))
+            scores[ids] += idf * tfs * (self.k1 + 1) / (tfs + norm[ids])
+
+        matched = np.flatnonzero(scores)
+        if len(matched) == 0:
+            return []
+        if len(matched) > top_k:
+            matched = matched[np.argpartition(-scores[matched], top_k - 1)[:top_k]]
+        best = matched[np.argsort(-scores[matched], kind='stable')]
+
+        return [(float(scores[i]), self.chunks[i]) for i in best]
+
+    def select(self, query, token_budget, top_k=8, count_tokens=None):
+        """Pick the highest ranked chunks that fit in token_budget"""
+        count_tokens = count_tokens or (lambda text: len(text) // 4)
+
+        selected = []
+        used = 0
+        for score, chunk in self.search(query, top_k):
+            tokens = count_tokens(chunk['text'])
+            if used + tokens > token_budget:
+                continue
+            selected.append(chunk)
+            used += tokens
+
+        return selected
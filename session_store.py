@@ -0,0 +1,196 @@
+import os
+import json
+import time
+import shutil
+import sqlite3
+import threading
+from collections import OrderedDict
+from analyzer.retrieval import ChunkIndex
+
+class RepoSessionStore:
+    """
+    Memory-bounded LRU/TTL store of analyzed repositories for the chat endpoint.
+    Evicting an entry deletes its temporary clone; with a spill path, the repo data
+    and summaries are kept on disk so chat keeps working after eviction.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024, ttl=24 * 3600, spill_path=None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.spill_path = spill_path
+        self._entries = OrderedDict()  # repo_id -> (entry, size, created_at), least recently used first
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.counters = {'evictions': 0, 'expirations': 0, 'spills': 0, 'spill_hits': 0}
+
+        self._conn = None
+        if spill_path:
+            directory = os.path.dirname(spill_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(spill_path, check_same_thread=False)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    repo_id TEXT PRIMARY KEY,
+                    data TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            self._conn.commit()
+
+    def put(self, repo_id, entry):
+        """Store an analyzed repository, evicting older entries over the memory budget"""
+        size = self._estimate_size(entry)
+        to_remove = []
+
+        with self._lock:
+            old = self._entries.pop(repo_id, None)
+            if old is not None:
+                self._bytes -= old[1]
+                if old[0].get('temp_dir') != entry.get('temp_dir'):
+                    to_remove.append(old[0].get('temp_dir'))
+
+            self._entries[repo_id] = (entry, size, time.time())
+            self._bytes += size
+            to_remove += self._evict(keep=repo_id)
+
+        self._remove_dirs(to_remove)
+
+    def get(self, repo_id):
+        """Return the entry for repo_id from memory or the spill store, or None"""
+        to_remove = []
+
+        with self._lock:
+            to_remove += self._expire()
+
+            if repo_id in self._entries:
+                self._entries.move_to_end(repo_id)
+                entry = self._entries[repo_id][0]
+                spilled = None
+            else:
+                spilled = self._load_spilled(repo_id)
+                entry = spilled and spilled[0]
+
+        if spilled is not None:
+            # Rebuild the chat index once and keep the entry in memory so later questions reuse it
+            entry['chunk_index'] = ChunkIndex(entry['repo_data'].get('chunks', []))
+            size = self._estimate_size(entry)
+            with self._lock:
+                if repo_id in self._entries:
+                    entry = self._entries[repo_id][0]
+                else:
+                    self._entries[repo_id] = (entry, size, spilled[1])
+                    self._bytes += size
+                    to_remove += self._evict(keep=repo_id)
+
+        self._remove_dirs(to_remove)
+        return entry
+
+    def delete(self, repo_id):
+        """Forget a repository and remove its temporary clone"""
+        with self._lock:
+            old = self._entries.pop(repo_id, None)
+            if old is not None:
+                self._bytes -= old[1]
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM sessions WHERE repo_id = ?", (repo_id,))
+                self._conn.commit()
+
+        if old is not None:
+            self._remove_dirs([old[0].get('temp_dir')])
+        return old is not None
+
+    def __contains__(self, repo_id):
+        return self.get(repo_id) is not None
+
+    def stats(self):
+        """Report current size and eviction counters"""
+        with self._lock:
+            spilled = 0
+            if self._conn is not None:
+                spilled = self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+            return {
+                'entries': len(self._entries),
+                'size_bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'spilled_entries': spilled,
+                **self.counters
+            }
+
+    def _evict(self, keep=None):
+        """Spill least recently used entries until within budget; returns temp dirs to delete"""
+        to_remove = self._expire()
+
+        for repo_id in list(self._entries):
+            if self._bytes <= self.max_bytes:
+                break
+            if repo_id == keep:
+                continue
+
+            entry, size, created_at = self._entries.pop(repo_id)
+            self._bytes -= size
+            self.counters['evictions'] += 1
+            to_remove.append(entry.get('temp_dir'))
+            self._spill(repo_id, entry, created_at)
+
+        return to_remove
+
+    def _expire(self):
+        """Drop entries older than the TTL from memory and disk; returns temp dirs to delete"""
+        if not self.ttl:
+            return []
+
+        cutoff = time.time() - self.ttl
+        to_remove = []
+        for repo_id, (entry, size, created_at) in list(self._entries.items()):
+            if created_at < cutoff:
+                del self._entries[repo_id]
+                self._bytes -= size
+                self.counters['expirations'] += 1
+                to_remove.append(entry.get('temp_dir'))
+
+        if self._conn is not None:
+            cursor = self._conn.execute("DELETE FROM sessions WHERE created_at < ?", (cutoff,))
+            self.counters['expirations'] += cursor.rowcount
+            self._conn.commit()
+
+        return to_remove
+
+    def _spill(self, repo_id, entry, created_at):
+        """Write the parts of an entry that chat needs to the spill store"""
+        if self._conn is None:
+            return
+
+        data = json.dumps({'repo_data': entry['repo_data'], 'summaries': entry['summaries']}, default=str)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO sessions (repo_id, data, created_at) VALUES (?, ?, ?)",
+            (repo_id, data, created_at)
+        )
+        self._conn.commit()
+        self.counters['spills'] += 1
+
+    def _load_spilled(self, repo_id):
+        """Read an evicted entry and its creation time back from the spill store"""
+        if self._conn is None:
+            return None
+
+        row = self._conn.execute("SELECT data, created_at FROM sessions WHERE repo_id = ?", (repo_id,)).fetchone()
+        if row is None:
+            return None
+
+        self.counters['spill_hits'] += 1
+        entry = json.loads(row[0])
+        entry.update({'repo_path': None, 'temp_dir': None})  # The clone was deleted on eviction
+        return entry, row[1]
+
+    def _estimate_size(self, entry):
+        """Approximate the memory held by an entry from its serialized size plus its chat index"""
+        size = len(json.dumps({'repo_data': entry['repo_data'], 'summaries': entry['summaries']}, default=str))
+        chunk_index = entry.get('chunk_index')
+        return size + (chunk_index.nbytes if chunk_index is not None else 0)
+
+    def _remove_dirs(self, paths):
+        for path in paths:
+            if path and os.path.exists(path):
+                shutil.rmtree(path, ignore_errors=True)
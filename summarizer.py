@@ -1,46 +1,227 @@
 import os
+import re
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from langchain.llms import OpenAI
 from langchain.prompts import PromptTemplate
 from langchain.chains import LLMChain
 from langchain.schema import BaseOutputParser
+from langchain.callbacks.base import BaseCallbackHandler
+from analyzer.llm_cache import LLMCache, get_llm_cache
+from analyzer.retrieval import ChunkIndex
+from analyzer.prompt_packer import PromptPacker, count_tokens, truncate_tokens
+from analyzer.manifests import format_dependency_summary
+from analyzer.metrics import StageTimer, LLM_CALLS, LLM_TOKENS, LLM_CACHE_REQUESTS
+from analyzer.tree import render_tree
+from analyzer.outline import format_outline, format_outlines
+
+PACKAGE_FILE_PATTERNS = ['package.json', 'requirements.txt', 'setup.py', 'pom.xml', 'Cargo.toml']
+CONFIG_FILE_PATTERNS = ['dockerfile', 'docker-compose', '.env', 'config', 'settings']
+
+# "path": "explanation" pairs, used to salvage complete entries from malformed or cut-off JSON
+JSON_PAIR_PATTERN = re.compile(r'"((?:[^"\\]|\\.)*)"\s*:\s*"((?:[^"\\]|\\.)*)"')
 
 class RepoSummarizer:
-    def __init__(self):
-        self.llm = OpenAI(
+    def __init__(self, llm=None, max_concurrency=None, call_timeout=None, cache=None, run_timeout=None):
+        # Number of LLM calls allowed in flight at once; 1 runs everything sequentially
+        self.max_concurrency = max_concurrency or int(os.getenv('SUMMARY_MAX_CONCURRENCY', '4'))
+        # Seconds a single LLM call may take before its section falls back to an error message
+        self.call_timeout = call_timeout or float(os.getenv('LLM_CALL_TIMEOUT', '120'))
+        # Seconds all summaries of one repository may take; no LLM call starts after that
+        self.run_timeout = run_timeout or float(os.getenv('SUMMARY_RUN_TIMEOUT', '600'))
+        
+        self.llm = llm or self._openai(streaming=False)
+        # Streaming costs extra round trips, so it is only used for calls with an on_token callback
+        self.streaming_llm = llm or self._openai(streaming=True)
+        
+        # Persistent response cache shared by every LLM call; None uses the default, False disables caching
+        self.cache = get_llm_cache() if cache is None else cache or None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        
+        # Context sent with each chat question: best matching chunks within a token budget
+        self.chat_context_tokens = int(os.getenv('CHAT_CONTEXT_TOKENS', '3000'))
+        self.chat_top_k = int(os.getenv('CHAT_TOP_K', '8'))
+        self.chat_structure_chars = int(os.getenv('CHAT_STRUCTURE_CHARS', '2000'))
+        
+        # Token budgets for a whole prompt (template included) and for a single file explanation
+        self.prompt_token_budget = int(os.getenv('PROMPT_TOKEN_BUDGET', '3000'))
+        self.file_prompt_token_budget = int(os.getenv('FILE_PROMPT_TOKEN_BUDGET', '1000'))
+        # Files explained per LLM call; 1 sends one prompt per file
+        self.file_batch_size = int(os.getenv('FILE_BATCH_SIZE', '4'))
+        self.count_tokens = count_tokens
+        self.prompt_tokens = {}  # Tokens of each prompt sent to the LLM, by section
+        self.timer = StageTimer()  # Time spent waiting on the LLM
+    
+    def _openai(self, streaming):
+        return OpenAI(
             openai_api_key=os.getenv('OPENAI_API_KEY'),
             temperature=0.3,
-            max_tokens=1000
+            max_tokens=1000,
+            request_timeout=self.call_timeout,
+            streaming=streaming
         )
     
-    def generate_summaries(self, repo_data):
-        """Generate AI-powered summaries for different aspects of the repository"""
+    def generate_summaries(self, repo_data, on_section=None, on_token=None):
+        """
+        Generate AI-powered summaries for different aspects of the repository.
+        on_section(key, value) is called as each summary is ready; file explanations
+        arrive one at a time as ('file_explanations', {file_path: explanation}).
+        on_token(key, token) receives streamed LLM tokens of the top-level sections.
+        """
         summaries = {}
+        notify = on_section or (lambda key, value: None)
+        self.prompt_tokens = {}
+        self.timer = StageTimer()
+        self._local.deadline = time.monotonic() + self.run_timeout
         
         try:
+            if self.max_concurrency > 1:
+                return self._generate_summaries_concurrently(repo_data, notify, on_token)
+            
             # Project overview summary
-            summaries['project_overview'] = self._generate_project_overview(repo_data)
+            summaries['project_overview'] = self._stream_tokens(
+                'project_overview', on_token, self._generate_project_overview, repo_data)
+            notify('project_overview', summaries['project_overview'])
             
             # Tech stack explanation
-            summaries['tech_stack_explanation'] = self._explain_tech_stack(repo_data)
+            summaries['tech_stack_explanation'] = self._stream_tokens(
+                'tech_stack_explanation', on_token, self._explain_tech_stack, repo_data)
+            notify('tech_stack_explanation', summaries['tech_stack_explanation'])
             
             # Installation instructions
-            summaries['installation_guide'] = self._generate_installation_guide(repo_data)
+            summaries['installation_guide'] = self._stream_tokens(
+                'installation_guide', on_token, self._generate_installation_guide, repo_data)
+            notify('installation_guide', summaries['installation_guide'])
             
             # File explanations
-            summaries['file_explanations'] = self._explain_key_files(repo_data)
+            file_cache_stats = {'reused': 0, 'regenerated': 0}
+            summaries['file_explanations'] = self._explain_key_files(repo_data, file_cache_stats, notify)
+            summaries['file_cache_stats'] = file_cache_stats
             
             # Folder structure explanation
-            summaries['structure_explanation'] = self._explain_folder_structure(repo_data)
+            summaries['structure_explanation'] = self._stream_tokens(
+                'structure_explanation', on_token, self._explain_folder_structure, repo_data)
+            notify('structure_explanation', summaries['structure_explanation'])
+            
+            summaries['prompt_tokens'] = self._prompt_token_report()
+            summaries['timings'] = self.timer.report()
             
         except Exception as e:
             summaries['error'] = f"Error generating summaries: {str(e)}"
+        finally:
+            self._local.deadline = None
         
         return summaries
     
+    def _generate_summaries_concurrently(self, repo_data, notify, on_token=None):
+        """Generate all summary sections and file explanations on a thread pool"""
+        sections = [
+            ('project_overview', self._generate_project_overview, "Could not generate project overview"),
+            ('tech_stack_explanation', self._explain_tech_stack, "Could not explain tech stack"),
+            ('installation_guide', self._generate_installation_guide, "Could not generate installation guide"),
+            ('structure_explanation', self._explain_folder_structure, "Could not explain folder structure"),
+        ]
+        files = self._files_to_explain(repo_data)
+        chain = self._file_explanation_chain()
+        batch_chain = self._file_batch_chain()
+        batches = self._file_batches(chain, repo_data, files)
+        file_cache_stats = {'reused': 0, 'regenerated': 0}
+        
+        tasks = [(key, self._stream_tokens, (key, on_token, func, repo_data)) for key, func, _ in sections]
+        tasks += [(('batch', index), self._explain_batch, (chain, batch_chain, repo_data, batch, file_cache_stats))
+                  for index, batch in enumerate(batches)]
+        
+        # Report each result as soon as it completes, in whatever order that happens
+        error_messages = {key: error_message for key, _, error_message in sections}
+        def on_result(key, result):
+            if isinstance(key, tuple):
+                for file_path, _ in batches[key[1]]:
+                    notify('file_explanations', {file_path: self._file_result(result, file_path)})
+            else:
+                notify(key, self._result_or_error(result, error_messages[key]))
+        
+        results = self._run_concurrently(tasks, on_result)
+        
+        # Assemble in the same key order as the sequential path
+        summaries = {}
+        for key, _, error_message in sections[:3]:
+            summaries[key] = self._result_or_error(results[key], error_message)
+        summaries['file_explanations'] = {
+            file_path: self._file_result(results[('batch', index)], file_path)
+            for index, batch in enumerate(batches) for file_path, _ in batch
+        }
+        summaries['file_cache_stats'] = file_cache_stats
+        key, _, error_message = sections[3]
+        summaries[key] = self._result_or_error(results[key], error_message)
+        summaries['prompt_tokens'] = self._prompt_token_report()
+        summaries['timings'] = self.timer.report()
+        
+        return summaries
+    
+    def _run_concurrently(self, tasks, on_result=None):
+        """
+        Run (key, func, args) tasks with bounded concurrency until the run deadline. Tasks
+        still pending then time out; their threads start no further LLM calls (see _call_llm).
+        """
+        results = {}
+        deadline = getattr(self._local, 'deadline', None) or time.monotonic() + self.run_timeout
+        
+        def run(func, args):
+            self._local.deadline = deadline
+            try:
+                return func(*args)
+            finally:
+                self._local.deadline = None
+        
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        try:
+            futures = {executor.submit(run, func, args): key for key, func, args in tasks}
+            pending = set(futures)
+            
+            while pending:
+                done, pending = wait(pending, timeout=max(min(deadline - time.monotonic(), 0.1), 0),
+                                     return_when=FIRST_COMPLETED)
+                
+                for future in done:
+                    key = futures[future]
+                    try:
+                        results[key] = future.result()
+                    except Exception as e:
+                        results[key] = e
+                    if on_result:
+                        on_result(key, results[key])
+                
+                if pending and time.monotonic() >= deadline:
+                    for future in pending:
+                        key = futures[future]
+                        results[key] = TimeoutError(f"summaries timed out after {self.run_timeout:g}s")
+                        if on_result:
+                            on_result(key, results[key])
+                    pending = set()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        return results
+    
+    def _result_or_error(self, result, error_message):
+        """Turn a task result into section text, formatting failures like the sequential path"""
+        if isinstance(result, Exception):
+            return f"{error_message}: {str(result)}"
+        return result
+    
+    def _file_result(self, result, file_path):
+        """Pick one file's explanation out of a batch task result"""
+        if isinstance(result, Exception):
+            return self._result_or_error(result, "Could not explain file")
+        return result[file_path]
+    
     def _generate_project_overview(self, repo_data):
         """Generate a comprehensive project overview"""
         prompt_template = PromptTemplate(
-            input_variables=["repo_name", "readme_content", "tech_stack", "file_structure"],
+            input_variables=["repo_name", "readme_content", "tech_stack", "file_structure", "code_outline"],
             template="""
             Analyze this GitHub repository and provide a comprehensive project overview:
 
@@ -53,6 +234,9 @@ class RepoSummarizer:
             Key Files Structure:
             {file_structure}
             
+            Code Outline (classes and functions per source file):
+            {code_outline}
+            
             Please provide:
             1. A clear, concise description of what this project does
             2. The main purpose and goals of the project
@@ -65,16 +249,23 @@ class RepoSummarizer:
         
         chain = LLMChain(llm=self.llm, prompt=prompt_template)
         
-        # Prepare input data
-        readme_content = self._get_readme_content(repo_data)
-        file_structure = self._format_file_structure(repo_data['key_files'])
+        # Prepare input data, giving the README most of the budget
+        tech_stack = ', '.join(repo_data['tech_stack'])
+        packer = PromptPacker(self._input_budget(chain, repo_data['name'], tech_stack), self.count_tokens)
+        packer.add('readme_content', self._get_readme_content(repo_data), weight=4)
+        packer.add('file_structure', self._format_file_structure(repo_data['key_files']), weight=1)
+        packer.add('code_outline', self._format_code_outline(repo_data), weight=2)
+        packed = packer.pack()
         
         try:
-            result = chain.run(
+            result = self._run_chain(
+                chain,
+                'project_overview',
                 repo_name=repo_data['name'],
-                readme_content=readme_content,
-                tech_stack=', '.join(repo_data['tech_stack']),
-                file_structure=file_structure
+                readme_content=packed['readme_content'],
+                tech_stack=tech_stack,
+                file_structure=packed['file_structure'],
+                code_outline=packed['code_outline']
             )
             return result.strip()
         except Exception as e:
@@ -104,11 +295,20 @@ class RepoSummarizer:
         
         chain = LLMChain(llm=self.llm, prompt=prompt_template)
         
-        package_files = self._get_package_files_content(repo_data)
+        tech_stack = ', '.join(repo_data['tech_stack'])
+        budget = self._input_budget(chain, tech_stack)
+        
+        # Parsed manifests say the same as the raw files in a fraction of the tokens
+        if repo_data.get('dependencies'):
+            package_files = truncate_tokens(format_dependency_summary(repo_data['dependencies']), budget, self.count_tokens)
+        else:
+            package_files = self._get_package_files_content(repo_data, budget)
         
         try:
-            result = chain.run(
-                tech_stack=', '.join(repo_data['tech_stack']),
+            result = self._run_chain(
+                chain,
+                'tech_stack_explanation',
+                tech_stack=tech_stack,
                 package_files=package_files
             )
             return result.strip()
@@ -143,12 +343,22 @@ class RepoSummarizer:
         
         chain = LLMChain(llm=self.llm, prompt=prompt_template)
         
-        config_files = self._get_config_files_content(repo_data)
-        readme_content = self._get_readme_content(repo_data)
+        tech_stack = ', '.join(repo_data['tech_stack'])
+        budget = self._input_budget(chain, tech_stack)
+        
+        # The README usually holds the real instructions, so it outranks the config files
+        packer = PromptPacker(budget, self.count_tokens)
+        packer.add('readme_content', self._get_readme_content(repo_data), weight=4)
+        self._add_files(packer, self._matching_files(repo_data, CONFIG_FILE_PATTERNS, ignore_case=True))
+        packed = packer.pack()
+        readme_content = packed.pop('readme_content')
+        config_files = "".join(packed.values()) or "No configuration files found"
         
         try:
-            result = chain.run(
-                tech_stack=', '.join(repo_data['tech_stack']),
+            result = self._run_chain(
+                chain,
+                'installation_guide',
+                tech_stack=tech_stack,
                 config_files=config_files,
                 readme_content=readme_content
             )
@@ -156,10 +366,24 @@ class RepoSummarizer:
         except Exception as e:
             return f"Could not generate installation guide: {str(e)}"
     
-    def _explain_key_files(self, repo_data):
+    def _explain_key_files(self, repo_data, file_cache_stats=None, notify=None):
         """Explain the purpose of key files in the repository"""
         file_explanations = {}
         
+        chain = self._file_explanation_chain()
+        batch_chain = self._file_batch_chain()
+        
+        for batch in self._file_batches(chain, repo_data, self._files_to_explain(repo_data)):
+            explanations = self._explain_batch(chain, batch_chain, repo_data, batch, file_cache_stats)
+            for file_path, _ in batch:
+                file_explanations[file_path] = explanations[file_path]
+                if notify:
+                    notify('file_explanations', {file_path: file_explanations[file_path]})
+        
+        return file_explanations
+    
+    def _file_explanation_chain(self):
+        """Build the chain used to explain a single file"""
         prompt_template = PromptTemplate(
             input_variables=["file_name", "file_content", "tech_stack"],
             template="""
@@ -179,26 +403,198 @@ class RepoSummarizer:
             """
         )
         
-        chain = LLMChain(llm=self.llm, prompt=prompt_template)
+        return LLMChain(llm=self.llm, prompt=prompt_template)
+    
+    def _files_to_explain(self, repo_data):
+        """List (path, content) pairs of files with substantial content"""
+        return [(file_path, content) for file_path, content in repo_data['file_contents'].items()
+                if len(content) > 100]
+    
+    def _file_batch_chain(self):
+        """Build the chain used to explain several files in one call"""
+        prompt_template = PromptTemplate(
+            input_variables=["files", "tech_stack"],
+            template="""
+            Explain the purpose and functionality of each of these files in the context of a {tech_stack} project:
+            
+            {files}
+            
+            For each file, please provide:
+            1. What this file does and its purpose
+            2. Key components or functions it contains
+            3. How it fits into the overall project architecture
+            4. Any important patterns or practices used
+            
+            Keep each explanation concise but informative.
+            Respond with only a JSON object that maps each file path, exactly as given above,
+            to its explanation as a Markdown string.
+            """
+        )
         
-        for file_path, content in repo_data['file_contents'].items():
-            if len(content) > 100:  # Only explain files with substantial content
-                try:
-                    explanation = chain.run(
-                        file_name=file_path,
-                        file_content=content[:2000],  # Limit content length
-                        tech_stack=', '.join(repo_data['tech_stack'])
-                    )
-                    file_explanations[file_path] = explanation.strip()
-                except Exception as e:
-                    file_explanations[file_path] = f"Could not explain file: {str(e)}"
+        return LLMChain(llm=self.llm, prompt=prompt_template)
+    
+    def _file_batches(self, chain, repo_data, files):
+        """
+        Group (path, content) pairs into batches of up to file_batch_size files that fit
+        in one prompt. Content is cut to the single-file budget so every batch can fall back.
+        """
+        tech_stack = ', '.join(repo_data['tech_stack'])
+        batch_budget = self._input_budget(self._file_batch_chain(), tech_stack)
         
-        return file_explanations
+        batches = []
+        batch_tokens = 0
+        for file_path, content in files:
+            outline = self._file_outline(repo_data, file_path, content)
+            content = self._file_content(chain, file_path, content, tech_stack, outline)
+            tokens = self.count_tokens(self._format_batch_file(file_path, content))
+            
+            if (not batches or len(batches[-1]) >= self.file_batch_size or
+                    batch_tokens + tokens > batch_budget):
+                batches.append([])
+                batch_tokens = 0
+            batches[-1].append((file_path, content))
+            batch_tokens += tokens
+        
+        return batches
+    
+    def _explain_batch(self, chain, batch_chain, repo_data, batch, file_cache_stats=None):
+        """
+        Explain a batch of files with one LLM call, returning {file_path: explanation}.
+        Files missing from the parsed response are explained one at a time.
+        """
+        tech_stack = ', '.join(repo_data['tech_stack'])
+        explanations = {}
+        pending = []
+        
+        for file_path, content in batch:
+            blob_key = self._file_blob_key(chain, repo_data, file_path)
+            explanation = self._cache_get(blob_key) if blob_key else None
+            if explanation is not None:
+                self._count_file_cache(file_cache_stats, 'reused')
+                explanations[file_path] = explanation
+            else:
+                pending.append((file_path, content, blob_key))
+        
+        if len(pending) > 1:
+            try:
+                response = self._run_chain(
+                    batch_chain,
+                    ('batch', ', '.join(file_path for file_path, _, _ in pending)),
+                    files="\n".join(self._format_batch_file(file_path, content) for file_path, content, _ in pending),
+                    tech_stack=tech_stack
+                )
+                parsed = self._parse_batch_response(response)
+            except Exception:
+                parsed = {}
+            
+            for file_path, _, blob_key in pending:
+                explanation = parsed.get(file_path, '').strip()
+                if explanation:
+                    explanations[file_path] = explanation
+                    self._count_file_cache(file_cache_stats, 'regenerated')
+                    if blob_key:
+                        self._cache_set(blob_key, explanation)
+        
+        for file_path, content, _ in pending:
+            if file_path not in explanations:
+                explanations[file_path] = self._explain_file(chain, repo_data, file_path, content, file_cache_stats)
+        
+        return explanations
+    
+    def _format_batch_file(self, file_path, content):
+        return f"File: {file_path}\nContent:\n{content}\n"
+    
+    def _parse_batch_response(self, response):
+        """Read {file_path: explanation} from a batch response, salvaging what it can from broken JSON"""
+        start, end = response.find('{'), response.rfind('}')
+        if start != -1 and end > start:
+            try:
+                data = json.loads(response[start:end + 1])
+                if isinstance(data, dict):
+                    return {str(key): value for key, value in data.items() if isinstance(value, str)}
+            except ValueError:
+                pass
+        
+        # Malformed or cut off by the token limit: keep every complete "path": "explanation" pair
+        explanations = {}
+        for key, value in JSON_PAIR_PATTERN.findall(response):
+            try:
+                explanations[json.loads(f'"{key}"')] = json.loads(f'"{value}"')
+            except ValueError:
+                continue
+        return explanations
+    
+    def _explain_file(self, chain, repo_data, file_path, content, file_cache_stats=None):
+        """
+        Explain a single file, reusing the explanation of an unchanged blob. content is
+        already packed for the prompt by _file_content, as _file_batches stores it.
+        """
+        tech_stack = ', '.join(repo_data['tech_stack'])
+        
+        blob_key = self._file_blob_key(chain, repo_data, file_path)
+        if blob_key is not None:
+            explanation = self._cache_get(blob_key)
+            if explanation is not None:
+                self._count_file_cache(file_cache_stats, 'reused')
+                return explanation
+        
+        try:
+            inputs = {
+                'file_name': file_path,
+                'file_content': content,
+                'tech_stack': tech_stack
+            }
+            if blob_key is None:
+                explanation = self._run_chain(chain, ('file', file_path), **inputs).strip()
+            else:
+                explanation = self._call_llm(chain, ('file', file_path), inputs).strip()
+                self._cache_set(blob_key, explanation)
+            
+            self._count_file_cache(file_cache_stats, 'regenerated')
+            return explanation
+        except Exception as e:
+            return f"Could not explain file: {str(e)}"
+    
+    def _file_blob_key(self, chain, repo_data, file_path):
+        """
+        Cache key of a file explanation. Unchanged files keep their git blob SHA across
+        commits, so key on that instead of the prompt. The path is part of the key since
+        explanations name their file. None when caching is unavailable.
+        """
+        blob_sha = repo_data.get('file_hashes', {}).get(file_path)
+        if self.cache is None or not blob_sha:
+            return None
+        return self._cache_key(chain, {'blob_sha': blob_sha, 'path': file_path,
+                                       'tech_stack': ', '.join(repo_data['tech_stack'])})
+    
+    def _file_content(self, chain, file_path, content, tech_stack, outline=None):
+        """Cut file content to what fits in a single-file explanation prompt, led by the file's outline if given"""
+        budget = self._input_budget(chain, file_path, tech_stack, budget=self.file_prompt_token_budget)
+        if outline is None:
+            return truncate_tokens(content, budget, self.count_tokens)
+        
+        # The outline covers the whole file where the content is only its start; give it at most half
+        outline_text = truncate_tokens(format_outline(file_path, outline), budget // 2, self.count_tokens)
+        outline_text = f"Outline:\n{outline_text}\nSource (start of file):\n"
+        return outline_text + truncate_tokens(content, budget - self.count_tokens(outline_text), self.count_tokens)
+    
+    def _file_outline(self, repo_data, file_path, content):
+        """Outline of a file whose content was only read in part, or None"""
+        outline = repo_data.get('outlines', {}).get(file_path)
+        if outline is None or content.count('\n') + 1 >= outline['lines']:
+            return None  # The content already shows everything the outline would
+        return outline
+    
+    def _count_file_cache(self, file_cache_stats, outcome):
+        """Record whether a file explanation was reused or regenerated"""
+        if file_cache_stats is not None:
+            with self._lock:
+                file_cache_stats[outcome] += 1
     
     def _explain_folder_structure(self, repo_data):
         """Explain the folder structure and organization"""
         prompt_template = PromptTemplate(
-            input_variables=["folder_structure", "tech_stack", "project_type"],
+            input_variables=["folder_structure", "tech_stack"],
             template="""
             Explain the folder structure and organization of this {tech_stack} project:
             
@@ -217,19 +613,22 @@ class RepoSummarizer:
         
         chain = LLMChain(llm=self.llm, prompt=prompt_template)
         
-        structure_text = self._format_folder_structure(repo_data['structure'])
+        tech_stack = ', '.join(repo_data['tech_stack'])
+        structure_text = truncate_tokens(self._format_folder_structure(repo_data['structure']),
+                                         self._input_budget(chain, tech_stack), self.count_tokens)
         
         try:
-            result = chain.run(
+            result = self._run_chain(
+                chain,
+                'structure_explanation',
                 folder_structure=structure_text,
-                tech_stack=', '.join(repo_data['tech_stack']),
-                project_type=repo_data['tech_stack'][0] if repo_data['tech_stack'] else 'Unknown'
+                tech_stack=tech_stack
             )
             return result.strip()
         except Exception as e:
             return f"Could not explain folder structure: {str(e)}"
     
-    def answer_question(self, repo_data, question):
+    def answer_question(self, repo_data, question, chunk_index=None):
         """Answer specific questions about the repository"""
         prompt_template = PromptTemplate(
             input_variables=["question", "repo_name", "tech_stack", "file_contents", "structure"],
@@ -252,14 +651,15 @@ class RepoSummarizer:
         chain = LLMChain(llm=self.llm, prompt=prompt_template)
         
         # Prepare context information
-        file_contents_summary = ""
-        for file_path, content in repo_data['file_contents'].items():
-            file_contents_summary += f"\n{file_path}:\n{content[:1000]}...\n"
+        file_contents_summary = self._get_chat_context(repo_data, question, chunk_index)
         
-        structure_summary = self._format_folder_structure(repo_data['structure'])
+        structure_summary = self._truncate_lines(
+            self._format_folder_structure(repo_data['structure']), self.chat_structure_chars)
         
         try:
-            result = chain.run(
+            result = self._run_chain(
+                chain,
+                'answer_question',
                 question=question,
                 repo_name=repo_data['name'],
                 tech_stack=', '.join(repo_data['tech_stack']),
@@ -271,6 +671,116 @@ class RepoSummarizer:
             return f"Could not answer question: {str(e)}"
     
     # Helper methods
+    def _get_chat_context(self, repo_data, question, chunk_index=None):
+        """Retrieve the repository chunks most relevant to a question"""
+        if chunk_index is None and repo_data.get('chunks'):
+            chunk_index = ChunkIndex(repo_data['chunks'])
+        
+        chunks = []
+        if chunk_index:
+            chunks = chunk_index.select(question, self.chat_context_tokens, self.chat_top_k, self.count_tokens)
+        if chunks:
+            return "".join(
+                f"\n{chunk['path']} (lines {chunk['start_line']}-{chunk['end_line']}):\n{chunk['text']}\n"
+                for chunk in chunks
+            )
+        
+        # Nothing matched (or no index): fall back to the important files, README first
+        packer = PromptPacker(self.chat_context_tokens, self.count_tokens)
+        self._add_files(packer, repo_data['file_contents'].items())
+        return "".join(packer.pack().values())
+    
+    def _truncate_lines(self, text, max_chars):
+        """Cut text to at most max_chars, ending on a line boundary"""
+        if len(text) <= max_chars:
+            return text
+        cut = text.rfind('\n', 0, max_chars)
+        return text[:cut if cut > 0 else max_chars] + "\n..."
+    
+    def _run_chain(self, chain, prompt_name=None, **inputs):
+        """
+        Run an LLM chain, serving repeated prompts from the response cache.
+        Prompts actually sent to the LLM are counted under prompt_name.
+        """
+        if self.cache is None:
+            return self._call_llm(chain, prompt_name, inputs)
+        
+        key = self._cache_key(chain, inputs)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        
+        result = self._call_llm(chain, prompt_name, inputs)
+        self._cache_set(key, result)
+        
+        return result
+    
+    def _call_llm(self, chain, prompt_name, inputs):
+        """Send a prompt to the LLM, recording its duration and tokens"""
+        # Abandoned tasks keep running on their threads; stop them spending tokens
+        deadline = getattr(self._local, 'deadline', None)
+        if deadline is not None and time.monotonic() >= deadline:
+            raise TimeoutError(f"summaries timed out after {self.run_timeout:g}s")
+        
+        prompt_tokens = self.count_tokens(chain.prompt.format(**inputs))
+        self._record_prompt_tokens(prompt_name, prompt_tokens)
+        
+        callbacks = self._token_callbacks()
+        if callbacks:
+            chain = LLMChain(llm=self.streaming_llm, prompt=chain.prompt)
+        
+        with self.timer.stage('summarize.llm'):
+            result = chain.run(callbacks=callbacks, **inputs)
+        
+        # File and batch prompts are named (kind, path); label by kind to keep the series few
+        LLM_CALLS.inc(kind=prompt_name[0] if isinstance(prompt_name, tuple) else prompt_name)
+        LLM_TOKENS.inc(prompt_tokens, direction='in')
+        LLM_TOKENS.inc(self.count_tokens(result), direction='out')
+        return result
+    
+    def _stream_tokens(self, key, on_token, func, *args):
+        """Call func, forwarding tokens of the LLM calls it makes on this thread to on_token(key, token)"""
+        self._local.section = key
+        self._local.on_token = on_token
+        try:
+            return func(*args)
+        finally:
+            self._local.section = None
+            self._local.on_token = None
+    
+    def _token_callbacks(self):
+        """Callbacks forwarding streamed tokens for the section running on this thread, if any"""
+        on_token = getattr(self._local, 'on_token', None)
+        if on_token is None:
+            return None
+        return [TokenForwarder(self._local.section, on_token)]
+    
+    def _cache_key(self, chain, inputs):
+        """Build the response cache key for a chain and its inputs"""
+        return LLMCache.make_key(
+            chain.prompt.template,
+            inputs,
+            getattr(self.llm, 'model_name', type(self.llm).__name__),
+            getattr(self.llm, 'temperature', None),
+            getattr(self.llm, 'max_tokens', None)
+        )
+    
+    def _cache_get(self, key):
+        """Look up a cached response, treating cache errors as misses"""
+        try:
+            value = self.cache.get(key)
+        except Exception:
+            value = None
+        LLM_CACHE_REQUESTS.inc(result='miss' if value is None else 'hit')
+        return value
+    
+    def _cache_set(self, key, value):
+        """Store a response in the cache"""
+        try:
+            self.cache.set(key, value)
+        except Exception:
+            pass  # A broken cache must never fail the analysis
+    
     def _get_readme_content(self, repo_data):
         """Extract README content"""
         for file_path, content in repo_data['file_contents'].items():
@@ -278,27 +788,59 @@ class RepoSummarizer:
                 return content
         return "No README file found"
     
-    def _get_package_files_content(self, repo_data):
-        """Get content of package/config files"""
-        package_files = ""
-        package_patterns = ['package.json', 'requirements.txt', 'setup.py', 'pom.xml', 'Cargo.toml']
-        
-        for file_path, content in repo_data['file_contents'].items():
-            if any(pattern in file_path for pattern in package_patterns):
-                package_files += f"\n{file_path}:\n{content}\n"
+    def _get_package_files_content(self, repo_data, budget):
+        """Get content of package/config files, packed into a token budget"""
+        packer = PromptPacker(budget, self.count_tokens)
+        self._add_files(packer, self._matching_files(repo_data, PACKAGE_FILE_PATTERNS))
         
-        return package_files or "No package files found"
+        return "".join(packer.pack().values()) or "No package files found"
     
-    def _get_config_files_content(self, repo_data):
-        """Get content of configuration files"""
-        config_files = ""
-        config_patterns = ['dockerfile', 'docker-compose', '.env', 'config', 'settings']
-        
-        for file_path, content in repo_data['file_contents'].items():
-            if any(pattern in file_path.lower() for pattern in config_patterns):
-                config_files += f"\n{file_path}:\n{content}\n"
+    def _matching_files(self, repo_data, patterns, ignore_case=False):
+        """List (path, content) pairs of files whose path contains one of the patterns"""
+        return [(file_path, content) for file_path, content in repo_data['file_contents'].items()
+                if any(pattern in (file_path.lower() if ignore_case else file_path) for pattern in patterns)]
+    
+    def _add_files(self, packer, files):
+        """Add files to a prompt packer, weighted READMEs first, then manifests, then the rest"""
+        for file_path, content in files:
+            packer.add(file_path, f"\n{file_path}:\n{content}\n", weight=self._content_weight(file_path))
+    
+    def _content_weight(self, file_path):
+        """Share of a prompt budget a file gets relative to other files"""
+        if 'readme' in file_path.lower():
+            return 4
+        if any(pattern in file_path for pattern in PACKAGE_FILE_PATTERNS):
+            return 2
+        return 1
+    
+    def _input_budget(self, chain, *fixed_inputs, budget=None):
+        """Tokens left for variable prompt inputs after the template and fixed inputs"""
+        used = self.count_tokens(chain.prompt.template) + sum(self.count_tokens(text) for text in fixed_inputs)
+        return max((budget or self.prompt_token_budget) - used, 0)
+    
+    def _record_prompt_tokens(self, name, tokens):
+        """Count the tokens of a prompt about to be sent to the LLM"""
+        if name is None:
+            return
+        with self._lock:
+            self.prompt_tokens[name] = tokens
+    
+    def _prompt_token_report(self):
+        """Summarize prompt tokens per section, per file and in total"""
+        with self._lock:
+            report = {'sections': {}, 'files': {}, 'batches': {}, 'total': 0}
+            for name, tokens in self.prompt_tokens.items():
+                if isinstance(name, tuple):
+                    report['batches' if name[0] == 'batch' else 'files'][name[1]] = tokens
+                else:
+                    report['sections'][name] = tokens
+                report['total'] += tokens
         
-        return config_files or "No configuration files found"
+        # Concurrent calls finish in any order; sort so reports of the same repository compare equal
+        report['sections'] = dict(sorted(report['sections'].items()))
+        report['files'] = dict(sorted(report['files'].items()))
+        report['batches'] = dict(sorted(report['batches'].items()))
+        return report
     
     def _format_file_structure(self, key_files):
         """Format key files for display"""
@@ -311,11 +853,25 @@ class RepoSummarizer:
         
         return formatted
     
-    def _format_folder_structure(self, structure, indent=0):
-        """Format folder structure for display"""
-        formatted = ""
-        for name, content in structure.items():
-            formatted += "  " * indent + f"- {name}\n"
-            if isinstance(content, dict):
-                formatted += self._format_folder_structure(content, indent + 1)
-        return formatted
+    def _format_code_outline(self, repo_data):
+        """Outlines of the source files, shallowest first since the prompt packer keeps the start"""
+        outlines = repo_data.get('outlines') or {}
+        if not outlines:
+            return "No source files outlined"
+        ordered = sorted(outlines.items(), key=lambda item: item[0].count(os.sep))
+        return format_outlines(dict(ordered))
+    
+    def _format_folder_structure(self, structure):
+        """Format folder structure for display, large directories summarised"""
+        return render_tree(structure, style='list')
+
+
+class TokenForwarder(BaseCallbackHandler):
+    """LangChain callback handler passing each new LLM token to on_token(key, token)"""
+    
+    def __init__(self, key, on_token):
+        self.key = key
+        self.on_token = on_token
+    
+    def on_llm_new_token(self, token, **kwargs):
+        self.on_token(self.key, token)
@@ -0,0 +1,133 @@
+import re
+import fnmatch
+from collections import namedtuple
+from analyzer.manifests import declared_dependency_names
+
+# How a technology is recognised:
+#   'filename'   - target is an exact file name
+#   'extension'  - target is a file extension
+#   'dependency' - target is a package ecosystem (npm, pypi, go, cargo, maven), pattern a dependency name
+#   'content'    - target is a file name glob, pattern a regex searched in the start of matching files
+TechRule = namedtuple('TechRule', ['tech', 'kind', 'target', 'pattern'], defaults=(None,))
+
+# A YAML document with top-level apiVersion and kind keys, in either order
+KUBERNETES_MANIFEST = r'(?ms)\A(?=.*^apiVersion:[ \t]*\S)(?=.*^kind:[ \t]*[A-Z])'
+
+TECH_STACK_RULES = [
+    TechRule('Python', 'extension', '.py'),
+    TechRule('Python', 'filename', 'requirements.txt'),
+    TechRule('Python', 'filename', 'setup.py'),
+    TechRule('Python', 'filename', 'pyproject.toml'),
+    TechRule('Python', 'filename', 'Pipfile'),
+    TechRule('JavaScript/Node.js', 'extension', '.js'),
+    TechRule('JavaScript/Node.js', 'extension', '.jsx'),
+    TechRule('JavaScript/Node.js', 'filename', 'package.json'),
+    TechRule('JavaScript/Node.js', 'filename', '.npmrc'),
+    TechRule('TypeScript', 'extension', '.ts'),
+    TechRule('TypeScript', 'extension', '.tsx'),
+    TechRule('TypeScript', 'filename', 'tsconfig.json'),
+    TechRule('React', 'dependency', 'npm', 'react'),
+    TechRule('Next.js', 'dependency', 'npm', 'next'),
+    TechRule('Vue.js', 'dependency', 'npm', 'vue'),
+    TechRule('Angular', 'dependency', 'npm', '@angular/core'),
+    TechRule('Angular', 'filename', 'angular.json'),
+    TechRule('Express.js', 'dependency', 'npm', 'express'),
+    TechRule('Flask', 'dependency', 'pypi', 'flask'),
+    TechRule('Django', 'dependency', 'pypi', 'django'),
+    TechRule('FastAPI', 'dependency', 'pypi', 'fastapi'),
+    TechRule('LangChain', 'dependency', 'pypi', 'langchain'),
+    TechRule('Java', 'extension', '.java'),
+    TechRule('Java', 'filename', 'pom.xml'),
+    TechRule('Java', 'filename', 'build.gradle'),
+    TechRule('Spring Boot', 'dependency', 'maven', 'org.springframework.boot:spring-boot-starter'),
+    TechRule('Spring Boot', 'dependency', 'maven', 'org.springframework.boot:spring-boot-starter-web'),
+    TechRule('C#', 'extension', '.cs'),
+    TechRule('C#', 'extension', '.csproj'),
+    TechRule('C#', 'extension', '.sln'),
+    TechRule('Go', 'extension', '.go'),
+    TechRule('Go', 'filename', 'go.mod'),
+    TechRule('Go', 'filename', 'go.sum'),
+    TechRule('Rust', 'extension', '.rs'),
+    TechRule('Rust', 'filename', 'Cargo.toml'),
+    TechRule('PHP', 'extension', '.php'),
+    TechRule('PHP', 'filename', 'composer.json'),
+    TechRule('Ruby', 'extension', '.rb'),
+    TechRule('Ruby', 'filename', 'Gemfile'),
+    TechRule('Docker', 'filename', 'Dockerfile'),
+    TechRule('Docker', 'filename', 'docker-compose.yml'),
+    TechRule('Kubernetes', 'content', '*.yaml', KUBERNETES_MANIFEST),
+    TechRule('Kubernetes', 'content', '*.yml', KUBERNETES_MANIFEST),
+    TechRule('Terraform', 'extension', '.tf'),
+]
+
+
+class TechStackIndex:
+    """Tech stack rules compiled into lookup tables so each file is checked in constant time"""
+
+    def __init__(self, rules=TECH_STACK_RULES, content_bytes=8192, content_max_files=100):
+        self.content_bytes = content_bytes  # Bytes of each file searched by content rules
+        self.content_max_files = content_max_files  # Files read per content rule before giving up
+        self.techs = list(dict.fromkeys(rule.tech for rule in rules))  # Output order
+
+        self.by_filename = {}
+        self.by_extension = {}
+        self.dependencies = {}  # ecosystem -> [(dependency, tech)]
+        self.content_by_extension = {}  # extension -> [(content regex, tech)] for '*.ext' globs
+        self.content_rules = []  # (file name regex, content regex, tech) for any other glob
+
+        for rule in rules:
+            if rule.kind == 'filename':
+                self.by_filename.setdefault(rule.target, set()).add(rule.tech)
+            elif rule.kind == 'extension':
+                self.by_extension.setdefault(rule.target, set()).add(rule.tech)
+            elif rule.kind == 'dependency':
+                self.dependencies.setdefault(rule.target, []).append((rule.pattern, rule.tech))
+            elif rule.kind == 'content':
+                if re.fullmatch(r'\*\.[^*?\[\]]+', rule.target):
+                    self.content_by_extension.setdefault(rule.target[1:], []).append((re.compile(rule.pattern), rule.tech))
+                else:
+                    self.content_rules.append((re.compile(fnmatch.translate(rule.target)), re.compile(rule.pattern), rule.tech))
+            else:
+                raise ValueError(f"Unknown tech stack rule kind: {rule.kind}")
+
+    def detect(self, file_index, manifests=()):
+        """
+        Return the technologies found in the file index and in the dependencies
+        of the parsed manifests (see manifests.extract_dependencies), in rule order.
+        """
+        detected = set()
+        declared = declared_dependency_names(manifests)
+        for ecosystem, rules in self.dependencies.items():
+            for dependency, tech in rules:
+                if dependency in declared.get(ecosystem, ()):
+                    detected.add(tech)
+
+        content_reads = {}  # tech -> files searched so far
+
+        for entry in file_index:
+            techs = self.by_filename.get(entry.name)
+            if techs:
+                detected |= techs
+            techs = self.by_extension.get(entry.extension)
+            if techs:
+                detected |= techs
+
+            content_rules = self.content_by_extension.get(entry.extension, [])
+            if self.content_rules:
+                content_rules = content_rules + [(content_pattern, tech) for name_pattern, content_pattern, tech
+                                                 in self.content_rules if name_pattern.match(entry.name)]
+            for content_pattern, tech in content_rules:
+                if tech in detected or content_reads.get(tech, 0) >= self.content_max_files:
+                    continue
+                content_reads[tech] = content_reads.get(tech, 0) + 1
+                if content_pattern.search(self._read_start(entry.path)):
+                    detected.add(tech)
+
+        return [tech for tech in self.techs if tech in detected]
+
+    def _read_start(self, path):
+        try:
+            with open(path, 'rb') as f:
+                return f.read(self.content_bytes).decode('utf-8', errors='ignore')
+        except OSError:
+            return ''
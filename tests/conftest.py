@@ -0,0 +1,121 @@
+import os
+import sys
+import json
+import time
+import types
+import hashlib
+import importlib.util
+import git
+import pytest
+from pydantic.v1 import Field
+from langchain.llms.base import LLM
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The modules import each other as analyzer.<module>; alias the checkout when it has another name
+if importlib.util.find_spec('analyzer') is None:
+    package = types.ModuleType('analyzer')
+    package.__path__ = [ROOT]
+    sys.modules['analyzer'] = package
+
+from analyzer.parser import RepoParser
+
+
+class StubLLM(LLM):
+    """
+    LLM answering each prompt deterministically, after latency seconds, and recording
+    every prompt it is sent. File prompts are answered "Explanation of <path>.", batch
+    file prompts with a JSON object of those answers.
+    """
+    latency: float = 0
+    respond: object = None  # Optional prompt -> response function
+    prompts: list = Field(default_factory=list)
+
+    @property
+    def _llm_type(self):
+        return 'stub'
+
+    def _call(self, prompt, stop=None, run_manager=None, **kwargs):
+        self.prompts.append(prompt)
+        if self.latency:
+            time.sleep(self.latency)
+        if self.respond is not None:
+            return self.respond(prompt)
+        return default_response(prompt)
+
+
+def file_prompt_paths(prompt):
+    return [line.strip()[len('File: '):] for line in prompt.splitlines() if line.strip().startswith('File: ')]
+
+
+def default_response(prompt):
+    file_paths = file_prompt_paths(prompt)
+    if 'JSON object' in prompt and file_paths:
+        return json.dumps({file_path: f"Explanation of {file_path}." for file_path in file_paths})
+    if file_paths:
+        return f"Explanation of {file_paths[0]}."
+    return f"Response {hashlib.sha1(prompt.encode('utf-8')).hexdigest()[:8]}"
+
+
+SAMPLE_FILES = {
+    'README.md': "# Sample\n\nA sample service used by the tests.\n\n"
+                 "## Installation\n\npip install -r requirements.txt\n",
+    'requirements.txt': "flask==2.3.3\nrequests>=2.31\n# Tests\npytest\nblack\ncoverage\nmypy\nruff\nisort\n",
+    'app.py': '"""Flask application serving the sample API."""\nfrom flask import Flask\n\napp = Flask(__name__)\n\n\n'
+              '@app.route("/")\ndef index():\n    """Return a greeting"""\n    return "hello"\n',
+    'main.py': '"""Command-line entry point of the sample service."""\nimport sys\n\n\ndef main(argv):\n'
+               '    """Run the service"""\n    return 0\n\n\n'
+               'if __name__ == "__main__":\n    sys.exit(main(sys.argv))\n',
+    'package.json': json.dumps({'name': 'sample-ui', 'version': '1.0.0', 'scripts': {'start': 'node index.js'},
+                                'dependencies': {'react': '^18.2.0'}}, indent=2),
+    'index.js': "// Front-end entry point rendering the sample UI\nimport React from 'react';\n\n"
+                "export function render(root) {\n  return React.createElement('div', null, 'hello');\n}\n",
+    'src/util.py': 'def helper():\n    return 1\n',
+}
+
+
+def write_files(root, files):
+    for relative_path, content in files.items():
+        path = os.path.join(root, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+    return root
+
+
+@pytest.fixture
+def sample_repo(tmp_path):
+    return write_files(str(tmp_path / 'sample'), SAMPLE_FILES)
+
+
+@pytest.fixture
+def repo_data(sample_repo):
+    return RepoParser(outline_workers=1, outline_cache=False).analyze_repository(sample_repo)
+
+
+def make_bare_repo(root, files, commits=3):
+    """
+    A bare repository with files, a node_modules package and a history of commits,
+    served over file:// so clone depth and filters apply as they would remotely
+    """
+    work = git.Repo.init(os.path.join(root, 'work'))
+    with work.config_writer() as config:
+        config.set_value('user', 'name', 'Test')
+        config.set_value('user', 'email', 'test@example.com')
+    write_files(work.working_tree_dir, dict(files, **{'node_modules/pkg/index.js': 'x' * 200000}))
+    work.git.add(A=True)
+    work.git.commit('-m', 'Initial commit')
+    for number in range(1, commits):
+        with open(os.path.join(work.working_tree_dir, 'README.md'), 'a', encoding='utf-8') as f:
+            f.write(f"\nChange {number}\n")
+        work.git.commit('-a', '-m', f'Change {number}')
+
+    bare_path = os.path.join(root, 'origin.git')
+    git.Repo.clone_from(work.working_tree_dir, bare_path, bare=True)
+    git.Git(bare_path).config('uploadpack.allowFilter', 'true')
+    return 'file://' + bare_path
+
+
+@pytest.fixture
+def bare_repo_url(tmp_path):
+    return make_bare_repo(str(tmp_path / 'origin'), SAMPLE_FILES)
@@ -0,0 +1,53 @@
+from conftest import SAMPLE_FILES, StubLLM, write_files
+from analyzer import benchmark
+from analyzer.parser import RepoParser
+from analyzer.prompt_packer import count_tokens
+from analyzer.summarizer import RepoSummarizer
+
+LONG_README = "# Sample\n\nREADME_START overview of the service.\n\n" + "".join(
+    f"## Section {i}\n\nDetails about part {i} of the sample service and how to use it.\n\n" for i in range(300)
+) + "README_END\n"
+
+LONG_MODULE = "".join(f'def handler_{i}(request):\n    """Handle request {i}"""\n    return {i}\n\n\n'
+                      for i in range(300))
+
+
+def write_large_repo(root):
+    write_files(root, {**SAMPLE_FILES, 'README.md': LONG_README, 'src/handlers.py': LONG_MODULE,
+                       **{f'src/module_{i}.py': LONG_MODULE for i in range(6)}})
+
+
+def test_prompts_stay_within_their_budgets(tmp_path, capsys, monkeypatch):
+    monkeypatch.setenv('OUTLINE_CACHE_ENABLED', 'false')
+    write_large_repo(tmp_path)
+    benchmark.main(['prompts', '--repo', str(tmp_path), '--budget', '600', '--file-budget', '200'])
+
+    rows = {}
+    for line in capsys.readouterr().out.splitlines():
+        if not line.startswith('total'):
+            name, tokens = line.rsplit(None, 1)
+            rows[name] = int(tokens)
+
+    sections = {name: tokens for name, tokens in rows.items() if not name.startswith(('file: ', 'batch: '))}
+    assert set(sections) == {'project_overview', 'tech_stack_explanation', 'installation_guide',
+                             'structure_explanation'}
+    assert all(tokens <= 600 for tokens in sections.values())
+    assert all(tokens <= 200 for name, tokens in rows.items() if name.startswith('file: '))
+    assert all(tokens <= 600 for name, tokens in rows.items() if name.startswith('batch: '))
+
+
+def test_truncation_keeps_the_highest_priority_content(tmp_path):
+    write_large_repo(tmp_path)
+    repo_data = RepoParser(outline_workers=1, outline_cache=False).analyze_repository(str(tmp_path))
+    llm = StubLLM()
+    summarizer = RepoSummarizer(llm=llm, max_concurrency=1, cache=False)
+    summarizer.prompt_token_budget = 600
+
+    summarizer._generate_project_overview(repo_data)
+    prompt = llm.prompts[0]
+    assert count_tokens(prompt) <= 600
+
+    # The README outranks the code outline: its start survives and it gets the larger share
+    readme = prompt[prompt.index('README_START'):prompt.index('Key Files Structure')]
+    assert 'README_END' not in prompt
+    assert count_tokens(readme) > count_tokens(prompt) / 3
@@ -0,0 +1,66 @@
+import json
+import threading
+from conftest import SAMPLE_FILES, StubLLM, make_bare_repo
+from analyzer.cli import BatchRunner
+from analyzer.clone import GitCloner
+from analyzer.summarizer import RepoSummarizer
+
+
+class RecordingCloner(GitCloner):
+    def __init__(self, log):
+        super().__init__()
+        self.log = log
+
+    def clone_repository(self, repo_url, temp_dir, commit=None):
+        self.log.append(('clone', repo_url))
+        return super().clone_repository(repo_url, temp_dir, commit)
+
+
+def make_sources(tmp_path, count):
+    return [make_bare_repo(str(tmp_path / f'repo{i}'), SAMPLE_FILES, commits=1) for i in range(count)]
+
+
+def run_batch(output_dir, sources, log=None, **options):
+    log = [] if log is None else log
+    lock = threading.Lock()
+
+    def summarizer_factory():
+        summarizer = RepoSummarizer(llm=StubLLM(), max_concurrency=1, cache=False)
+        generate = summarizer.generate_summaries
+
+        def generate_summaries(repo_data):
+            with lock:
+                log.append(('summarize', repo_data['name']))
+            return generate(repo_data)
+        summarizer.generate_summaries = generate_summaries
+        return summarizer
+
+    runner = BatchRunner(str(output_dir), cloner=RecordingCloner(log), summarizer_factory=summarizer_factory,
+                         parse_processes=False, **options)
+    return runner.run(sources)
+
+
+def test_batch_documents_every_repository_and_resumes_from_the_checkpoint(tmp_path):
+    sources = make_sources(tmp_path, 2)
+    output_dir = tmp_path / 'docs'
+
+    assert run_batch(output_dir, sources) == {source: 'completed' for source in sources}
+    for i in range(2):
+        stem = output_dir / f'repo{i}__origin'
+        assert '# ' in (stem.with_suffix('.md')).read_text(encoding='utf-8')
+        assert json.loads(stem.with_suffix('.json').read_text(encoding='utf-8'))['source'] == sources[i]
+
+    log = []
+    assert run_batch(output_dir, sources + sources[:1], log) == {source: 'skipped' for source in sources}
+    assert log == []
+
+
+def test_batch_holds_back_clones_while_repositories_are_in_flight(tmp_path):
+    sources = make_sources(tmp_path, 3)
+    log = []
+
+    results = run_batch(tmp_path / 'docs', sources, log, clone_workers=4, max_in_flight=1)
+
+    assert set(results.values()) == {'completed'}
+    # One repository at a time: each clone waits for the previous repository to be written
+    assert [stage for stage, _ in log] == ['clone', 'summarize'] * 3
@@ -0,0 +1,108 @@
+import os
+import shutil
+import git
+from conftest import SAMPLE_FILES, make_bare_repo
+from analyzer.clone import GitCloner
+
+
+def dir_size(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def worktree_files(path):
+    return sorted(os.path.relpath(os.path.join(root, name), path)
+                  for root, dirs, names in os.walk(path) if '.git' not in root.split(os.sep) for name in names
+                  if name != '.git')
+
+
+def test_full_clone_has_the_whole_history(bare_repo_url, tmp_path):
+    path = GitCloner().clone_repository(bare_repo_url, str(tmp_path / 'full'))
+    assert git.Repo(path).git.rev_list('--count', 'HEAD') == '3'
+    assert os.path.isfile(os.path.join(path, 'node_modules', 'pkg', 'index.js'))
+
+
+def test_shallow_clone_has_one_commit(bare_repo_url, tmp_path):
+    path = GitCloner(depth=1).clone_repository(bare_repo_url, str(tmp_path / 'shallow'))
+    repo = git.Repo(path)
+    assert repo.git.rev_list('--count', 'HEAD') == '1'
+    assert repo.git.rev_parse('--is-shallow-repository') == 'true'
+
+
+def test_blob_none_clone_fetches_only_checked_out_blobs(bare_repo_url, tmp_path):
+    path = GitCloner(blob_filter='blob:none', sparse=True).clone_repository(bare_repo_url, str(tmp_path / 'partial'))
+    repo = git.Repo(path)
+    assert repo.git.config('remote.origin.partialclonefilter') == 'blob:none'
+
+    # The node_modules blob was never checked out, so never fetched
+    missing = [line for line in repo.git.rev_list('--objects', '--all', '--missing=print').splitlines()
+               if line.startswith('?')]
+    assert missing
+    assert os.path.isfile(os.path.join(path, 'app.py'))
+
+
+def test_sparse_clone_skips_parser_ignored_directories(bare_repo_url, tmp_path):
+    full = GitCloner().clone_repository(bare_repo_url, str(tmp_path / 'full'))
+    sparse = GitCloner(sparse=True).clone_repository(bare_repo_url, str(tmp_path / 'sparse'))
+
+    assert not os.path.exists(os.path.join(sparse, 'node_modules'))
+    assert worktree_files(sparse) == [path for path in worktree_files(full) if not path.startswith('node_modules')]
+    assert dir_size(sparse) < dir_size(full) - 100000
+
+
+def test_mirror_sparse_checkout_fills_the_worktree(bare_repo_url, tmp_path):
+    cloner = GitCloner(sparse=True, blob_filter='blob:none', mirror_dir=str(tmp_path / 'mirrors'))
+    full = GitCloner().clone_repository(bare_repo_url, str(tmp_path / 'full'))
+    path = cloner.clone_repository(bare_repo_url, str(tmp_path / 'worktree'))
+
+    assert worktree_files(path) == [name for name in worktree_files(full) if not name.startswith('node_modules')]
+    assert git.Repo(path).head.commit.hexsha == git.Repo(full).head.commit.hexsha
+
+
+def push_commit(bare_repo_url, tmp_path):
+    """Add a commit to the origin, returning its SHA"""
+    work = git.Repo.clone_from(bare_repo_url, str(tmp_path / 'pusher'))
+    with open(os.path.join(work.working_tree_dir, 'NEWS.md'), 'w', encoding='utf-8') as f:
+        f.write('News\n')
+    work.git.add('NEWS.md')
+    work.git.commit('-m', 'Add news', author='Test <test@example.com>', env={
+        'GIT_COMMITTER_NAME': 'Test', 'GIT_COMMITTER_EMAIL': 'test@example.com'})
+    work.git.push('origin', 'HEAD')
+    return work.head.commit.hexsha
+
+
+def test_second_checkout_fetches_into_the_mirror(bare_repo_url, tmp_path):
+    cloner = GitCloner(mirror_dir=str(tmp_path / 'mirrors'))
+    cloner.clone_repository(bare_repo_url, str(tmp_path / 'first'))
+    assert cloner.last_clone_mode == 'clone'
+
+    new_commit = push_commit(bare_repo_url, tmp_path)
+    path = cloner.clone_repository(bare_repo_url, str(tmp_path / 'second'))
+    assert cloner.last_clone_mode == 'fetch'
+    assert git.Repo(path).head.commit.hexsha == new_commit
+    assert os.path.isfile(os.path.join(path, 'NEWS.md'))
+    assert len(os.listdir(tmp_path / 'mirrors')) == 1
+
+
+def test_eviction_skips_mirrors_with_worktrees_in_use(tmp_path):
+    first_url = make_bare_repo(str(tmp_path / 'first-origin'), SAMPLE_FILES)
+    second_url = make_bare_repo(str(tmp_path / 'second-origin'), SAMPLE_FILES)
+    mirror_dir = str(tmp_path / 'mirrors')
+    cloner = GitCloner(mirror_dir=mirror_dir, mirror_max_bytes=1)  # Every mirror is over budget
+
+    in_use = cloner.clone_repository(first_url, str(tmp_path / 'job1'))
+    cloner.clone_repository(second_url, str(tmp_path / 'job2'))
+    assert len(os.listdir(mirror_dir)) == 2
+    assert os.path.isfile(os.path.join(in_use, 'app.py'))
+    assert git.Repo(in_use).git.status('--porcelain') == ''
+
+    # Once the first job's checkout is gone its mirror can go too
+    shutil.rmtree(tmp_path / 'job1')
+    cloner.clone_repository(second_url, str(tmp_path / 'job3'))
+    remaining = [git.Git(os.path.join(mirror_dir, name)).config('remote.origin.url') for name in os.listdir(mirror_dir)]
+    assert remaining == [second_url]
+
+
+def test_mirror_cache_is_opt_in(monkeypatch):
+    monkeypatch.delenv('CLONE_MIRROR_ENABLED', raising=False)
+    assert GitCloner.from_options(None).mirror_dir is None
+    assert GitCloner.from_options({'mirror': True}).mirror_dir
@@ -0,0 +1,20 @@
+import os
+from conftest import write_files
+from analyzer.parser import RepoParser
+from analyzer.file_stats import compute_statistics
+
+
+def test_statistics_skip_hidden_and_unsized_files(tmp_path):
+    write_files(tmp_path, {'README.md': 'x' * 10, 'src/app.py': 'x' * 300, 'src/lib/util.py': 'x' * 20,
+                           '.env': 'x' * 1000, 'docs/guide.md': 'x' * 50})
+    file_index, _ = RepoParser()._scan_repository(str(tmp_path))
+    # A file that vanished between listing and stat has no size
+    file_index = [entry._replace(size=None) if entry.name == 'guide.md' else entry for entry in file_index]
+
+    stats = compute_statistics(file_index, top_k=2)
+
+    assert stats['total_files'] == 3
+    assert stats['total_size'] == 330
+    assert stats['largest_files'] == [(os.path.join('src', 'app.py'), 300), (os.path.join('src', 'lib', 'util.py'), 20)]
+    assert stats['file_types'] == {'.md': 1, '.py': 2}
+    assert stats['directories'][0] == {'path': 'src', 'files': 2, 'size': 320}
@@ -0,0 +1,40 @@
+from analyzer.generator import DocumentationGenerator
+
+SUMMARIES = {
+    'project_overview': 'A sample service.',
+    'tech_stack_explanation': 'Flask serves the API.',
+    'installation_guide': '1. pip install -r requirements.txt',
+    'structure_explanation': 'Sources live in src/.',
+    'file_explanations': {'app.py': 'The Flask application.', 'main.py': 'The entry point.'}
+}
+
+
+def per_run_fields(metadata):
+    """Metadata without the fields that measure this particular run"""
+    return {key: value for key, value in metadata.items() if key not in ('timings', 'section_cache_stats')}
+
+
+def test_identical_input_gives_an_identical_document_from_the_cache(repo_data):
+    generator = DocumentationGenerator()
+    first = generator.generate_documentation(repo_data, SUMMARIES)
+    second = generator.generate_documentation(repo_data, SUMMARIES)
+
+    assert second['markdown'] == first['markdown'] and second['html'] == first['html']
+    assert per_run_fields(second['metadata']) == per_run_fields(first['metadata'])
+    assert len(second['metadata']['content_hash']) == 64
+    stats = second['metadata']['section_cache_stats']
+    assert stats['markdown']['rendered'] == 0 and stats['markdown']['reused'] > 0
+    assert stats['html'] == {'reused': len(first['metadata']['section_hashes']), 'rendered': 0}
+
+
+def test_changing_one_section_changes_the_hash_and_renders_only_that_section(repo_data):
+    generator = DocumentationGenerator()
+    first = generator.generate_documentation(repo_data, SUMMARIES)
+    second = generator.generate_documentation(repo_data, {**SUMMARIES, 'installation_guide': '1. make install'})
+
+    assert second['metadata']['content_hash'] != first['metadata']['content_hash']
+    changed = [name for name, section_hash in second['metadata']['section_hashes'].items()
+               if first['metadata']['section_hashes'][name] != section_hash]
+    assert changed == ['installation']
+    stats = second['metadata']['section_cache_stats']
+    assert stats['markdown']['rendered'] == 1 and stats['html']['rendered'] == 1
@@ -0,0 +1,25 @@
+from conftest import write_files
+from analyzer.parser import RepoParser
+from analyzer.heuristic_summarizer import HeuristicSummarizer
+
+
+def test_entry_points_include_go_rust_node_and_django_mains(tmp_path):
+    write_files(tmp_path, {
+        'cmd/api/main.go': 'package main\n\nfunc main() {}\n',
+        'src/main.rs': 'fn main() {}\n',
+        'web/server.js': 'require("http").createServer().listen(3000);\n',
+        'manage.py': 'import sys\n',
+    })
+    repo_data = RepoParser(outline_workers=1, outline_cache=False).analyze_repository(str(tmp_path))
+
+    assert HeuristicSummarizer()._entry_points(repo_data) == [
+        'manage.py', 'src/main.rs', 'web/server.js', 'cmd/api/main.go'
+    ]
+
+
+def test_go_run_command_targets_the_entry_point_directory():
+    summarizer = HeuristicSummarizer()
+    repo_data = {'file_contents': {}, 'key_files': {}}
+
+    assert summarizer._run_command('main.go', repo_data) == "go run ."
+    assert summarizer._run_command('cmd/server/main.go', repo_data) == "go run ./cmd/server"
@@ -0,0 +1,92 @@
+import time
+from conftest import StubLLM
+from analyzer.jobs import Job, JobQueue
+
+
+def test_published_section_drops_its_streamed_tokens():
+    job = Job('key', ['summarize'])
+    job.publish('token', {'name': 'overview', 'text': 'Hel'})
+    job.publish('token', {'name': 'structure', 'text': 'src'})
+    job.publish('token', {'name': 'overview', 'text': 'lo'})
+    job.publish('section', {'name': 'overview', 'markdown': 'Hello'})
+    job.close()
+
+    assert list(job.iter_events()) == [
+        ('token', {'name': 'structure', 'text': 'src'}),
+        ('section', {'name': 'overview', 'markdown': 'Hello'})
+    ]
+
+
+def test_event_log_is_capped_dropping_tokens_first():
+    job = Job('key', [], max_events=3)
+    job.publish('section', {'name': 'header', 'markdown': '# Repo'})
+    for i in range(10):
+        job.publish('token', {'name': 'overview', 'text': str(i)})
+
+    assert [event for _, event, _ in job.events] == ['section', 'token', 'token']
+    assert job.events[-1][2]['text'] == '9'
+
+
+def test_subscriber_keeps_its_place_when_events_are_dropped():
+    job = Job('key', [], max_events=2)
+    events = job.iter_events(heartbeat=0)
+    job.publish('token', {'name': 'overview', 'text': 'a'})
+    assert next(events) == ('token', {'name': 'overview', 'text': 'a'})
+
+    job.publish('token', {'name': 'overview', 'text': 'b'})
+    job.publish('section', {'name': 'overview', 'markdown': 'ab'})
+    job.close()
+    assert list(events) == [('section', {'name': 'overview', 'markdown': 'ab'})]
+
+
+def test_get_forgets_expired_jobs():
+    queue = JobQueue(max_workers=1, retention=0)
+    job, _ = queue.submit('key', lambda job: 'done')
+    while not job.done:
+        time.sleep(0.01)
+
+    assert queue.get(job.id) is None
+    assert job.id not in queue._jobs
+
+
+def test_subscribers_are_counted_while_they_read_the_log():
+    job = Job('key', [])
+    events = job.iter_events(heartbeat=0)
+    assert job.subscribers == 0
+
+    assert next(events) is None
+    assert job.subscribers == 1
+    events.close()
+    assert job.subscribers == 0
+
+
+def test_analysis_streams_tokens_only_to_subscribed_jobs(bare_repo_url, monkeypatch):
+    monkeypatch.setenv('OUTLINE_CACHE_ENABLED', 'false')
+    monkeypatch.setenv('REPO_STORE_SPILL_PATH', '')
+    from analyzer import app as app_module
+    from analyzer.clone import GitCloner
+    from analyzer.summarizer import RepoSummarizer
+
+    token_callbacks = []
+
+    class RecordingSummarizer(RepoSummarizer):
+        def __init__(self):
+            super().__init__(llm=StubLLM(), max_concurrency=1, cache=False)
+
+        def generate_summaries(self, repo_data, on_section=None, on_token=None):
+            token_callbacks.append(on_token)
+            return super().generate_summaries(repo_data, on_section, on_token)
+
+    monkeypatch.setattr(app_module, 'RepoSummarizer', RecordingSummarizer)
+
+    def analyze(subscribed):
+        job = Job('key', [])
+        events = job.iter_events(heartbeat=0)
+        if subscribed:
+            next(events)
+        result = app_module.run_analysis(job, bare_repo_url, None, GitCloner())
+        app_module.analyzed_repos.delete(result['repo_id'])
+
+    analyze(subscribed=False)
+    analyze(subscribed=True)
+    assert token_callbacks[0] is None and token_callbacks[1] is not None
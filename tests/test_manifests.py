@@ -0,0 +1,31 @@
+from analyzer.manifests import manifest_parser, parse_build_gradle, parse_requirements_txt
+
+
+def scopes(dependencies):
+    return {item['name']: item['scope'] for item in dependencies}
+
+
+def test_requirements_dev_scope_comes_from_the_file_name_only():
+    content = "flask==2.3.3\n"
+    assert scopes(parse_requirements_txt(content, 'requirements-dev.txt')) == {'flask': 'dev'}
+    assert scopes(parse_requirements_txt(content, 'ci/dev-requirements.txt')) == {'flask': 'dev'}
+    assert scopes(parse_requirements_txt(content, 'docs/requirements.txt')) == {'flask': 'runtime'}
+    assert scopes(parse_requirements_txt(content, 'tests/fixtures/requirements.txt')) == {'flask': 'runtime'}
+    assert manifest_parser('requirements-dev.txt') is parse_requirements_txt
+
+
+def test_gradle_compile_only_dependencies_are_build_only():
+    content = """
+    dependencies {
+        implementation 'com.google.guava:guava:32.1.2-jre'
+        compileOnly 'org.projectlombok:lombok:1.18.30'
+        annotationProcessor 'org.projectlombok:lombok-mapstruct-binding:0.2.0'
+        testImplementation 'junit:junit:4.13.2'
+    }
+    """
+    assert scopes(parse_build_gradle(content, 'build.gradle')) == {
+        'com.google.guava:guava': 'runtime',
+        'org.projectlombok:lombok': 'build',
+        'org.projectlombok:lombok-mapstruct-binding': 'build',
+        'junit:junit': 'dev'
+    }
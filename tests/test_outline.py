@@ -0,0 +1,177 @@
+import git
+from conftest import write_files
+from analyzer import parser as parser_module
+from analyzer.llm_cache import LLMCache
+from analyzer.metrics import OUTLINE_CACHE_REQUESTS
+from analyzer.outline import MAX_SYMBOLS, extract_outline
+from analyzer.parser import RepoParser
+
+PYTHON_SOURCE = '''"""Flask application factory. More text."""
+import os
+from flask import Flask
+
+
+class App(Flask):
+    """The application."""
+
+    def run(self, port: int = 80) -> None:
+        """Serve requests."""
+
+
+async def fetch(url):
+    return url
+'''
+
+TYPESCRIPT_SOURCE = '''// Client for the REST API.
+import { get } from './http';
+const fs = require('fs');
+
+/** A typed client. */
+export class Client extends Base {
+  constructor(url: string) {
+    this.url = url;
+  }
+  async load(id: number): Promise<Item> {
+    if (id) { return get(id); }
+  }
+}
+
+export function connect(url) {
+  return new Client(url);
+}
+
+export const close = async (client) => client.close();
+export type Item = { id: number };
+'''
+
+GO_SOURCE = '''// Package main starts the server.
+package main
+
+import (
+\t"fmt"
+\tlog "github.com/sirupsen/logrus"
+)
+
+// Server handles requests.
+type Server struct {
+\tport int
+}
+
+// Start listens on the port.
+func (s *Server) Start() error {
+\treturn nil
+}
+
+func main() {
+\tfmt.Println("hi")
+}
+'''
+
+JAVA_SOURCE = '''package com.example;
+
+import java.util.List;
+import static java.lang.Math.max;
+
+/** Service for users. */
+public class UserService {
+    private final List<String> names;
+
+    /** Find a user by name. */
+    public String find(String name) {
+        if (name == null) { return null; }
+        return name;
+    }
+}
+'''
+
+
+def signatures(outline):
+    """Top-level signatures, each with the signatures of its members"""
+    return {symbol['signature']: [member['signature'] for member in symbol.get('members', [])]
+            for symbol in outline['symbols']}
+
+
+def test_python_outline():
+    outline = extract_outline('app.py', PYTHON_SOURCE)
+
+    assert (outline['language'], outline['lines'], outline['doc']) == ('Python', 15, 'Flask application factory.')
+    assert outline['imports'] == ['os', 'flask']
+    assert signatures(outline) == {'class App(Flask)': ['def run(self, port: int=80) -> None'],
+                                   'async def fetch(url)': []}
+    assert outline['symbols'][0]['members'][0]['doc'] == 'Serve requests.'
+
+
+def test_typescript_outline():
+    outline = extract_outline('api.ts', TYPESCRIPT_SOURCE)
+
+    assert (outline['language'], outline['doc']) == ('TypeScript', 'Client for the REST API.')
+    assert outline['imports'] == ['./http', 'fs']
+    assert signatures(outline) == {
+        'export class Client extends Base': ['constructor(url: string)', 'async load(id: number): Promise<Item>'],
+        'export function connect(url)': [],
+        'export const close = async (client) => client.close()': [],
+        'export type Item': []
+    }
+    assert outline['symbols'][0]['doc'] == 'A typed client.'
+
+
+def test_go_outline():
+    outline = extract_outline('main.go', GO_SOURCE)
+
+    assert (outline['language'], outline['doc']) == ('Go', 'Package main starts the server.')
+    assert outline['imports'] == ['fmt', 'github.com/sirupsen/logrus']
+    assert [(symbol['kind'], symbol['name']) for symbol in outline['symbols']] == [
+        ('struct', 'Server'), ('function', 'Server.Start'), ('function', 'main')]
+    assert outline['symbols'][1]['doc'] == 'Start listens on the port.'
+
+
+def test_java_outline():
+    outline = extract_outline('UserService.java', JAVA_SOURCE)
+
+    assert outline['language'] == 'Java'
+    assert outline['imports'] == ['java.util.List', 'java.lang.Math.max']
+    assert signatures(outline) == {'public class UserService': ['public String find(String name)']}
+    assert outline['symbols'][0]['members'][0]['doc'] == 'Find a user by name.'
+
+
+def test_unsupported_language_has_no_outline():
+    assert extract_outline('notes.txt', 'def not_code(): pass\n') is None
+
+
+def test_outline_keeps_at_most_max_symbols_counting_members():
+    methods = "".join(f"    def method_{i}(self):\n        pass\n" for i in range(MAX_SYMBOLS))
+    functions = "".join(f"def function_{i}():\n    pass\n" for i in range(10))
+    outline = extract_outline('big.py', f"class Big:\n{methods}\n{functions}")
+
+    assert len(outline['symbols']) == 1
+    assert len(outline['symbols'][0]['members']) == MAX_SYMBOLS - 1
+
+
+def test_python_syntax_error_falls_back_to_line_matching():
+    source = 'import os\nfrom util import helper\n\nclass Legacy:\n    def run(self):\n        print "old"\n\n' \
+             'def main(argv):\n    pass\n'
+    outline = extract_outline('legacy.py', source)
+
+    assert outline['imports'] == ['os', 'util']
+    assert signatures(outline) == {'class Legacy': ['def run(self)'], 'def main(argv)': []}
+
+
+def test_second_outline_of_an_unchanged_blob_comes_from_the_cache(tmp_path, monkeypatch):
+    repo_path = write_files(str(tmp_path / 'repo'), {'app.py': PYTHON_SOURCE, 'main.go': GO_SOURCE})
+    repo = git.Repo.init(repo_path)
+    repo.git.add(A=True)
+    parser = RepoParser(outline_workers=1, outline_cache=LLMCache(str(tmp_path / 'outlines.sqlite3'), ttl=0))
+    file_index, _ = parser._scan_repository(repo_path)
+
+    first, _ = parser._get_outlines(repo_path, file_index)
+
+    outlined = []
+    extract_outlines = parser_module.extract_outlines
+    monkeypatch.setattr(parser_module, 'extract_outlines',
+                        lambda files, workers=1: outlined.extend(files) or extract_outlines(files, workers))
+    hits = OUTLINE_CACHE_REQUESTS.value(result='hit')
+    second, _ = parser._get_outlines(repo_path, file_index)
+
+    assert second == first and set(second) == {'app.py', 'main.go'}
+    assert outlined == []
+    assert OUTLINE_CACHE_REQUESTS.value(result='hit') == hits + 2
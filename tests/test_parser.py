@@ -0,0 +1,67 @@
+import os
+import git
+from conftest import write_files
+from analyzer.parser import RepoParser
+
+
+def test_same_size_edit_is_hashed_instead_of_trusting_the_index(sample_repo):
+    repo = git.Repo.init(sample_repo)
+    repo.git.add(A=True)
+    parser = RepoParser(outline_workers=1, outline_cache=False)
+    path = os.path.join(sample_repo, 'app.py')
+
+    assert parser.analyze_repository(sample_repo)['file_hashes']['app.py'] == repo.git.hash_object(path)
+
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content.replace('hello', 'howdy'))
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))  # However coarse the clock
+
+    file_hashes = parser.analyze_repository(sample_repo)['file_hashes']
+    assert file_hashes['app.py'] == repo.git.hash_object(path)
+    assert file_hashes['app.py'] != repo.index.entries[('app.py', 0)].hexsha
+
+
+def test_parallel_scan_matches_the_serial_scan(sample_repo):
+    # Nested and skipped directories on top of the sample, deeper than the structure goes
+    write_files(sample_repo, {
+        **{f'src/pkg{i}/module{j}.py': f'def f{j}():\n    return {j}\n' for i in range(5) for j in range(4)},
+        'src/pkg0/deep/deeper/deepest/README.md': '# Nested\n',
+        'web/package.json': '{"dependencies": {"vue": "^3.3.0"}}',
+        'node_modules/left-pad/index.js': 'module.exports = 1;\n',
+        'docs/guide.md': 'Guide\n'
+    })
+
+    def analyze(scan_workers):
+        parser = RepoParser(scan_workers=scan_workers, outline_workers=1, outline_cache=False)
+        return {key: value for key, value in parser.analyze_repository(sample_repo).items() if key != 'timings'}
+
+    assert analyze(4) == analyze(1)
+
+
+def test_important_files_match_whole_names_not_substrings(tmp_path):
+    write_files(tmp_path, {
+        'README.md': '# Top\n',
+        'docs/README.md': '# Docs\n',
+        'docs/OLD_README.md': '# Old\n',
+        'notes/README.md.orig': '# Backup\n',
+        'myapp.py': 'print("not an entry point")\n',
+        'lib/main.py.bak': 'print("backup")\n',
+    })
+    repo_data = RepoParser(outline_workers=1, outline_cache=False).analyze_repository(str(tmp_path))
+
+    # Substring matching used to read every *README.md* variant and myapp.py
+    assert set(repo_data['file_contents']) == {'README.md', os.path.join('docs', 'README.md')}
+    assert set(repo_data['key_files']) == {'README.md', os.path.join('docs', 'README.md')}
+
+
+def test_package_json_without_framework_dependencies_detects_no_framework(tmp_path):
+    write_files(tmp_path, {'package.json': '{"name": "tool", "dependencies": {"lodash": "^4.17.21"}}',
+                           'index.js': 'module.exports = require("lodash");\n'})
+    tech_stack = RepoParser(outline_workers=1, outline_cache=False).analyze_repository(str(tmp_path))['tech_stack']
+
+    assert 'JavaScript/Node.js' in tech_stack
+    # Every package.json used to add React, Vue.js and Angular
+    assert not {'React', 'Vue.js', 'Angular'} & set(tech_stack)
@@ -0,0 +1,32 @@
+from analyzer.retrieval import ChunkIndex
+from analyzer.session_store import RepoSessionStore
+
+
+def make_entry(words=200):
+    chunks = [{'path': f'src/mod{i}.py', 'start_line': 1, 'end_line': 10,
+               'text': ' '.join(f'name{i}_{j}' for j in range(words))} for i in range(20)]
+    repo_data = {'name': 'repo', 'chunks': chunks}
+    return {'repo_data': repo_data, 'summaries': {}, 'chunk_index': ChunkIndex(chunks),
+            'repo_path': None, 'temp_dir': None}
+
+
+def test_size_estimate_counts_the_chunk_index():
+    store = RepoSessionStore()
+    entry = make_entry()
+    without_index = store._estimate_size({**entry, 'chunk_index': None})
+
+    assert store._estimate_size(entry) >= without_index + entry['chunk_index'].nbytes
+    store.put('repo', entry)
+    assert store.stats()['size_bytes'] == store._estimate_size(entry)
+
+
+def test_spilled_entry_rebuilds_its_chunk_index_once(tmp_path):
+    store = RepoSessionStore(max_bytes=1, spill_path=str(tmp_path / 'sessions.db'))
+    store.put('first', make_entry())
+    store.put('second', make_entry())  # Over budget, so 'first' is spilled
+
+    entry = store.get('first')
+    assert isinstance(entry['chunk_index'], ChunkIndex)
+    assert entry['chunk_index'].search('name3_7')[0][1]['path'] == 'src/mod3.py'
+    assert store.get('first')['chunk_index'] is entry['chunk_index']
+    assert store.counters['spill_hits'] == 1
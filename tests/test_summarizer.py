@@ -0,0 +1,194 @@
+import os
+import json
+import time
+from conftest import StubLLM, SAMPLE_FILES, default_response, file_prompt_paths, write_files
+from analyzer.parser import RepoParser
+from analyzer.llm_cache import LLMCache
+from analyzer.metrics import LLM_CACHE_REQUESTS
+from analyzer.summarizer import RepoSummarizer
+
+
+def summaries_without_timings(summaries):
+    return {key: value for key, value in summaries.items() if key != 'timings'}
+
+
+def test_concurrent_summaries_match_sequential_and_take_about_the_slowest_call(repo_data):
+    latency = 0.2
+
+    sequential_llm = StubLLM(latency=latency)
+    start = time.perf_counter()
+    sequential = RepoSummarizer(llm=sequential_llm, max_concurrency=1, cache=False).generate_summaries(repo_data)
+    sequential_time = time.perf_counter() - start
+
+    concurrent_llm = StubLLM(latency=latency)
+    start = time.perf_counter()
+    concurrent = RepoSummarizer(llm=concurrent_llm, max_concurrency=8, cache=False).generate_summaries(repo_data)
+    concurrent_time = time.perf_counter() - start
+
+    assert 'error' not in sequential
+    assert not sequential['structure_explanation'].startswith('Could not')
+    assert summaries_without_timings(concurrent) == summaries_without_timings(sequential)
+    assert sorted(concurrent_llm.prompts) == sorted(sequential_llm.prompts)
+    assert len(sequential_llm.prompts) >= 5
+    assert sequential_time >= latency * len(sequential_llm.prompts)
+    # Every call runs side by side, so the run takes about one call plus overhead
+    assert concurrent_time < latency * 2.5
+
+
+def test_run_deadline_times_out_pending_sections_and_stops_llm_calls(repo_data):
+    llm = StubLLM(latency=0.4)
+    summarizer = RepoSummarizer(llm=llm, max_concurrency=2, cache=False, run_timeout=0.1)
+
+    start = time.perf_counter()
+    summaries = summarizer.generate_summaries(repo_data)
+    assert time.perf_counter() - start < 0.4
+
+    assert summaries['installation_guide'].startswith("Could not generate installation guide")
+    assert 'timed out' in summaries['installation_guide']
+    assert all('timed out' in explanation for explanation in summaries['file_explanations'].values())
+
+    # The two calls in flight at the deadline finish; their threads start no more
+    time.sleep(0.6)
+    assert len(llm.prompts) == 2
+
+
+def analysis_sections(summaries):
+    """Summary sections without the per-run bookkeeping"""
+    return {key: value for key, value in summaries.items()
+            if key not in ('timings', 'prompt_tokens', 'file_cache_stats')}
+
+
+def test_second_analysis_of_an_unchanged_repository_makes_no_llm_calls(sample_repo, tmp_path):
+    cache = LLMCache(str(tmp_path / 'llm_cache.sqlite3'))
+    parser = RepoParser(outline_workers=1, outline_cache=False)
+
+    first_llm = StubLLM()
+    first = RepoSummarizer(llm=first_llm, cache=cache).generate_summaries(parser.analyze_repository(sample_repo))
+    second_llm = StubLLM()
+    second = RepoSummarizer(llm=second_llm, cache=cache).generate_summaries(parser.analyze_repository(sample_repo))
+
+    assert first_llm.prompts
+    assert second_llm.prompts == []
+    assert analysis_sections(second) == analysis_sections(first)
+    assert second['file_cache_stats'] == {'reused': len(first['file_explanations']), 'regenerated': 0}
+    assert cache.stats()['hits'] > 0
+
+
+def test_disabled_cache_is_never_consulted(repo_data):
+    hits, misses = LLM_CACHE_REQUESTS.value(result='hit'), LLM_CACHE_REQUESTS.value(result='miss')
+    llm = StubLLM()
+    summarizer = RepoSummarizer(llm=llm, cache=False)
+    assert summarizer.cache is None
+
+    summarizer.generate_summaries(repo_data)
+    first_run = sorted(llm.prompts)
+    summarizer.generate_summaries(repo_data)
+
+    assert sorted(llm.prompts[len(first_run):]) == first_run
+    assert LLM_CACHE_REQUESTS.value(result='hit') == hits
+    assert LLM_CACHE_REQUESTS.value(result='miss') == misses
+
+
+def test_identical_files_at_different_paths_keep_their_own_explanations(tmp_path):
+    files = dict(SAMPLE_FILES, **{'tools/main.py': SAMPLE_FILES['main.py']})
+    root = write_files(str(tmp_path / 'repo'), files)
+    repo_data = RepoParser(outline_workers=1, outline_cache=False).analyze_repository(root)
+    assert repo_data['file_hashes']['main.py'] == repo_data['file_hashes'][os.path.join('tools', 'main.py')]
+    cache = LLMCache(str(tmp_path / 'llm_cache.sqlite3'))
+
+    for _ in range(2):  # The second run is served from the cache
+        explanations = RepoSummarizer(llm=StubLLM(), cache=cache).generate_summaries(repo_data)['file_explanations']
+        for file_path in ('main.py', os.path.join('tools', 'main.py')):
+            assert explanations[file_path] == f"Explanation of {file_path}."
+
+
+def test_only_calls_with_a_token_callback_use_the_streaming_llm(repo_data):
+    summarizer = RepoSummarizer(llm=StubLLM(), max_concurrency=1, cache=False)
+    summarizer.streaming_llm = StubLLM()
+
+    summarizer.generate_summaries(repo_data)
+    assert summarizer.llm.prompts and not summarizer.streaming_llm.prompts
+
+    summarizer.llm.prompts.clear()
+    tokens = []
+    summarizer.generate_summaries(repo_data, on_token=lambda key, token: tokens.append(key))
+    assert summarizer.streaming_llm.prompts
+    # File explanations stream nothing, so they stay on the plain LLM
+    assert all(not file_prompt_paths(prompt) for prompt in summarizer.streaming_llm.prompts)
+    assert all(file_prompt_paths(prompt) for prompt in summarizer.llm.prompts)
+
+
+BATCH_FILES = {f'service_{i}/main.py': f'def handler_{i}(request):\n    """Handle request {i}"""\n' + '    pass\n' * 20
+               for i in range(4)}
+
+
+def explain_files(tmp_path, respond_to_batch):
+    """Explain BATCH_FILES in one batch, answering the batch prompt with respond_to_batch(paths)"""
+    write_files(tmp_path, BATCH_FILES)
+    repo_data = RepoParser(outline_workers=1, outline_cache=False).analyze_repository(str(tmp_path))
+
+    def respond(prompt):
+        if 'JSON object' in prompt:
+            return respond_to_batch(file_prompt_paths(prompt))
+        return default_response(prompt)
+
+    llm = StubLLM(respond=respond)
+    summarizer = RepoSummarizer(llm=llm, max_concurrency=1, cache=False)
+    summarizer.file_batch_size = 4
+    explanations = summarizer.generate_summaries(repo_data)['file_explanations']
+
+    batch_prompts = [prompt for prompt in llm.prompts if 'JSON object' in prompt]
+    file_prompts = [file_prompt_paths(prompt)[0] for prompt in llm.prompts
+                    if file_prompt_paths(prompt) and 'JSON object' not in prompt]
+    return explanations, batch_prompts, sorted(file_prompts)
+
+
+def test_batch_response_explains_every_file_in_one_call(tmp_path):
+    explanations, batch_prompts, file_prompts = explain_files(
+        tmp_path, lambda paths: json.dumps({path: f"Batched {path}." for path in paths}))
+
+    assert len(batch_prompts) == 1
+    assert sorted(file_prompt_paths(batch_prompts[0])) == sorted(BATCH_FILES)
+    assert file_prompts == []
+    assert explanations == {path: f"Batched {path}." for path in BATCH_FILES}
+
+
+def test_malformed_batch_response_falls_back_to_one_call_per_file(tmp_path):
+    explanations, batch_prompts, file_prompts = explain_files(tmp_path, lambda paths: "Sorry, { not JSON")
+
+    assert len(batch_prompts) == 1
+    assert file_prompts == sorted(BATCH_FILES)
+    assert explanations == {path: f"Explanation of {path}." for path in BATCH_FILES}
+
+
+def test_batch_response_missing_files_explains_only_those_one_at_a_time(tmp_path):
+    def respond(paths):
+        # The first file is complete, the second is cut off mid-string by the token limit
+        return '{' + json.dumps(paths[0]) + ': "Batched.", ' + json.dumps(paths[1]) + ': "Cut o'
+
+    explanations, batch_prompts, file_prompts = explain_files(tmp_path, respond)
+    batched = file_prompt_paths(batch_prompts[0])[0]
+
+    assert len(batch_prompts) == 1
+    assert file_prompts == sorted(path for path in BATCH_FILES if path != batched)
+    assert explanations[batched] == "Batched."
+    assert all(explanations[path] == f"Explanation of {path}." for path in file_prompts)
+
+
+def test_single_file_prompt_has_one_outline_followed_by_source(tmp_path):
+    # Longer than the parser reads, so the prompt leads with the outline of the whole file
+    module = "".join(f'def handler_{i}(request):\n    """Handle request {i}"""\n    return {i}\n\n\n'
+                     for i in range(400))
+    write_files(tmp_path, {'main.py': module})
+    repo_data = RepoParser(outline_workers=1, outline_cache=False).analyze_repository(str(tmp_path))
+    llm = StubLLM()
+    summarizer = RepoSummarizer(llm=llm, max_concurrency=1, cache=False)
+    summarizer.file_batch_size = 1
+
+    summarizer.generate_summaries(repo_data)
+    prompt = next(prompt for prompt in llm.prompts if file_prompt_paths(prompt) == ['main.py'])
+
+    assert prompt.count('Outline:') == 1
+    assert prompt.count('Source (start of file):') == 1
+    source = prompt[prompt.index('Source (start of file):'):]
+    assert source.split('\n', 1)[1].startswith('def handler_0(request):')
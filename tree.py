@@ -0,0 +1,156 @@
+# Sizes marking entries that are not files
+DIRECTORY = -1
+ELIDED_DIRECTORY = -2  # A directory below the scan depth, listed without its contents
+
+# Rendering limits: directories with more files than MAX_FILES are summarised by extension,
+# at most MAX_DIRS subdirectories are listed per directory and MAX_LINES lines in total
+MAX_FILES = 25
+MAX_DIRS = 50
+MAX_LINES = 400
+MAX_FILE_GROUPS = 5  # Extension groups listed for a summarised directory
+
+
+class DirectoryTree:
+    """
+    Folder structure as three flat lists indexed by entry: names, parent indexes and sizes
+    (DIRECTORY or ELIDED_DIRECTORY for directories). Entry 0 is the repository root.
+    The children of a directory are always added together, so they are contiguous.
+    """
+
+    def __init__(self, names=None, parents=None, sizes=None):
+        self.names = names if names is not None else ['']
+        self.parents = parents if parents is not None else [-1]
+        self.sizes = sizes if sizes is not None else [DIRECTORY]
+        self._children = None
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['names'], data['parents'], data['sizes'])
+
+    def to_dict(self):
+        """Plain lists, so repository data holding the tree stays JSON serializable"""
+        return {'names': self.names, 'parents': self.parents, 'sizes': self.sizes}
+
+    def add(self, name, parent, size):
+        """Append an entry, returning its index"""
+        self.names.append(name)
+        self.parents.append(parent)
+        self.sizes.append(size)
+        self._children = None
+        return len(self.names) - 1
+
+    def children(self, index):
+        """Indexes of the entries in a directory, in listing order"""
+        if self._children is None:
+            first = [0] * len(self.names)
+            count = [0] * len(self.names)
+            parents = self.parents
+            for child in range(1, len(parents)):
+                parent = parents[child]
+                if not count[parent]:
+                    first[parent] = child
+                count[parent] += 1
+            self._children = (first, count)
+        first, count = self._children
+        return range(first[index], first[index] + count[index])
+
+    def is_dir(self, index):
+        return self.sizes[index] < 0
+
+    def __len__(self):
+        return len(self.names) - 1
+
+
+def format_size(size_bytes):
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if size_bytes < 1024.0:
+            return f"{size_bytes:.1f} {unit}"
+        size_bytes /= 1024.0
+    return f"{size_bytes:.1f} TB"
+
+
+def summarize_files(tree, files, max_groups=MAX_FILE_GROUPS):
+    """One line per extension, largest group first, e.g. '1,204 files: *.png, 3.1 MB'"""
+    groups = {}
+    names, sizes = tree.names, tree.sizes
+    for index in files:
+        name = names[index]
+        dot = name.rfind('.')
+        extension = name[dot:] if dot > 0 else None
+        count, size = groups.get(extension, (0, 0))
+        groups[extension] = (count + 1, size + sizes[index])
+
+    ordered = sorted(groups.items(), key=lambda item: (-item[1][0], item[0] or ''))
+    lines = []
+    for extension, (count, size) in ordered[:max_groups]:
+        pattern = f"*{extension}" if extension else "no extension"
+        lines.append(f"{count:,} file{'s' if count != 1 else ''}: {pattern}, {format_size(size)}")
+
+    rest = ordered[max_groups:]
+    if rest:
+        count = sum(count for _, (count, _) in rest)
+        size = sum(size for _, (_, size) in rest)
+        lines.append(f"{count:,} other files, {format_size(size)}")
+    return lines
+
+
+def directory_items(tree, index, max_files=MAX_FILES, max_dirs=MAX_DIRS):
+    """
+    The lines of one directory as (child index, None) for entries and (None, text) for
+    summaries, compacting directories with more than max_files files or max_dirs subdirectories
+    """
+    children = tree.children(index)
+    sizes = tree.sizes
+    dirs = [child for child in children if sizes[child] < 0]
+    if len(children) - len(dirs) > max_files:
+        # Subdirectories first, then the files summarised by extension
+        files = [child for child in children if sizes[child] >= 0]
+        items = [(child, None) for child in dirs[:max_dirs]]
+        items += [(None, line) for line in summarize_files(tree, files)]
+    elif len(dirs) > max_dirs:
+        hidden = set(dirs[max_dirs:])
+        items = [(child, None) for child in children if child not in hidden]
+    else:
+        items = [(child, None) for child in children]
+
+    if len(dirs) > max_dirs:
+        items.append((None, f"{len(dirs) - max_dirs:,} more directories"))
+    return items
+
+
+def render_tree(tree, style='tree', max_files=MAX_FILES, max_dirs=MAX_DIRS, max_lines=MAX_LINES):
+    """
+    Render a DirectoryTree (or its to_dict form) as text, in linear time and at most
+    max_lines lines. style 'tree' draws box characters, 'list' an indented Markdown list.
+    """
+    if isinstance(tree, dict):
+        tree = DirectoryTree.from_dict(tree)
+
+    lines = []
+    # One frame per open directory: [its items, position of the next one, line prefix, depth]
+    stack = [[directory_items(tree, 0, max_files, max_dirs), 0, '', 0]]
+    while stack and len(lines) < max_lines:
+        frame = stack[-1]
+        items, position, prefix, depth = frame
+        if position == len(items):
+            stack.pop()
+            continue
+        frame[1] += 1
+
+        child, text = items[position]
+        if child is not None:
+            text = tree.names[child] + ('/' if tree.is_dir(child) else '')
+        last = position == len(items) - 1
+        if style == 'tree':
+            lines.append(f"{prefix}{'└── ' if last else '├── '}{text}\n")
+        else:
+            lines.append(f"{'  ' * depth}- {text}\n")
+
+        # Depth-first, so a directory's contents directly follow its own line
+        if child is not None and tree.sizes[child] == DIRECTORY:
+            child_prefix = prefix + ('    ' if last else '│   ') if style == 'tree' else ''
+            stack.append([directory_items(tree, child, max_files, max_dirs), 0, child_prefix, depth + 1])
+
+    if any(position < len(items) for items, position, _, _ in stack):
+        lines.append(f"... (cut at {max_lines:,} lines)\n")
+    return ''.join(lines)